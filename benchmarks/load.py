@@ -0,0 +1,120 @@
+import gc
+import importlib
+import os
+import sys
+import time
+from urllib.parse import urlparse
+
+# Add project root to sys.path
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+import gevent
+import psutil
+from locust import FastHttpUser, constant, task
+from locust.env import Environment
+from influxdb import InfluxDBClient
+
+from src.common.influxdb_listener import InfluxDBListener
+from src.common.scenario_engine import compile_scenario
+
+# 参与基准测试的 User 类: 名称 -> "模块:类名"
+SCENARIOS = {
+    "BaselineFastHttpUser": "benchmarks.load:BaselineFastHttpUser",
+    "WebsiteUser": "projects.crm.scenarios.pages:WebsiteUser",
+    "LoginUser": "projects.crm.scenarios.generated.login:LoginUser",
+    "YamlBaselineUser": "benchmarks/scenario.yaml",
+}
+
+
+class BaselineFastHttpUser(FastHttpUser):
+    """框架本身的上限: 每个任务只发一个 GET 请求"""
+    abstract = True
+
+    @task
+    def index(self):
+        self.client.get("/api/ping")
+
+
+def load_user_class(spec):
+    if spec.endswith((".yaml", ".yml")):
+        return compile_scenario(os.path.join(ROOT_DIR, spec))
+    module_name, class_name = spec.split(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def _local_pages(load_pages):
+    def wrapper(self):
+        # 页面列表中的绝对地址指向真实环境, 基准测试中改为替身服务上的同名路径
+        return [urlparse(page).path or "/" for page in load_pages(self)]
+    return wrapper
+
+
+def _bench_class(user_class, host, wait_time):
+    """派生出指向替身服务、使用指定等待时间的 User 类"""
+    attrs = {"host": host, "wait_time": wait_time, "abstract": False, "__module__": __name__}
+    if hasattr(user_class, "load_pages"):
+        attrs["load_pages"] = _local_pages(user_class.load_pages)
+    return type(f"Bench{user_class.__name__}", (user_class,), attrs)
+
+
+def _start(user_class, users, with_listener, port):
+    env = Environment(user_classes=[user_class], host=user_class.host)
+    if with_listener:
+        listener = InfluxDBListener(env)
+        listener.client = InfluxDBClient(host="127.0.0.1", port=port, database="locust")
+    runner = env.create_local_runner()
+    runner.start(users, spawn_rate=users)
+    return env, runner
+
+
+def measure_max_rps(user_class, port, users=50, duration=10, warmup=3, with_listener=False):
+    """
+    单 worker (单进程) 的最大 RPS: 无等待时间运行, 预热后统计 duration 秒内的请求数
+
+    Returns:
+        {"rps", "cpu_percent", "failures", "users"}
+    """
+    bench_class = _bench_class(user_class, f"http://127.0.0.1:{port}", constant(0))
+    env, runner = _start(bench_class, users, with_listener, port)
+    process = psutil.Process()
+    try:
+        gevent.sleep(warmup)
+        requests_before = env.stats.total.num_requests
+        failures_before = env.stats.total.num_failures
+        process.cpu_percent(None)
+        started = time.perf_counter()
+        gevent.sleep(duration)
+        elapsed = time.perf_counter() - started
+        cpu_percent = process.cpu_percent(None)
+        requests = env.stats.total.num_requests - requests_before
+        failures = env.stats.total.num_failures - failures_before
+    finally:
+        runner.quit()
+    return {"rps": requests / elapsed, "cpu_percent": cpu_percent, "failures": failures, "users": users}
+
+
+def measure_memory_per_user(user_class, port, users=200, settle=3):
+    """
+    每个模拟用户占用的内存: 用户执行一次任务后进入长时间等待, 比较启动前后的 RSS
+
+    Returns:
+        {"kib_per_user", "rss_before_mib", "rss_after_mib", "users"}
+    """
+    bench_class = _bench_class(user_class, f"http://127.0.0.1:{port}", constant(3600))
+    process = psutil.Process()
+    gc.collect()
+    rss_before = process.memory_info().rss
+    env, runner = _start(bench_class, users, False, port)
+    try:
+        gevent.sleep(settle)
+        gc.collect()
+        rss_after = process.memory_info().rss
+    finally:
+        runner.quit()
+    return {
+        "kib_per_user": (rss_after - rss_before) / users / 1024,
+        "rss_before_mib": rss_before / 1024 / 1024,
+        "rss_after_mib": rss_after / 1024 / 1024,
+        "users": users,
+    }
@@ -0,0 +1,82 @@
+import csv
+import os
+import sys
+import tempfile
+import time
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from locust.event import Events
+from influxdb import InfluxDBClient
+
+from src.common.data_loader import CsvDataLoader
+from src.common.influxdb_listener import InfluxDBListener
+from src.common.shapes import ConfigurableShape
+
+DEFAULT_MIN_TIME = 0.5
+DEFAULT_REPEAT = 5
+
+
+def bench(func, min_time=DEFAULT_MIN_TIME, repeat=DEFAULT_REPEAT):
+    """
+    测量单次调用耗时: 先倍增调用次数直到单轮耗时不少于 min_time / repeat, 再取 repeat 轮中的最小值
+
+    Returns:
+        {"ns_per_call", "calls"}
+    """
+    number = 1
+    while True:
+        elapsed = _timed(func, number)
+        if elapsed >= min_time / repeat:
+            break
+        number *= 2
+    best = min([elapsed] + [_timed(func, number) for _ in range(repeat - 1)])
+    return {"ns_per_call": best / number * 1e9, "calls": number}
+
+
+def _timed(func, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return time.perf_counter() - start
+
+
+class _Env:
+    """InfluxDBListener 只使用 env.events 与 env.runner"""
+
+    def __init__(self):
+        self.events = Events()
+        self.runner = None
+
+
+def bench_influx_listener(port, **kwargs):
+    """InfluxDBListener.on_request 的单次开销 (写入本地替身服务的 /write)"""
+    listener = InfluxDBListener(_Env())
+    listener.client = InfluxDBClient(host="127.0.0.1", port=port, database="locust")
+
+    def call():
+        listener.on_request("GET", "/api/customers", 12.5, 512, None)
+
+    return bench(call, **kwargs)
+
+
+def bench_data_loader(rows=1000, **kwargs):
+    """BaseDataLoader.next 的单次开销"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "accounts.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["username", "password"])
+            writer.writerows([f"user{i}", "secret"] for i in range(rows))
+        loader = CsvDataLoader(path)
+    return bench(loader.next, **kwargs)
+
+
+def bench_shape_tick(stages=10, **kwargs):
+    """ConfigurableShape.tick 的单次开销 (运行时间位于最后一个阶段, 遍历全部阶段)"""
+    shape = ConfigurableShape()
+    shape.stages = [{"duration": 60 * (i + 1), "users": 10 * (i + 1), "spawn_rate": 5} for i in range(stages)]
+    last_stage = shape.stages[-1]["duration"] - 1
+    shape.get_run_time = lambda: last_stage
+    return bench(shape.tick, **kwargs)
@@ -0,0 +1,174 @@
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_server import start_stub_server, stop_stub_server
+from src.common.results_store import format_table, get_git_sha
+
+SUITES = ["micro", "rps", "memory"]
+DEFAULT_OUTPUT_DIR = os.path.join("benchmarks", "results")
+DEFAULT_THRESHOLD = 0.10
+
+
+def run_measurement(kind, args):
+    """
+    在独立子进程中执行一项测量, 避免前一项测量的内存与连接影响后一项
+
+    Returns:
+        测量结果 dict
+    """
+    cmd = [sys.executable, os.path.abspath(__file__), "--measure", kind, "--port", str(args.port),
+           "--users", str(args.users), "--memory-users", str(args.memory_users), "--duration", str(args.duration)]
+    if args.scenario:
+        cmd += ["--scenario", args.scenario]
+    output = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure(kind, args):
+    """子进程入口: 执行一项测量并将结果以一行 JSON 输出到 stdout"""
+    import locust  # noqa: F401  (gevent monkey patching before anything else)
+    from benchmarks import micro, load
+
+    if kind == "micro":
+        result = {
+            "micro.influx_on_request": micro.bench_influx_listener(args.port),
+            "micro.data_loader_next": micro.bench_data_loader(),
+            "micro.shape_tick": micro.bench_shape_tick(),
+        }
+    else:
+        user_class = load.load_user_class(load.SCENARIOS[args.scenario])
+        if kind == "rps":
+            result = load.measure_max_rps(user_class, args.port, args.users, args.duration)
+        elif kind == "rps_influx":
+            result = load.measure_max_rps(user_class, args.port, args.users, args.duration, with_listener=True)
+        else:
+            result = load.measure_memory_per_user(user_class, args.port, args.memory_users)
+    print(json.dumps(result))
+
+
+def collect(args):
+    """
+    执行所选套件
+
+    Returns:
+        {metric: {"value", "unit", "better", ...}}
+    """
+    from benchmarks.load import SCENARIOS
+
+    results = {}
+    suites = args.suite.split(",")
+    if "micro" in suites:
+        for metric, value in run_measurement("micro", args).items():
+            results[metric] = {"value": value["ns_per_call"], "unit": "ns/call", "better": "lower"}
+    scenarios = [args.scenario] if args.scenario else list(SCENARIOS)
+    for scenario in scenarios:
+        args.scenario = scenario
+        if "rps" in suites:
+            for kind, suffix in [("rps", ""), ("rps_influx", ".influx")]:
+                value = run_measurement(kind, args)
+                results[f"rps.{scenario}{suffix}"] = {"value": value.pop("rps"), "unit": "rps", "better": "higher",
+                                                      **value}
+        if "memory" in suites:
+            value = run_measurement("memory", args)
+            results[f"memory.{scenario}"] = {"value": value.pop("kib_per_user"), "unit": "KiB/user",
+                                             "better": "lower", **value}
+    return results
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    对比两次基准测试结果
+
+    Returns:
+        (rows, regressions): rows 为 [metric, unit, baseline, current, change%, verdict],
+        regressions 为变差超过 threshold 的指标名称列表
+    """
+    rows, regressions = [], []
+    for metric, entry in current["results"].items():
+        old = baseline["results"].get(metric)
+        if old is None or not old["value"]:
+            rows.append([metric, entry["unit"], None, entry["value"], None, "new"])
+            continue
+        change = (entry["value"] - old["value"]) / old["value"]
+        worse = change > threshold if entry["better"] == "lower" else change < -threshold
+        better = change < -threshold if entry["better"] == "lower" else change > threshold
+        verdict = "worse" if worse else "better" if better else "same"
+        if worse:
+            regressions.append(metric)
+        rows.append([metric, entry["unit"], old["value"], entry["value"], change * 100, verdict])
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Framework overhead benchmarks against a local stub server")
+    parser.add_argument("--suite", default=",".join(SUITES), help=f"Comma separated suites: {', '.join(SUITES)}")
+    parser.add_argument("--scenario", help="Only benchmark this user class (see benchmarks/load.py SCENARIOS)")
+    parser.add_argument("--users", type=int, default=50, help="Concurrent users for the max RPS measurement")
+    parser.add_argument("--memory-users", type=int, default=200, help="Users spawned for the memory measurement")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds measured per RPS run (after warmup)")
+    parser.add_argument("--port", type=int, default=8089, help="Stub server port")
+    parser.add_argument("--stub-processes", type=int, default=2, help="Stub server processes")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT_DIR, help="Directory for the JSON result")
+    parser.add_argument("--compare", help="Previous result JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative change treated as a regression in --compare")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure, args)
+        return 0
+
+    stub = start_stub_server(args.port, args.stub_processes)
+    try:
+        results = collect(args)
+    finally:
+        stop_stub_server(stub)
+
+    import locust
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "git_sha": get_git_sha(),
+            "hostname": socket.gethostname(),
+            "python": platform.python_version(),
+            "locust": locust.__version__,
+            "cpu_count": os.cpu_count(),
+            "users": args.users,
+            "memory_users": args.memory_users,
+            "duration": args.duration,
+        },
+        "results": results,
+    }
+    if not os.path.exists(args.output):
+        os.makedirs(args.output)
+    output_file = os.path.join(args.output, f"bench_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output_file, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(format_table(["metric", "unit", "value"], [[m, r["unit"], r["value"]] for m, r in results.items()]))
+    print(f"Saved {output_file}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows, regressions = compare_results(baseline, report, args.threshold)
+        print(format_table(["metric", "unit", "baseline", "current", "change%", "verdict"], rows))
+        if regressions:
+            print(f"Slower than {args.compare} by more than {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+ASSET_SIZE = 2048
+ASSET_EXTENSIONS = (".js", ".css", ".png", ".jpg", ".svg", ".ico", ".woff2")
+PAGE_HTML = b"""<!DOCTYPE html>
+<html><head>
+<link rel="stylesheet" href="/static/app.css">
+<script src="/static/app.js"></script>
+</head><body>
+<img src="/static/logo.png">
+<div id="app">stub</div>
+</body></html>"""
+ASSET_BODY = b"x" * ASSET_SIZE
+LOGIN_BODY = json.dumps({"code": 0, "data": {"token": "stub-token-0123456789"}}).encode()
+JSON_BODY = b'{"code":0,"data":[]}'
+QUERY_BODY = b'{"results":[{"statement_id":0}]}'
+
+
+def application(environ, start_response):
+    """
+    本地高吞吐替身服务 (WSGI), 用于框架开销基准测试, 不依赖真实被测系统:
+
+    - 页面 (无扩展名路径): 返回引用若干静态资源的 HTML
+    - 静态资源 (.js/.css/.png 等): 返回固定大小的内容
+    - 登录接口: 返回带 token 的 JSON
+    - InfluxDB /write 与 /query: 使 InfluxDBListener 可以指向本服务
+    - 其他 /api/ 路径: 返回小 JSON
+    """
+    path = environ.get("PATH_INFO", "/")
+    method = environ.get("REQUEST_METHOD", "GET")
+    if method == "POST":
+        # 读完请求体, 保持连接可复用
+        length = int(environ.get("CONTENT_LENGTH") or 0)
+        if length:
+            environ["wsgi.input"].read(length)
+
+    if path == "/write":
+        start_response("204 No Content", [])
+        return [b""]
+    if path == "/query":
+        status, content_type, body = "200 OK", "application/json", QUERY_BODY
+    elif path.endswith("/user/login"):
+        status, content_type, body = "200 OK", "application/json", LOGIN_BODY
+    elif path.endswith(ASSET_EXTENSIONS):
+        status, content_type, body = "200 OK", "application/octet-stream", ASSET_BODY
+    elif path.startswith("/api/"):
+        status, content_type, body = "200 OK", "application/json", JSON_BODY
+    else:
+        status, content_type, body = "200 OK", "text/html; charset=utf-8", PAGE_HTML
+    start_response(status, [("Content-Type", content_type), ("Content-Length", str(len(body)))])
+    return [body]
+
+
+def serve(port, processes=1, host="127.0.0.1"):
+    """
+    启动服务 (阻塞)。processes > 1 时预先 fork 多个进程共享同一个监听 socket。
+    """
+    from gevent import monkey
+    monkey.patch_all()
+    from gevent.pywsgi import WSGIServer
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(1024)
+
+    for _ in range(max(1, processes) - 1):
+        if os.fork() == 0:
+            break
+    WSGIServer(listener, application, log=None, error_log=None).serve_forever()
+
+
+def start_stub_server(port, processes=1, timeout=10):
+    """
+    在子进程中启动替身服务并等待其可连接
+
+    Returns:
+        subprocess.Popen, 使用完毕后调用 stop_stub_server
+    """
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--port", str(port), "--processes", str(processes)],
+        start_new_session=True,
+    )
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError(f"Stub server exited with code {process.returncode}")
+            time.sleep(0.1)
+    stop_stub_server(process)
+    raise RuntimeError(f"Stub server did not start on port {port}")
+
+
+def stop_stub_server(process):
+    """结束替身服务及其 fork 出的所有进程"""
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    process.wait(timeout=5)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="High-throughput stub HTTP server for framework benchmarks")
+    parser.add_argument("--port", type=int, default=8089, help="Listen port")
+    parser.add_argument("--host", default="127.0.0.1", help="Listen address")
+    parser.add_argument("--processes", type=int, default=1, help="Number of pre-forked server processes")
+    args = parser.parse_args()
+    serve(args.port, args.processes, args.host)
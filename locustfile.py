@@ -3,8 +3,14 @@ import importlib
 import glob
 from locust import events, User
 from src.common.influxdb_listener import InfluxDBListener
+from src.common.sample_recorder import SampleRecorder
+from src.common.profiler import SamplingProfiler
+from src.common.blocking_detector import BlockingDetector
+from src.common.soak import SoakMonitor
+from src.common.sla import SlaGuard
+from src.common.scenario_engine import compile_scenario
 from src.config.manager import config
-from src.common.logger_utils import setup_logger
+from src.common.logger_utils import setup_logger, enable_queue_logging
 
 import logging
 import psutil
@@ -34,8 +40,39 @@ if not any(t.name == "ResourceMonitor" for t in threading.enumerate()):
 # 1. Initialize Infrastructure
 @events.init.add_listener
 def on_locust_init(environment, **kwargs):
+    # Opt-in: Locust has replaced the root handlers by now, put them behind a queue so that
+    # greenlets only enqueue records, and optionally rate-limit repetitive call sites
+    logging_config = config.get("logging", {}) or {}
+    if logging_config.get("queue", False):
+        enable_queue_logging(rate_limit=logging_config.get("rate_limit", 0))
+
     InfluxDBListener(environment)
 
+    # Opt-in raw sample recording (one binary file per worker)
+    recorder_config = project_config.get("sample_recorder") or {}
+    if recorder_config.get("enabled"):
+        SampleRecorder.from_config(environment, recorder_config, project_name)
+
+    # Opt-in sampling profiler (Web UI /profile or SIGUSR2)
+    profiler_config = project_config.get("profiler") or {}
+    if profiler_config.get("enabled"):
+        SamplingProfiler.attach(environment, profiler_config)
+
+    # Debug mode: report code that holds the gevent event loop
+    detector_config = project_config.get("blocking_detector") or {}
+    if detector_config.get("enabled"):
+        BlockingDetector.attach(environment, detector_config)
+
+    # Soak mode (tools/run_test.py --soak): bounded stats, rolling windows, generator leak detection
+    soak_config = project_config.get("soak") or {}
+    if os.getenv("LOCUST_SOAK") or soak_config.get("enabled"):
+        SoakMonitor.attach(environment, soak_config, project_name)
+
+    # Live SLA thresholds: abort early when the target falls over
+    sla_config = project_config.get("sla") or {}
+    if sla_config.get("enabled"):
+        SlaGuard.attach(environment, sla_config, project_name)
+
 # 2. Dynamic Scenario Loading based on Project
 project_name = os.getenv("PROJECT")
 if not project_name:
@@ -47,8 +84,12 @@ project_config = config.get_project_config(project_name) if project_name else {}
 default_host = project_config.get("host")
 
 # Conditionally load LoadShape if configured
+# A concurrency sweep (tools/run_test.py --sweep) takes precedence over load_shape
 load_shape_config = project_config.get("load_shape")
-if load_shape_config and load_shape_config.get("stages"):
+if os.getenv("LOCUST_SWEEP") and project_config.get("sweep"):
+    from src.common.shapes import SweepShape
+    logger.info("Concurrency sweep enabled, using SweepShape.")
+elif load_shape_config and load_shape_config.get("stages"):
     from src.common.shapes import ConfigurableShape
     logger.info("LoadShape configured, enabled ConfigurableShape.")
 else:
@@ -109,6 +150,27 @@ def load_scenarios():
         except Exception as e:
             logger.error(f"Failed to load module {module_name}: {e}")
 
+    # Declarative YAML scenarios are compiled into FastHttpUser classes
+    yaml_files = []
+    for extension in ("yaml", "yml"):
+        yaml_files += glob.glob(search_pattern[:-len("py")] + extension, recursive=True)
+
+    for file_path in yaml_files:
+        rel_path = os.path.relpath(file_path, base_dir)
+        # Data files in scenarios are resolved relative to projects/<project>
+        project_dir = os.path.join(base_dir, *rel_path.split(os.sep)[:2])
+        try:
+            user_class = compile_scenario(file_path, project_dir, module=__name__)
+        except Exception as e:
+            logger.error(f"Failed to compile scenario {rel_path}: {e}")
+            continue
+        if user_class.abstract:
+            continue
+        if user_class.host is None and default_host:
+            user_class.host = default_host
+        globals()[user_class.__name__] = user_class
+        logger.info(f"Registered YAML scenario: {user_class.__name__} ({rel_path})")
+
 # Execute loading
 load_scenarios()
 
@@ -1,10 +1,112 @@
-from locust import FastHttpUser
+from locust import FastHttpUser, events
 from src.config.manager import config
+from src.common.http_cache import HttpCache
+from src.common.token_pool import TokenPool
+from src.common.data_loader import DataLoaderFactory
+from src.common import phase_timing
+from src.common.transaction import Transaction
+from src.common.assertions import ResponseChecker
 import logging
+import os
+import gevent
+import requests
 
 # 加载项目配置
 project_config = config.get_project_config("crm")
 
+# projects/crm 目录, 用于解析相对数据路径
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOGIN_PATH = "/api/crm/v4/user/login"
+POOL_LOGIN_TIMEOUT = 10
+
+
+def build_login_request(auth_config, credential, host):
+    """
+    构造登录请求头与请求体
+
+    Args:
+        auth_config: 项目 auth 配置 (提供 appPlatform 等默认值)
+        credential: 账号 dict, 至少包含 username/password
+        host: 前端 Host, 用于 Origin/Referer
+
+    Returns:
+        (headers, payload)
+    """
+    headers = {
+        "Content-Type": "application/json",
+        "Accept": "application/json, text/plain, */*",
+        "User-Agent": "Locust Performance Test",
+        "Origin": host,
+        "Referer": f"{host}/login"
+    }
+    payload = {
+        "username": credential.get("username"),
+        "password": str(credential.get("password")),
+        "appPlatform": credential.get("appPlatform", auth_config.get("appPlatform", "work-space")),
+        "appVersion": credential.get("appVersion", auth_config.get("appVersion", "1.0.1"))
+    }
+    return headers, payload
+
+
+def extract_token(res_json):
+    """尝试从常见位置获取 token, 未找到时返回 None"""
+    data = res_json.get("data") if isinstance(res_json, dict) else None
+    if isinstance(data, str):
+        return data
+    if isinstance(data, dict):
+        return data.get("token") or data.get("access_token")
+    return None
+
+
+# 登录响应检查: 状态码 200 且能取到 token
+LOGIN_CHECK = ResponseChecker({"status": 200}, {"token": extract_token})
+
+
+def _pool_login(credential):
+    """
+    Token 池使用的登录函数 (不经过 Locust client, 不计入 "API: Login" 统计)
+    """
+    auth_config = project_config.get("auth") or {}
+    headers, payload = build_login_request(auth_config, credential, project_config.get("host"))
+    resp = requests.post(f"{project_config.get('api_host')}{LOGIN_PATH}", json=payload, headers=headers,
+                         timeout=POOL_LOGIN_TIMEOUT)
+    resp.raise_for_status()
+    return extract_token(resp.json())
+
+
+def _load_credentials(auth_config, pool_config):
+    """
+    读取 Token 池账号: 优先 credentials_file (CSV/JSON/YAML, 相对项目目录), 否则使用 auth 中的单个账号
+    """
+    credentials_file = pool_config.get("credentials_file")
+    if credentials_file:
+        path = credentials_file if os.path.isabs(credentials_file) else os.path.join(PROJECT_DIR, credentials_file)
+        return [row for row in DataLoaderFactory.get_loader(path).get_all() if row.get("username")]
+    return [{"username": auth_config.get("username"), "password": auth_config.get("password")}]
+
+
+def _create_token_pool():
+    """auth.token_pool.enabled 为 true 且配置了 api_host 时创建进程级 Token 池"""
+    auth_config = project_config.get("auth") or {}
+    pool_config = auth_config.get("token_pool") or {}
+    if not pool_config.get("enabled") or not project_config.get("api_host"):
+        return None
+    return TokenPool.from_config(_pool_login, _load_credentials(auth_config, pool_config), pool_config)
+
+
+token_pool = _create_token_pool()
+
+# 分阶段计时 (DNS/建连/TLS/TTFB/传输) 与连接复用统计, 默认开启
+PHASE_TIMING = (project_config.get("phase_timing") or {}).get("enabled", True)
+
+
+@events.init.add_listener
+def _on_locust_init(environment, **kwargs):
+    if token_pool is not None:
+        token_pool.attach(environment)
+    if PHASE_TIMING:
+        phase_timing.PhaseStats.attach(environment)
+
 class BaseWebsiteUser(FastHttpUser):
     """
     Website 用户的基类，封装通用的登录和 Token 管理逻辑
@@ -14,14 +116,49 @@ class BaseWebsiteUser(FastHttpUser):
     # Host 优先使用配置
     host = project_config.get("host")
     token = None
+    http_cache = None
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        if PHASE_TIMING:
+            phase_timing.instrument(self.client)
 
     def on_start(self):
         """
-        用户启动时执行登录获取 Token
+        用户启动时初始化 HTTP 缓存并执行登录获取 Token
         """
+        # 按 http_cache.warm_ratio 分配 warm/cold 缓存, 未启用时为 None
+        self.http_cache = HttpCache.for_user(project_config.get("http_cache"))
         self.do_login()
 
+    def cached_get(self, url, **kwargs):
+        """
+        经过浏览器缓存模拟的 GET 请求, 未启用缓存时等同于 self.client.get
+
+        Returns:
+            响应对象; 命中新鲜缓存时返回 None (不发请求)
+        """
+        if self.http_cache is None:
+            return self.client.get(url, **kwargs)
+        return self.http_cache.get(self.client, url, **kwargs)
+
+    def transaction(self, name):
+        """
+        业务事务: with self.transaction("下单"): ... 将块内的多个请求作为一个整体统计耗时与成败
+        """
+        return Transaction(self, name)
+
     def do_login(self, retries=3):
+        """
+        获取 Token: 启用 Token 池时直接从池中获取, 否则使用配置账号登录
+        """
+        if token_pool is not None:
+            self.token = token_pool.acquire()
+            if not self.token:
+                logging.error("No token available from token pool. Stopping user.")
+                self.stop()
+            return
+
         auth_config = project_config.get("auth")
         api_host = project_config.get("api_host")
         
@@ -29,51 +166,40 @@ class BaseWebsiteUser(FastHttpUser):
             logging.warning("Auth config or API host not found, skipping login.")
             return
 
-        login_url = f"{api_host}/api/crm/v4/user/login"
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json, text/plain, */*",
-            "User-Agent": "Locust Performance Test",
-            "Origin": self.host,
-            "Referer": f"{self.host}/login"
-        }
-        
-        payload = {
-            "username": auth_config.get("username"),
-            "password": str(auth_config.get("password")),
-            "appPlatform": auth_config.get("appPlatform", "work-space"),
-            "appVersion": auth_config.get("appVersion", "1.0.1")
-        }
-
-        for attempt in range(retries):
-            with self.client.post(login_url, json=payload, headers=headers, catch_response=True, name="API: Login") as response:
-                if response.status_code == 200:
-                    try:
-                        res_json = response.json()
-                        # 尝试从常见位置获取 token
-                        if isinstance(res_json.get("data"), str):
-                            self.token = res_json.get("data")
-                        elif isinstance(res_json.get("data"), dict):
-                            self.token = res_json.get("data").get("token") or res_json.get("data").get("access_token")
-                        
-                        if self.token:
-                            logging.info(f"Login successful, token: {self.token[:10]}...")
-                            return # Success
-                        else:
-                            logging.warning(f"Login successful but token not found in response: {res_json}")
-                            return # No token but success code? Stop retrying.
-                    except Exception as e:
-                        logging.error(f"Failed to parse login response: {e}")
-                        # Don't retry on parsing error unless it's a server issue
-                        return 
-                else:
+        login_url = f"{api_host}{LOGIN_PATH}"
+        headers, payload = build_login_request(auth_config, auth_config, self.host)
+
+        # 登录整体 (含重试) 作为一个事务统计
+        with Transaction(self, "Login") as txn:
+            for attempt in range(retries):
+                with self.client.post(login_url, json=payload, headers=headers, catch_response=True, name="API: Login") as response:
+                    result = {}
+                    error = LOGIN_CHECK.check(response, result)
+                    if error is None:
+                        self.token = result["token"]
+                        logging.debug("Login successful, token: %s...", self.token[:10])
+                        # 用户操作最终成功, 此前失败的尝试不计入事务
+                        txn.success()
+                        return # Success
+                    response.failure(error)
+                    if response.status_code == 200:
+                        # 响应不是 JSON 或缺少 token, 重试也无济于事
+                        logging.warning(f"Login response rejected ({error}): {response.text}")
+                        return
                     logging.warning(f"Login failed (Attempt {attempt+1}/{retries}): {response.status_code} - {response.text}")
                     if attempt < retries - 1:
-                        import time
-                        time.sleep(1) # Wait before retry
-                        continue
-        
+                        gevent.sleep(1) # Wait before retry
+            txn.failure("All login attempts failed")
+
         # All retries failed
         logging.error("All login attempts failed. Stopping user.")
         self.stop()
+
+    def on_unauthorized(self):
+        """
+        请求返回 401 时调用: 从 Token 池替换失效 token, 未启用池时重新登录
+        """
+        if token_pool is not None:
+            self.token = token_pool.invalidate(self.token)
+        else:
+            self.do_login()
@@ -2,16 +2,23 @@ from locust import task, constant_pacing, tag
 from bs4 import BeautifulSoup
 import logging
 import os
-from projects.crm.scenarios.common import BaseWebsiteUser
+import time
+from projects.crm.scenarios.common import BaseWebsiteUser, project_config
+from src.common.asset_fetcher import AssetFetcher, AssetLoadError
 from src.config.manager import config
 
 class WebsiteUser(BaseWebsiteUser):
     # 使用 FastHttpUser 提高静态资源下载性能
     wait_time = constant_pacing(3)  # 每个用户每 3 秒执行一次任务
+    # 页面列表在同一用户类的所有用户间共享, 首个用户启动时加载一次 (子类重写 load_pages 时各自缓存)
+    pages = None
     
     def on_start(self):
         super().on_start()
-        self.pages = self.load_pages()
+        user_class = type(self)
+        if user_class.__dict__.get("pages") is None:
+            user_class.pages = tuple(self.load_pages())
+        self.asset_fetcher = AssetFetcher.from_config(self, project_config.get("browser"), cache=self.http_cache)
 
     def load_pages(self):
         """从 data/pages 加载所有 URL"""
@@ -34,7 +41,7 @@ class WebsiteUser(BaseWebsiteUser):
             logging.warning("No pages found in data/pages, using default.")
             pages.append("/admin/me")
             
-        logging.info(f"Loaded {len(pages)} pages to test: {pages}")
+        logging.debug("Loaded %d pages to test: %s", len(pages), pages)
         return pages
 
     @task
@@ -57,10 +64,14 @@ class WebsiteUser(BaseWebsiteUser):
             parsed = urlparse(target_url)
             # 如果 host 不匹配，可能需要警告，但这里直接请求
             url_path = target_url # Use full URL
-            request_name = f"Page: {parsed.path}"
+            page_path = parsed.path
         else:
             url_path = target_url
-            request_name = f"Page: {target_url}"
+            page_path = target_url
+        request_name = f"Page: {page_path}"
+        page_load_name = f"Page Load: {page_path}"
+        # 页面的绝对地址, 用于按浏览器规则解析资源的相对路径
+        page_url = url_path if url_path.startswith("http") else f"{self.host}{url_path}"
 
         headers = {
             "User-Agent": "Locust Performance Test",
@@ -71,14 +82,26 @@ class WebsiteUser(BaseWebsiteUser):
         if self.token:
             headers["Authorization"] = f"Bearer {self.token}"
 
-        # 1. 请求主 HTML 页面
+        # cold-cache 用户每次访问都视为首次访问
+        if self.http_cache is not None:
+            self.http_cache.begin_page_view()
+
+        # 1. 请求主 HTML 页面 (页面总耗时从这里开始计算)
+        page_start = time.perf_counter()
         with self.client.get(url_path, headers=headers, catch_response=True, name=request_name) as response:
             if response.status_code != 200:
+                if response.status_code == 401:
+                    self.on_unauthorized()
                 if response.status_code in [301, 302]:
-                    logging.info(f"Redirected to: {response.headers.get('Location')}")
+                    logging.debug("Redirected to: %s", response.headers.get('Location'))
                 else:
                     response.failure(f"Failed to load page {url_path}: {response.status_code}")
+                    self.asset_fetcher.report_page_load(
+                        page_load_name, page_start,
+                        exception=AssetLoadError(f"Page returned {response.status_code}")
+                    )
                 return
+            html_bytes = len(response.content or b"")
             
             # 2. 解析 HTML 提取静态资源
             soup = BeautifulSoup(response.text, "lxml")
@@ -100,17 +123,11 @@ class WebsiteUser(BaseWebsiteUser):
                 url = img.get("src")
                 if url: assets.append(url)
 
-            # 去重
-            assets = list(set(assets))
-            logging.info(f"Found {len(assets)} assets on {url_path}")
+        # 去重并按浏览器规则解析为绝对地址
+        assets = list({AssetFetcher.resolve(page_url, url) for url in assets})
+        logging.debug("Found %d assets on %s", len(assets), url_path)
 
-            # 3. 并发下载静态资源
-            for asset_url in assets:
-                # 处理相对路径
-                if not asset_url.startswith("http"):
-                    if asset_url.startswith("/"):
-                        pass 
-                    else:
-                        asset_url = "/" + asset_url
-                
-                self.client.get(asset_url, name="Assets", check_response=False)
+        # 3. 并发下载静态资源 (每个 origin 最多 per_host_limit 个连接)
+        failed, asset_bytes = self.asset_fetcher.fetch_all(assets, headers=headers)
+        exception = AssetLoadError(f"{failed}/{len(assets)} assets failed") if failed else None
+        self.asset_fetcher.report_page_load(page_load_name, page_start, html_bytes + asset_bytes, exception)
@@ -0,0 +1,22 @@
+from locust import events
+from projects.crm.scenarios.common import project_config, PROJECT_DIR
+from src.common.replay import ReplayDispatcher, LogReplayUser
+
+# 仅在配置了 replay.file 时启用回放用户
+replay_config = project_config.get("replay") or {}
+dispatcher = ReplayDispatcher.from_config(replay_config, PROJECT_DIR) if replay_config.get("file") else None
+
+
+@events.init.add_listener
+def _on_locust_init(environment, **kwargs):
+    if dispatcher is not None:
+        dispatcher.attach(environment)
+
+
+class CrmReplayUser(LogReplayUser):
+    """
+    按生产访问日志回放 CRM 流量 (回放文件由 tools/log_to_replay.py 生成)
+    """
+    abstract = dispatcher is None
+    host = project_config.get("api_host") or project_config.get("host")
+    dispatcher = dispatcher
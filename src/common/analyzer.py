@@ -0,0 +1,338 @@
+import csv
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = np.array([0.50, 0.66, 0.75, 0.80, 0.90, 0.95, 0.98, 0.99, 0.999, 0.9999, 1.0])
+PERCENTILE_HEADERS = ["50%", "66%", "75%", "80%", "90%", "95%", "98%", "99%", "99.9%", "99.99%", "100%"]
+P50, P95, P99 = 0, 5, 7
+
+DEFAULT_APDEX_T_MS = 500
+DEFAULT_WARMUP_S = 30
+DEFAULT_SLA_P95_MS = 1000
+DEFAULT_SLA_FAIL_RATIO = 0.01
+DEFAULT_BURST_SIGMA = 3.0
+DEFAULT_MIN_BURST_FPS = 1.0
+PLATEAU_RATIO = 0.95
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class StatsHistory:
+    """
+    stats_history CSV 中某个接口 (默认 Aggregated) 的时间序列, 各列为 NumPy 数组
+    """
+
+    def __init__(self, timestamps, users, rps, fps, percentiles, total_requests, total_failures):
+        self.timestamps = timestamps
+        self.users = users
+        self.rps = rps
+        self.fps = fps
+        self.percentiles = percentiles          # shape (n, 11), 单位毫秒, 无数据为 nan
+        self.total_requests = total_requests
+        self.total_failures = total_failures
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @classmethod
+    def load(cls, history_csv, name="Aggregated"):
+        """
+        流式读取 stats_history CSV, 只保留指定接口的行
+
+        Args:
+            history_csv: <csv_prefix>_stats_history.csv
+            name: 接口名称
+        """
+        rows = []
+        with open(history_csv, 'r') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return cls.empty()
+            index = {column: i for i, column in enumerate(header)}
+            name_col = index["Name"]
+            columns = [index[c] for c in ["Timestamp", "User Count", "Requests/s", "Failures/s"]]
+            columns += [index[c] for c in PERCENTILE_HEADERS]
+            columns += [index["Total Request Count"], index["Total Failure Count"]]
+            for row in reader:
+                if row[name_col] == name:
+                    rows.append([_to_float(row[i]) for i in columns])
+        if not rows:
+            return cls.empty()
+        data = np.array(rows, dtype=np.float64)
+        return cls(data[:, 0], data[:, 1], data[:, 2], data[:, 3], data[:, 4:15], data[:, 15], data[:, 16])
+
+    @classmethod
+    def empty(cls):
+        return cls(*(np.empty(0) for _ in range(4)), np.empty((0, len(PERCENTILES))), np.empty(0), np.empty(0))
+
+    def interval_counts(self):
+        """每个采样间隔内的请求数与失败数 (由累计值差分得到)"""
+        requests = np.diff(self.total_requests, prepend=0.0).clip(min=0)
+        failures = np.diff(self.total_failures, prepend=0.0).clip(min=0)
+        return requests, failures
+
+
+def contiguous_runs(mask):
+    """
+    找出布尔数组中连续为 True 的区间
+
+    Returns:
+        [(start_index, end_index_inclusive), ...]
+    """
+    if not len(mask):
+        return []
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def fraction_below(percentiles, threshold):
+    """
+    由每行的百分位曲线插值估算响应时间 <= threshold 的请求比例 (向量化)
+
+    Args:
+        percentiles: shape (n, 11)
+        threshold: 毫秒
+
+    Returns:
+        shape (n,) 的比例, 无数据行为 nan
+    """
+    valid = ~np.isnan(percentiles[:, 0])
+    p = np.where(np.isnan(percentiles), np.inf, percentiles)
+    k = (p <= threshold).sum(axis=1)
+    result = np.empty(len(p))
+
+    below_p50 = k == 0
+    result[below_p50] = PERCENTILES[0] * threshold / np.maximum(p[below_p50, 0], 1e-9)
+    above_all = k == len(PERCENTILES)
+    result[above_all] = 1.0
+
+    middle = ~(below_p50 | above_all)
+    lo = k[middle] - 1
+    rows = np.flatnonzero(middle)
+    x0, x1 = p[rows, lo], p[rows, lo + 1]
+    q0, q1 = PERCENTILES[lo], PERCENTILES[lo + 1]
+    span = np.where(x1 > x0, x1 - x0, 1.0)
+    result[middle] = q0 + (q1 - q0) * (threshold - x0) / span
+
+    result = result.clip(0.0, 1.0)
+    result[~valid] = np.nan
+    return result
+
+
+class HistoryAnalyzer:
+    """
+    基于 stats_history 时间序列的运行后分析 (NumPy 向量化, 适用于数小时的历史数据)
+
+    - 稳态窗口: 用户数达到最大值并经过 warmup 秒之后的区间
+    - 百分位趋势: 稳态内 p50/p95/p99 的线性趋势 (ms/分钟)
+    - Apdex: 按百分位曲线插值估算满意/容忍比例, 以各间隔请求数加权
+    - SLA 违规区间: p95 或失败率超过阈值的连续区间
+    - 吞吐平台: 吞吐达到峰值 95% 时的最小用户数
+    - 错误突发: 失败速率超过 均值 + N 倍标准差 的连续区间
+
+    Example config (in yaml):
+    analysis:
+      apdex_t_ms: 500
+      warmup_s: 30
+      sla_p95_ms: 1000
+      sla_fail_ratio: 0.01
+      burst_sigma: 3
+      min_burst_fps: 1
+    """
+
+    def __init__(self, history, apdex_t_ms=DEFAULT_APDEX_T_MS, warmup_s=DEFAULT_WARMUP_S,
+                 sla_p95_ms=DEFAULT_SLA_P95_MS, sla_fail_ratio=DEFAULT_SLA_FAIL_RATIO,
+                 burst_sigma=DEFAULT_BURST_SIGMA, min_burst_fps=DEFAULT_MIN_BURST_FPS):
+        """
+        Args:
+            history: StatsHistory
+            apdex_t_ms: Apdex 满意阈值 T (毫秒), 容忍阈值为 4T
+            warmup_s: 达到目标用户数后排除的预热秒数
+            sla_p95_ms: SLA p95 阈值
+            sla_fail_ratio: SLA 失败率阈值
+            burst_sigma: 错误突发判定的标准差倍数
+            min_burst_fps: 错误突发的最小失败速率
+        """
+        self.history = history
+        self.apdex_t_ms = float(apdex_t_ms)
+        self.warmup_s = float(warmup_s)
+        self.sla_p95_ms = float(sla_p95_ms)
+        self.sla_fail_ratio = float(sla_fail_ratio)
+        self.burst_sigma = float(burst_sigma)
+        self.min_burst_fps = float(min_burst_fps)
+
+    @classmethod
+    def from_config(cls, history, analysis_config):
+        analysis_config = analysis_config or {}
+        return cls(
+            history,
+            apdex_t_ms=analysis_config.get("apdex_t_ms", DEFAULT_APDEX_T_MS),
+            warmup_s=analysis_config.get("warmup_s", DEFAULT_WARMUP_S),
+            sla_p95_ms=analysis_config.get("sla_p95_ms", DEFAULT_SLA_P95_MS),
+            sla_fail_ratio=analysis_config.get("sla_fail_ratio", DEFAULT_SLA_FAIL_RATIO),
+            burst_sigma=analysis_config.get("burst_sigma", DEFAULT_BURST_SIGMA),
+            min_burst_fps=analysis_config.get("min_burst_fps", DEFAULT_MIN_BURST_FPS),
+        )
+
+    def steady_state(self):
+        """
+        Returns:
+            稳态区间的布尔掩码
+        """
+        h = self.history
+        if not len(h):
+            return np.zeros(0, dtype=bool)
+        at_peak = h.users >= h.users.max()
+        first_peak = h.timestamps[np.argmax(at_peak)]
+        mask = at_peak & (h.timestamps >= first_peak + self.warmup_s) & (h.rps > 0)
+        # 运行过短无法排除预热时退化为峰值区间
+        return mask if mask.any() else at_peak & (h.rps > 0)
+
+    def percentile_trends(self, mask):
+        """稳态区间内各百分位的线性趋势斜率 (ms/分钟)"""
+        h = self.history
+        trends = {}
+        for label, col in [("p50", P50), ("p95", P95), ("p99", P99)]:
+            values = h.percentiles[mask, col]
+            minutes = (h.timestamps[mask] - h.timestamps[mask][:1]) / 60.0 if mask.any() else np.empty(0)
+            valid = ~np.isnan(values)
+            if valid.sum() < 3 or np.ptp(minutes[valid]) == 0:
+                trends[label] = None
+                continue
+            slope = np.polyfit(minutes[valid], values[valid], 1)[0]
+            trends[label] = float(slope)
+        return trends
+
+    def apdex(self, mask, requests):
+        """按请求数加权的 Apdex = (满意 + 容忍 / 2) / 总数"""
+        p = self.history.percentiles[mask]
+        weights = requests[mask]
+        satisfied = fraction_below(p, self.apdex_t_ms)
+        tolerating = fraction_below(p, 4 * self.apdex_t_ms)
+        valid = ~np.isnan(satisfied) & (weights > 0)
+        if not valid.any():
+            return None
+        score = (satisfied[valid] + tolerating[valid]) / 2.0
+        return float(np.average(score, weights=weights[valid]))
+
+    def sla_breaches(self, requests, failures):
+        """p95 或失败率超过 SLA 的连续区间"""
+        h = self.history
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fail_ratio = np.where(requests > 0, failures / requests, 0.0)
+        p95 = np.nan_to_num(h.percentiles[:, P95], nan=0.0)
+        mask = (p95 > self.sla_p95_ms) | (fail_ratio > self.sla_fail_ratio)
+        return [self._interval(start, end, worst_p95=float(p95[start:end + 1].max()),
+                               worst_fail_ratio=float(fail_ratio[start:end + 1].max()))
+                for start, end in contiguous_runs(mask)]
+
+    def throughput_plateau(self):
+        """
+        吞吐平台: 各用户数档位的平均 RPS 达到峰值 95% 时的最小用户数
+        (仅在存在多个用户数档位时有意义, 例如阶梯加压)
+        """
+        h = self.history
+        active = (h.users > 0) & (h.rps > 0)
+        if not active.any():
+            return None
+        levels, inverse = np.unique(h.users[active], return_inverse=True)
+        if len(levels) < 2:
+            return None
+        mean_rps = np.bincount(inverse, weights=h.rps[active]) / np.bincount(inverse)
+        peak = mean_rps.max()
+        index = int(np.argmax(mean_rps >= PLATEAU_RATIO * peak))
+        return {"users": int(levels[index]), "rps": float(mean_rps[index]), "peak_rps": float(peak),
+                "saturated": index < len(levels) - 1}
+
+    def error_bursts(self):
+        """失败速率显著高于平均水平的连续区间"""
+        fps = np.nan_to_num(self.history.fps)
+        if not len(fps) or not fps.any():
+            return []
+        threshold = max(fps.mean() + self.burst_sigma * fps.std(), self.min_burst_fps)
+        return [self._interval(start, end, peak_fps=float(fps[start:end + 1].max()))
+                for start, end in contiguous_runs(fps > threshold)]
+
+    def _interval(self, start, end, **extra):
+        ts = self.history.timestamps
+        return {"start": int(ts[start]), "end": int(ts[end]), "duration_s": int(ts[end] - ts[start]), **extra}
+
+    def analyze(self):
+        """
+        Returns:
+            分析结果 dict (可直接序列化为 JSON)
+        """
+        h = self.history
+        if not len(h):
+            return {"samples": 0}
+        requests, failures = h.interval_counts()
+        mask = self.steady_state()
+        steady_ts = h.timestamps[mask]
+        steady_p95 = h.percentiles[mask, P95]
+        return {
+            "samples": len(h),
+            "steady_state": {
+                "start": int(steady_ts[0]) if len(steady_ts) else None,
+                "end": int(steady_ts[-1]) if len(steady_ts) else None,
+                "users": int(h.users.max()),
+                "rps_mean": float(h.rps[mask].mean()) if mask.any() else None,
+                "rps_cv": float(h.rps[mask].std() / h.rps[mask].mean()) if mask.any() and h.rps[mask].mean() else None,
+                "p95_median": float(np.nanmedian(steady_p95)) if np.isfinite(steady_p95).any() else None,
+            },
+            "trends_ms_per_min": self.percentile_trends(mask),
+            "apdex": self.apdex(mask, requests),
+            "apdex_t_ms": self.apdex_t_ms,
+            "sla_breaches": self.sla_breaches(requests, failures),
+            "plateau": self.throughput_plateau(),
+            "error_bursts": self.error_bursts(),
+        }
+
+
+def analyze_history(history_csv, analysis_config=None, name="Aggregated"):
+    """读取 stats_history CSV 并返回分析结果"""
+    history = StatsHistory.load(history_csv, name)
+    return HistoryAnalyzer.from_config(history, analysis_config).analyze()
+
+
+def format_summary(analysis):
+    """
+    将分析结果格式化为通知消息中的文本段落
+
+    Returns:
+        多行文本, 无数据时返回空字符串
+    """
+    if not analysis.get("samples"):
+        return ""
+    lines = []
+    steady = analysis["steady_state"]
+    if steady["rps_mean"] is not None:
+        lines.append(f"• 稳态: {steady['users']} 用户, 平均 RPS {steady['rps_mean']:.2f} "
+                     f"(波动 {(steady['rps_cv'] or 0) * 100:.1f}%), P95 中位数 {steady['p95_median'] or 0:.0f} ms")
+    p95_trend = analysis["trends_ms_per_min"].get("p95")
+    if p95_trend is not None:
+        lines.append(f"• 稳态 P95 趋势: {p95_trend:+.2f} ms/分钟")
+    if analysis["apdex"] is not None:
+        lines.append(f"• Apdex (T={analysis['apdex_t_ms']:.0f}ms): {analysis['apdex']:.3f}")
+    breaches = analysis["sla_breaches"]
+    if breaches:
+        total = sum(b["duration_s"] for b in breaches)
+        lines.append(f"• SLA 违规区间: {len(breaches)} 段, 累计 {total} 秒")
+    plateau = analysis["plateau"]
+    if plateau and plateau["saturated"]:
+        lines.append(f"• 吞吐平台: {plateau['users']} 用户时达到 {plateau['rps']:.2f} RPS, 继续加压吞吐不再提升")
+    bursts = analysis["error_bursts"]
+    if bursts:
+        peak = max(b["peak_fps"] for b in bursts)
+        lines.append(f"• 错误突发: {len(bursts)} 次, 峰值 {peak:.2f} 失败/秒")
+    return "\n".join(lines)
@@ -0,0 +1,257 @@
+import re
+import json
+import operator
+
+try:
+    from orjson import loads as _loads
+except ImportError:
+    _loads = json.loads
+
+# JSONPath 子集: $.data.list[0].id / data.list.0.id / $['data']['token']
+_PATH_TOKEN = re.compile(r"\.?([^.\[\]]+)|\[(\d+)\]|\[['\"]([^'\"]+)['\"]\]")
+
+_COMPARATORS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "gt": operator.gt,
+    "ge": operator.ge,
+    "lt": operator.lt,
+    "le": operator.le,
+    "in": lambda value, expected: value in expected,
+    "contains": lambda value, expected: value is not None and expected in value,
+    "exists": lambda value, expected: (value is not None) == bool(expected),
+    "type": lambda value, expected: type(value).__name__ == expected,
+}
+
+_MISSING = object()
+_NO_EXTRACT = object()
+
+
+class AssertionSpecError(ValueError):
+    """断言或提取规则定义错误"""
+
+
+def compile_path(expr):
+    """
+    编译 JSONPath 子集为键元组, 数字键用于列表下标
+
+    Args:
+        expr: '$.data.list[0].id'、'data.list.0.id', 或已编译的 list/tuple
+
+    Returns:
+        ('data', 'list', 0, 'id')
+    """
+    if isinstance(expr, (list, tuple)):
+        return tuple(expr)
+    expr = expr.strip()
+    if expr.startswith("$"):
+        expr = expr[1:]
+    keys = []
+    pos = 0
+    for match in _PATH_TOKEN.finditer(expr):
+        if match.start() != pos:
+            break
+        key, index, quoted = match.groups()
+        if index is not None:
+            keys.append(int(index))
+        elif quoted is not None:
+            keys.append(quoted)
+        else:
+            keys.append(int(key) if key.isdigit() else key)
+        pos = match.end()
+    if pos != len(expr):
+        raise AssertionSpecError(f"Unsupported JSON path: {expr!r}")
+    return tuple(keys)
+
+
+def resolve(data, path):
+    """按已编译路径取值, 不存在时返回 None"""
+    try:
+        for key in path:
+            data = data[key]
+    except (KeyError, IndexError, TypeError):
+        return None
+    return data
+
+
+def _as_list(value):
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def _compile_json_assertion(path, expected):
+    """{path: 期望值} 或 {path: {gt: 0, type: list, ...}}"""
+    keys = compile_path(path)
+    if isinstance(expected, dict) and expected and set(expected) <= set(_COMPARATORS):
+        tests = tuple((_COMPARATORS[op], value, op) for op, value in expected.items())
+    else:
+        tests = ((operator.eq, expected, "eq"),)
+    return path, keys, tests
+
+
+class ResponseChecker:
+    """
+    预编译的响应断言与提取器: 规则在构造时编译一次, 每个请求只做必要的工作。
+
+    按开销由低到高执行: 状态码 -> 响应时间 -> 响应头 -> 字节级 contains/regex -> JSON,
+    任一失败立即返回。只检查状态码时不读取响应体; 有 JSON 断言或提取时响应体只解析一次
+    (安装 orjson 时使用 orjson, 直接解析 bytes), 所有 JSON 规则共享解析结果。
+    contains/regex 直接在 bytes 上匹配, 大响应体无需解码为 str。
+
+    Example config (in yaml):
+    assert:
+      status: 200                 # 或 [200, 201], 缺省时要求 < 400
+      max_ms: 500                 # 响应时间预算
+      contains: '"code":0'        # 或列表
+      regex: 'orderId":\\s*\\d+'   # 或列表
+      headers: {Content-Type: application/json}
+      json:
+        $.code: 0
+        $.data.list: {type: list}
+        $.data.total: {gt: 0}
+    extract:
+      token: $.data.token         # JSONPath
+      order_id: {regex: 'id=(\\d+)'}
+      trace: {header: X-Trace-Id}
+      page: {json: $.data.page, default: 1}
+    """
+
+    __slots__ = ("status", "max_ms", "headers", "patterns", "json_checks", "extractors", "needs_body",
+                 "needs_json")
+
+    def __init__(self, assertions=None, extract=None):
+        """
+        Args:
+            assertions: 断言规则 dict
+            extract: 提取规则 dict, 值为 JSONPath 字符串、{regex|header|json: ..., default: ...}
+                     或接收解析后 JSON 的函数
+        """
+        spec = dict(assertions or {})
+        status = spec.pop("status", None)
+        self.status = frozenset(_as_list(status)) if status is not None else None
+        max_ms = spec.pop("max_ms", None)
+        self.max_ms = float(max_ms) if max_ms is not None else None
+        self.headers = tuple((name, str(value)) for name, value in (spec.pop("headers", None) or {}).items())
+
+        patterns = []
+        for text in _as_list(spec.pop("contains", None) or []):
+            patterns.append((re.compile(re.escape(str(text).encode("utf-8"))), f"Response does not contain {text!r}"))
+        for expr in _as_list(spec.pop("regex", None) or []):
+            patterns.append((re.compile(str(expr).encode("utf-8")), f"Response does not match /{expr}/"))
+        self.patterns = tuple(patterns)
+        self.json_checks = tuple(_compile_json_assertion(path, expected)
+                                 for path, expected in (spec.pop("json", None) or {}).items())
+        if spec:
+            raise AssertionSpecError(f"Unsupported assertions: {', '.join(spec)}")
+
+        extractors = []
+        for var, rule in (extract or {}).items():
+            default = _MISSING
+            if isinstance(rule, dict):
+                rule = dict(rule)
+                default = rule.pop("default", _MISSING)
+                if "json" in rule:
+                    rule = rule["json"]
+            if callable(rule):
+                extractors.append((var, "func", rule, default))
+            elif isinstance(rule, (str, list, tuple)):
+                extractors.append((var, "json", compile_path(rule), default))
+            elif "regex" in rule:
+                extractors.append((var, "regex", re.compile(rule["regex"].encode("utf-8")), default))
+            elif "header" in rule:
+                extractors.append((var, "header", rule["header"], default))
+            else:
+                raise AssertionSpecError(f"Unsupported extractor for '{var}': {rule}")
+        self.extractors = tuple(extractors)
+
+        self.needs_json = bool(self.json_checks) or any(kind in ("json", "func") for _, kind, _, _ in extractors)
+        self.needs_body = self.needs_json or bool(self.patterns) or any(kind == "regex" for _, kind, _, _ in extractors)
+
+    def check(self, response, variables=None):
+        """
+        执行断言, 通过后将提取结果写入 variables
+
+        Args:
+            response: Locust 响应 (FastHttpUser / HttpUser, 通常在 catch_response 块内)
+            variables: 提取结果写入的 dict, 为 None 时不提取
+
+        Returns:
+            失败描述, 全部通过时返回 None
+        """
+        status = response.status_code
+        if self.status is None:
+            if not status or status >= 400:
+                return f"Unexpected status {status}"
+        elif status not in self.status:
+            return f"Unexpected status {status}, expected {sorted(self.status)}"
+
+        if self.max_ms is not None:
+            elapsed = _response_time(response)
+            if elapsed is not None and elapsed > self.max_ms:
+                return f"Response time {elapsed:.0f}ms exceeds {self.max_ms:.0f}ms"
+
+        for name, expected in self.headers:
+            value = response.headers.get(name)
+            if value is None or expected not in value:
+                return f"Header {name} is {value!r}, expected {expected!r}"
+
+        if variables is None:
+            variables = _NO_EXTRACT
+            if not (self.patterns or self.json_checks):
+                return None
+        if not self.needs_body:
+            return self._extract(response, None, None, variables)
+
+        content = response.content or b""
+        for pattern, message in self.patterns:
+            if pattern.search(content) is None:
+                return message
+
+        data = None
+        if self.json_checks or (self.needs_json and variables is not _NO_EXTRACT):
+            try:
+                data = _loads(content)
+            except ValueError:
+                return "Response is not valid JSON"
+            for path, keys, tests in self.json_checks:
+                value = resolve(data, keys)
+                for compare, expected, op in tests:
+                    try:
+                        passed = compare(value, expected)
+                    except TypeError:
+                        passed = False
+                    if not passed:
+                        return f"JSON {path} is {value!r}, expected {op} {expected!r}"
+
+        if variables is _NO_EXTRACT:
+            return None
+        return self._extract(response, content, data, variables)
+
+    def _extract(self, response, content, data, variables):
+        for var, kind, rule, default in self.extractors:
+            if kind == "json":
+                value = resolve(data, rule)
+            elif kind == "regex":
+                match = rule.search(content)
+                if match is None:
+                    value = None
+                else:
+                    value = (match.group(1) if match.groups() else match.group(0)).decode("utf-8", "replace")
+            elif kind == "header":
+                value = response.headers.get(rule)
+            else:
+                value = rule(data)
+            if value is None:
+                if default is _MISSING:
+                    return f"Failed to extract '{var}'"
+                value = default
+            variables[var] = value
+        return None
+
+
+def _response_time(response):
+    """catch_response 块内的响应时间 (毫秒)"""
+    request_meta = getattr(response, "request_meta", None)
+    if request_meta and request_meta.get("response_time") is not None:
+        return request_meta["response_time"]
+    elapsed = getattr(response, "elapsed", None)
+    return elapsed.total_seconds() * 1000 if elapsed is not None else None
@@ -0,0 +1,139 @@
+import time
+import logging
+from urllib.parse import urlparse, urljoin
+import gevent
+from gevent.pool import Pool
+from gevent.lock import BoundedSemaphore
+
+logger = logging.getLogger(__name__)
+
+# 浏览器默认值: 单用户最多同时 16 个请求, 同一 origin 最多 6 个连接 (HTTP/1.1)
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_PER_HOST_LIMIT = 6
+
+PAGE_LOAD_REQUEST_TYPE = "PAGE"
+
+
+class AssetLoadError(Exception):
+    """页面中有静态资源下载失败"""
+
+
+class AssetFetcher:
+    """
+    浏览器式静态资源并发下载器, 每个 User 持有一个实例。
+
+    - 使用有界 gevent Pool 限制单个用户的总并发数
+    - 按 origin (scheme://host:port) 分配信号量, 模拟浏览器每个域名 6 个连接的限制
+    - 页面总耗时 (HTML + 并发资源) 作为独立的 "Page Load" 指标上报
+    - 可选 HttpCache: 新鲜缓存直接命中不发请求, 过期资源发送条件请求
+
+    Example config (in yaml):
+    browser:
+      max_concurrency: 16
+      per_host_limit: 6
+    """
+
+    def __init__(self, user, max_concurrency=DEFAULT_MAX_CONCURRENCY, per_host_limit=DEFAULT_PER_HOST_LIMIT,
+                 cache=None):
+        """
+        Args:
+            user: 发起请求的 Locust User (使用其 client 与 environment)
+            max_concurrency: 单个用户同时下载的最大资源数
+            per_host_limit: 同一 origin 的最大并发连接数
+            cache: 可选的 HttpCache 实例
+        """
+        self.user = user
+        self.cache = cache
+        self.pool = Pool(max(1, int(max_concurrency)))
+        self.per_host_limit = max(1, int(per_host_limit))
+        self._host_slots = {}
+
+    @classmethod
+    def from_config(cls, user, browser_config=None, cache=None):
+        """根据项目配置中的 browser 节点创建下载器"""
+        browser_config = browser_config or {}
+        return cls(
+            user,
+            max_concurrency=browser_config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY),
+            per_host_limit=browser_config.get("per_host_limit", DEFAULT_PER_HOST_LIMIT),
+            cache=cache,
+        )
+
+    @staticmethod
+    def resolve(page_url, asset_url):
+        """
+        将资源地址解析为绝对 URL (与浏览器一致, 相对路径基于页面 URL 解析)
+        """
+        return urljoin(page_url, asset_url)
+
+    @staticmethod
+    def origin(url):
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}"
+
+    def _slot(self, origin):
+        slot = self._host_slots.get(origin)
+        if slot is None:
+            slot = self._host_slots[origin] = BoundedSemaphore(self.per_host_limit)
+        return slot
+
+    def fetch_all(self, asset_urls, headers=None, name="Assets"):
+        """
+        并发下载所有静态资源, 阻塞直到全部完成
+
+        Args:
+            asset_urls: 绝对 URL 列表
+            headers: 请求头
+            name: Locust 统计中使用的请求名称
+
+        Returns:
+            (failed_count, total_bytes)
+        """
+        greenlets = [self.pool.spawn(self._fetch_one, url, headers, name) for url in asset_urls]
+        gevent.joinall(greenlets)
+
+        failed = 0
+        total_bytes = 0
+        for g in greenlets:
+            ok, size = g.value if g.successful() and g.value else (False, 0)
+            if not ok:
+                failed += 1
+            total_bytes += size
+        return failed, total_bytes
+
+    def _fetch_one(self, url, headers, name):
+        """下载单个资源, 返回 (是否成功, 字节数)"""
+        if self.cache is not None:
+            # 新鲜缓存由浏览器直接读取, 不占用连接
+            fresh, conditional_headers = self.cache.conditional_headers(url)
+            if fresh:
+                return True, 0
+            if conditional_headers:
+                headers = {**(headers or {}), **conditional_headers}
+
+        with self._slot(self.origin(url)):
+            response = self.user.client.get(url, name=name, headers=headers)
+
+        if self.cache is not None:
+            self.cache.record(url, response)
+        ok = getattr(response, "error", None) is None and response.status_code < 400
+        return ok, len(response.content or b"") if ok else 0
+
+    def report_page_load(self, name, start_perf_counter, response_length=0, exception=None):
+        """
+        上报页面整体加载耗时 (HTML + 所有资源的墙钟时间)
+
+        Args:
+            name: 统计名称
+            start_perf_counter: 页面开始加载时的 time.perf_counter()
+            response_length: HTML 与资源的总字节数
+            exception: 页面加载失败原因, 成功时为 None
+        """
+        self.user.environment.events.request.fire(
+            request_type=PAGE_LOAD_REQUEST_TYPE,
+            name=name,
+            response_time=(time.perf_counter() - start_perf_counter) * 1000,
+            response_length=response_length,
+            exception=exception,
+            context={},
+        )
@@ -0,0 +1,145 @@
+import _thread
+import os
+import sys
+import time
+import logging
+import traceback
+
+import gevent
+
+from src.common.logger_utils import _native
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD_MS = 100
+REQUEST_TYPE = "BLOCKED"
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PROJECTS_DIR = os.path.join(ROOT_DIR, "projects") + os.sep
+
+
+class BlockingDetector:
+    """
+    gevent 事件循环阻塞检测 (调试模式)。
+
+    心跳 greenlet 每 interval 秒唤醒一次; 原生看门狗线程发现心跳超过 threshold 未更新时,
+    抓取主线程当前栈 (即占住事件循环的代码)。心跳恢复后以实际延迟作为阻塞时长记录:
+    每个调用位置首次出现时输出完整栈, 并以 request_type=BLOCKED、name=调用位置的请求事件计数,
+    阻塞次数与时长因此出现在 Web UI、CSV 与 InfluxDB 中。
+
+    Example config (in yaml):
+    blocking_detector:
+      enabled: true
+      threshold_ms: 100
+    """
+
+    def __init__(self, events=None, threshold_ms=DEFAULT_THRESHOLD_MS, interval_ms=None):
+        """
+        Args:
+            events: Locust Environment.events, 为 None 时只记录不上报
+            threshold_ms: 阻塞阈值 (毫秒)
+            interval_ms: 心跳间隔, 默认为阈值的一半
+        """
+        self.events = events
+        self.threshold = max(float(threshold_ms), 1.0) / 1000
+        self.interval = (float(interval_ms) / 1000) if interval_ms else self.threshold / 2
+        self.blocks = {}  # location -> [count, total_ms, max_ms]
+        self._last_beat = time.perf_counter()
+        self._captured = None
+        self._running = False
+        self._heartbeat = None
+
+    @classmethod
+    def attach(cls, environment, detector_config):
+        """master 不运行用户代码, 仅在 worker / 本地模式下启用"""
+        from locust.runners import MasterRunner
+        if isinstance(environment.runner, MasterRunner):
+            return None
+        detector = cls(environment.events, detector_config.get("threshold_ms", DEFAULT_THRESHOLD_MS),
+                       detector_config.get("interval_ms"))
+        detector.start()
+        environment.events.test_stop.add_listener(lambda **kwargs: detector.log_summary())
+        environment.events.quitting.add_listener(lambda **kwargs: detector.stop())
+        logger.info(f"Event loop blocking detector enabled (threshold {detector.threshold * 1000:.0f}ms).")
+        return detector
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._last_beat = time.perf_counter()
+        target = _native("_thread", "get_ident", _thread.get_ident)()
+        _native("_thread", "start_new_thread", _thread.start_new_thread)(self._watch, (target,))
+        self._heartbeat = gevent.spawn(self._beat)
+
+    def stop(self):
+        self._running = False
+        if self._heartbeat is not None:
+            self._heartbeat.kill(block=False)
+            self._heartbeat = None
+
+    def _beat(self):
+        while self._running:
+            expected = time.perf_counter() + self.interval
+            gevent.sleep(self.interval)
+            now = time.perf_counter()
+            self._last_beat = now
+            delay = now - expected
+            stack, self._captured = self._captured, None
+            if delay > self.threshold:
+                self.record(delay * 1000, stack)
+
+    def _watch(self, target):
+        """原生线程: 心跳超时时抓取被监视线程的栈 (每次阻塞只抓取一次)"""
+        sleep = _native("time", "sleep", time.sleep)
+        current_frames = sys._current_frames
+        beat = None
+        while self._running:
+            sleep(self.interval)
+            last_beat = self._last_beat
+            if last_beat != beat and time.perf_counter() - last_beat > self.threshold:
+                beat = last_beat
+                frame = current_frames().get(target)
+                self._captured = traceback.extract_stack(frame) if frame is not None else None
+                frame = None
+
+    def record(self, blocked_ms, stack):
+        """
+        记录一次阻塞 (在事件循环中调用)
+
+        Args:
+            blocked_ms: 阻塞时长
+            stack: traceback.StackSummary 或 None (阻塞期间未抓到栈)
+        """
+        location = self.locate(stack)
+        entry = self.blocks.get(location)
+        if entry is None:
+            entry = self.blocks[location] = [0, 0.0, 0.0]
+            detail = "".join(traceback.format_list(stack)) if stack else "(stack not captured)\n"
+            logger.warning(f"Event loop blocked for {blocked_ms:.0f}ms at {location}:\n{detail}")
+        entry[0] += 1
+        entry[1] += blocked_ms
+        entry[2] = max(entry[2], blocked_ms)
+        if self.events is not None:
+            self.events.request.fire(request_type=REQUEST_TYPE, name=location, response_time=blocked_ms,
+                                     response_length=0, exception=None, context={})
+
+    @staticmethod
+    def locate(stack):
+        """阻塞位置: 栈中最内层的场景代码 (projects/) 帧, 其次为最内层的本仓库代码帧, 都没有时取最内层帧"""
+        if not stack:
+            return "unknown"
+        own = [frame for frame in stack if frame.filename.startswith(ROOT_DIR) and "site-packages" not in frame.filename]
+        scenario = [frame for frame in own if frame.filename.startswith(PROJECTS_DIR)]
+        frame = (scenario or own or list(stack))[-1]
+        filename = frame.filename
+        if filename.startswith(ROOT_DIR):
+            filename = os.path.relpath(filename, ROOT_DIR)
+        return f"{filename}:{frame.lineno} ({frame.name})"
+
+    def log_summary(self):
+        if not self.blocks:
+            return
+        lines = [f"{location}: {count} times, total {total:.0f}ms, max {longest:.0f}ms"
+                 for location, (count, total, longest) in
+                 sorted(self.blocks.items(), key=lambda item: item[1][1], reverse=True)]
+        logger.warning("Event loop blocking summary:\n" + "\n".join(lines))
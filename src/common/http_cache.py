@@ -0,0 +1,173 @@
+import re
+import time
+import random
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 500
+CACHEABLE_STATUS = (200, 203, 304)
+
+_MAX_AGE_PATTERN = re.compile(r"max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+
+class CacheEntry:
+    """单个缓存条目, 仅保存校验信息 (不保存响应体)"""
+    __slots__ = ("expires_at", "etag", "last_modified")
+
+    def __init__(self, expires_at, etag=None, last_modified=None):
+        self.expires_at = expires_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def is_fresh(self, now):
+        return now < self.expires_at
+
+
+class HttpCache:
+    """
+    单用户 HTTP 缓存模拟 (私有浏览器缓存), 适用于 FastHttpUser。
+
+    - 遵循 Cache-Control: max-age / no-cache / no-store
+    - 过期后使用 ETag (If-None-Match) 与 Last-Modified (If-Modified-Since) 条件请求, 304 时刷新条目
+    - 条目数有上限, 超出时按 LRU 淘汰
+    - warm-cache 用户跨页面保留缓存 (回访用户); cold-cache 用户每次页面访问前清空 (首次访问用户)
+
+    Example config (in yaml):
+    http_cache:
+      enabled: true
+      max_entries: 500
+      warm_ratio: 0.7   # 70% 用户为 warm-cache, 其余为 cold-cache
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, warm=True):
+        """
+        Args:
+            max_entries: 缓存条目上限 (LRU 淘汰)
+            warm: True 为 warm-cache 用户, False 为 cold-cache 用户
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.warm = warm
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    @classmethod
+    def for_user(cls, cache_config=None):
+        """
+        根据项目配置为一个用户创建缓存, 未启用时返回 None。
+        warm/cold 按 warm_ratio 随机分配。
+        """
+        cache_config = cache_config or {}
+        if not cache_config.get("enabled", False):
+            return None
+        warm_ratio = float(cache_config.get("warm_ratio", 1.0))
+        return cls(
+            max_entries=cache_config.get("max_entries", DEFAULT_MAX_ENTRIES),
+            warm=random.random() < warm_ratio,
+        )
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, url):
+        return url in self._entries
+
+    def begin_page_view(self):
+        """每次页面访问开始时调用: cold-cache 用户清空缓存"""
+        if not self.warm:
+            self._entries.clear()
+
+    def clear(self):
+        self._entries.clear()
+
+    def conditional_headers(self, url, now=None):
+        """
+        查询缓存
+
+        Returns:
+            (fresh, headers): fresh 为 True 表示可直接使用缓存, 无需请求;
+            否则 headers 为需要附加的条件请求头 (可能为空)
+        """
+        entry = self._entries.get(url)
+        if entry is None:
+            self.misses += 1
+            return False, {}
+
+        self._entries.move_to_end(url)
+        if entry.is_fresh(time.time() if now is None else now):
+            self.hits += 1
+            return True, {}
+
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        if headers:
+            self.revalidations += 1
+        else:
+            self.misses += 1
+        return False, headers
+
+    def store(self, url, response_headers, now=None):
+        """
+        根据响应头写入或刷新缓存条目 (200 与 304 响应均调用)
+
+        Args:
+            url: 资源绝对地址
+            response_headers: 响应头 (需支持大小写不敏感的 get)
+        """
+        now = time.time() if now is None else now
+        cache_control = (response_headers.get("Cache-Control") or "").lower()
+        if "no-store" in cache_control:
+            self._entries.pop(url, None)
+            return
+
+        max_age = 0
+        if "no-cache" not in cache_control:
+            match = _MAX_AGE_PATTERN.search(cache_control)
+            if match:
+                max_age = int(match.group(1))
+
+        previous = self._entries.get(url)
+        etag = response_headers.get("ETag") or (previous.etag if previous else None)
+        last_modified = response_headers.get("Last-Modified") or (previous.last_modified if previous else None)
+
+        # 既不可缓存也无法校验的资源没有保存价值
+        if max_age <= 0 and not etag and not last_modified:
+            self._entries.pop(url, None)
+            return
+
+        self._entries[url] = CacheEntry(now + max_age, etag, last_modified)
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def record(self, url, response):
+        """根据响应更新缓存 (仅 200/203/304 等可缓存状态)"""
+        if response.status_code in CACHEABLE_STATUS and response.headers is not None:
+            self.store(url, response.headers)
+
+    def get(self, client, url, headers=None, **kwargs):
+        """
+        通过缓存执行 GET 请求
+
+        Args:
+            client: FastHttpSession
+            url: 资源绝对地址
+            headers: 请求头
+
+        Returns:
+            命中新鲜缓存时返回 None (不发请求), 否则返回响应
+        """
+        fresh, extra_headers = self.conditional_headers(url)
+        if fresh:
+            return None
+        if extra_headers:
+            headers = {**(headers or {}), **extra_headers}
+        response = client.get(url, headers=headers, **kwargs)
+        self.record(url, response)
+        return response
@@ -0,0 +1,193 @@
+import re
+import zlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+CQ_PREFIX = "cq_locust_"
+RESOLUTION_MEASUREMENT = "locust_resolution"
+RESOLUTION_RP = "forever"
+
+# 时间范围不超过该值时面板直接查询原始数据 (实时且不受连续查询延迟影响)
+DEFAULT_RAW_MAX_RANGE = "1h"
+# 聚合粒度: 按顺序选择, 时间范围不超过 max_range 时使用该粒度, 最后一级不设上限
+DEFAULT_ROLLUPS = [
+    {"interval": "10s", "duration": "30d", "max_range": "24h"},
+    {"interval": "1m", "duration": "365d"},
+]
+
+# 原始请求 -> 聚合字段 (平均值由 response_time_sum / requests 得出, 可跨桶正确合并)
+REQUEST_FIELDS = (
+    'count("response_time") AS "requests"',
+    'sum("success") AS "success"',
+    'sum("fail") AS "fail"',
+    'sum("response_time") AS "response_time_sum"',
+    'max("response_time") AS "response_time_max"',
+    'percentile("response_time", 50) AS "response_time_p50"',
+    'percentile("response_time", 95) AS "response_time_p95"',
+    'percentile("response_time", 99) AS "response_time_p99"',
+    'sum("response_length") AS "response_length"',
+)
+USER_FIELDS = (
+    'mean("user_count") AS "user_count"',
+    'max("user_count") AS "user_count_max"',
+)
+
+_UNITS = {"w": 604800, "d": 86400, "h": 3600, "m": 60, "s": 1, "ms": 0.001, "u": 1e-6, "ns": 1e-9}
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|ns|u|w|d|h|m|s)")
+
+
+def duration_seconds(text):
+    """
+    解析 InfluxDB 时长 ('30d'、'720h0m0s'、'INF'), 无限期返回 0
+
+    Returns:
+        秒数
+    """
+    text = str(text).strip()
+    if text.upper() == "INF":
+        return 0
+    parts = _DURATION.findall(text)
+    if not parts or "".join(value + unit for value, unit in parts) != text:
+        raise ValueError(f"Invalid duration: {text!r}")
+    return sum(float(value) * _UNITS[unit] for value, unit in parts)
+
+
+def rollup_rp(interval):
+    return f"rollup_{interval}"
+
+
+class InfluxDBDownsampling:
+    """
+    InfluxDB 降采样: 为每个聚合粒度创建保留策略, 并以连续查询将原始 locust_requests / locust_users
+    汇总到同名 measurement (按 tag 分组) 与 locust_requests_all (全部请求合并, 百分位准确)。
+
+    连续查询名称包含定义的哈希, 定义变化时自动替换, 不再需要的 cq_locust_* 会被删除; 保留策略时长变化时修改。
+    各粒度适用的时间范围写入 forever.locust_resolution, Grafana 面板据此按所选时间范围选择保留策略:
+    不超过 raw_max_range 时选择默认保留策略 (原始数据), 更长时选择聚合数据。
+    未启用降采样时只写入原始数据一行, 面板始终查询原始数据。
+
+    Example config (in yaml):
+    influxdb:
+      downsampling:
+        enabled: true
+        raw_duration: 7d          # 可选, 修改默认保留策略 (原始数据) 的时长
+        raw_max_range: 1h         # 不超过该时间范围时面板查询原始数据
+        rollups:
+          - {interval: 10s, duration: 30d, max_range: 24h}
+          - {interval: 1m, duration: 365d}
+    """
+
+    def __init__(self, client, database, downsampling_config=None):
+        """
+        Args:
+            client: InfluxDBClient
+            database: 数据库名
+            downsampling_config: influxdb.downsampling 配置
+        """
+        downsampling_config = downsampling_config or {}
+        self.client = client
+        self.database = database
+        self.raw_duration = downsampling_config.get("raw_duration")
+        self.raw_max_range = downsampling_config.get("raw_max_range", DEFAULT_RAW_MAX_RANGE)
+        self.rollups = sorted(downsampling_config.get("rollups") or DEFAULT_ROLLUPS,
+                              key=lambda rollup: duration_seconds(rollup["interval"]))
+
+    def apply(self):
+        """创建/更新保留策略、连续查询与粒度选择表 (幂等)"""
+        policies, raw_rp = self._policies()
+        if self.raw_duration and raw_rp in policies:
+            self._ensure_rp(policies, raw_rp, self.raw_duration, default=True)
+        for rollup in self.rollups:
+            self._ensure_rp(policies, rollup_rp(rollup["interval"]), rollup["duration"])
+        self._ensure_rp(policies, RESOLUTION_RP, "INF")
+
+        self._sync_continuous_queries(self.continuous_queries(raw_rp))
+        self._write_resolutions(self.resolutions(raw_rp))
+
+    def apply_raw_only(self):
+        """未启用降采样 (或创建失败) 时, 只写入原始数据一行, 面板的 $rp 始终指向默认保留策略"""
+        policies, raw_rp = self._policies()
+        self._ensure_rp(policies, RESOLUTION_RP, "INF")
+        self._write_resolutions([(raw_rp, 0, 2 ** 53)])
+
+    def continuous_queries(self, raw_rp):
+        """
+        Returns:
+            {名称: 完整的 CREATE CONTINUOUS QUERY 语句}
+        """
+        queries = {}
+        for rollup in self.rollups:
+            interval = rollup["interval"]
+            resample_for = rollup.get("resample_for") or f"{int(duration_seconds(interval) * 3)}s"
+            target = f'"{self.database}"."{rollup_rp(interval)}"'
+            source = f'"{self.database}"."{raw_rp}"'
+            selects = {
+                "requests": (REQUEST_FIELDS, "locust_requests", "locust_requests", ", *"),
+                "requests_all": (REQUEST_FIELDS, "locust_requests_all", "locust_requests", ""),
+                "users": (USER_FIELDS, "locust_users", "locust_users", ", *"),
+            }
+            for key, (fields, into, measurement, group_by) in selects.items():
+                select = (f'SELECT {", ".join(fields)} INTO {target}."{into}" FROM {source}."{measurement}" '
+                          f'GROUP BY time({interval}){group_by}')
+                name = f"{CQ_PREFIX}{key}_{interval}_{zlib.crc32(select.encode()):08x}"
+                queries[name] = (f'CREATE CONTINUOUS QUERY "{name}" ON "{self.database}" '
+                                 f'RESAMPLE EVERY {interval} FOR {resample_for} BEGIN {select} END')
+        return queries
+
+    def resolutions(self, raw_rp):
+        """
+        Args:
+            raw_rp: 原始数据所在的默认保留策略
+
+        Returns:
+            [(保留策略, 适用时间范围下限 ms, 上限 ms)], 第一行为原始数据, 最后一级上限为无穷大
+        """
+        start = int(duration_seconds(self.raw_max_range) * 1000)
+        rows = [(raw_rp, 0, start)] if start else []
+        for i, rollup in enumerate(self.rollups):
+            last = i == len(self.rollups) - 1
+            end = 2 ** 53 if last else int(duration_seconds(rollup["max_range"]) * 1000)
+            rows.append((rollup_rp(rollup["interval"]), start, end))
+            start = end
+        return rows
+
+    def _policies(self):
+        self.client.create_database(self.database)
+        policies = {rp["name"]: rp for rp in self.client.get_list_retention_policies(self.database)}
+        return policies, next((name for name, rp in policies.items() if rp.get("default")), "autogen")
+
+    def _ensure_rp(self, policies, name, duration, default=False):
+        existing = policies.get(name)
+        if existing is None:
+            self.client.create_retention_policy(name, duration, 1, self.database, default=default)
+            logger.info(f"Created InfluxDB retention policy {name} ({duration}).")
+        elif duration_seconds(existing["duration"]) != duration_seconds(duration):
+            self.client.alter_retention_policy(name, self.database, duration=duration)
+            logger.info(f"Changed InfluxDB retention policy {name} to {duration}.")
+
+    def _sync_continuous_queries(self, wanted):
+        existing = set()
+        for entry in self.client.get_list_continuous_queries():
+            for query in entry.get(self.database, []):
+                existing.add(query["name"])
+        for name in sorted(existing - set(wanted)):
+            if name.startswith(CQ_PREFIX):
+                self.client.drop_continuous_query(name, self.database)
+                logger.info(f"Dropped outdated continuous query {name}.")
+        for name in sorted(set(wanted) - existing):
+            self.client.query(wanted[name], database=self.database, method="POST")
+            logger.info(f"Created continuous query {name}.")
+
+    def _write_resolutions(self, resolutions):
+        # 时间戳即序号, 字段 rp 为保留策略名 (Grafana 变量查询只能选择字段)
+        self.client.query(f'DROP SERIES FROM "{RESOLUTION_MEASUREMENT}"', database=self.database, method="POST")
+        points = [
+            {
+                "measurement": RESOLUTION_MEASUREMENT,
+                "time": i,
+                "fields": {"rp": rp, "start_ms": start, "end_ms": end},
+            }
+            for i, (rp, start, end) in enumerate(resolutions)
+        ]
+        self.client.write_points(points, time_precision="n", retention_policy=RESOLUTION_RP)
@@ -4,7 +4,10 @@ import gevent
 import logging
 from influxdb import InfluxDBClient
 from locust import events
+from locust.runners import LocalRunner, MasterRunner
 from src.config.manager import config
+from src.common.phase_timing import get_timings
+from src.common.influxdb_downsampling import InfluxDBDownsampling
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +23,11 @@ class InfluxDBListener:
             database=influx_conf.get("database", "locust")
         )
         self.hostname = socket.gethostname()
+
+        # 降采样由 master (或本地模式) 负责, 在后台创建, 不阻塞启动
+        downsampling_conf = influx_conf.get("downsampling") or {}
+        if isinstance(env.runner, (MasterRunner, LocalRunner)):
+            gevent.spawn(self.setup_downsampling, influx_conf.get("database", "locust"), downsampling_conf)
         
         # 订阅事件
         self.env.events.request.add_listener(self.on_request)
@@ -28,6 +36,22 @@ class InfluxDBListener:
         
         self.user_monitor_greenlet = None
 
+    def setup_downsampling(self, database, downsampling_conf):
+        """
+        创建降采样保留策略与连续查询, 失败时只记录日志 (不影响压测)。
+        未启用或创建失败时, 面板回退为始终查询原始数据。
+        """
+        if downsampling_conf.get("enabled", True):
+            try:
+                InfluxDBDownsampling(self.client, database, downsampling_conf).apply()
+                return
+            except Exception as e:
+                logger.warning(f"Failed to set up InfluxDB downsampling, dashboards fall back to raw data: {e}")
+        try:
+            InfluxDBDownsampling(self.client, database).apply_raw_only()
+        except Exception as e:
+            logger.warning(f"Failed to write InfluxDB resolution table: {e}")
+
     def on_test_start(self, environment, **kwargs):
         """
         测试开始时启动用户监控协程
@@ -71,9 +95,9 @@ class InfluxDBListener:
         except Exception as e:
             logger.error(f"Failed to write user count to InfluxDB: {e}")
 
-    def on_request(self, request_type, name, response_time, response_length, exception, **kwargs):
+    def on_request(self, request_type, name, response_time, response_length, exception, context=None, **kwargs):
         """
-        Locust request event hook
+        Locust request event hook (带分阶段计时的请求额外写入 dns_ms/connect_ms/tls_ms/ttfb_ms/transfer_ms/reused 等字段)
         """
         success = 1 if exception is None else 0
         error = str(exception) if exception else ""
@@ -98,7 +122,10 @@ class InfluxDBListener:
                 }
             }
         ]
-        
+        timings = get_timings(context)
+        if timings is not None:
+            json_body[0]["fields"].update(timings.as_fields(response_time))
+
         try:
             self.client.write_points(json_body)
         except Exception as e:
@@ -0,0 +1,153 @@
+import os
+import time
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_PATH = os.path.join("reports", "scheduler.db")
+
+STATE_QUEUED = "queued"
+STATE_RUNNING = "running"
+STATE_DONE = "done"
+STATE_FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project TEXT NOT NULL,
+    env TEXT NOT NULL,
+    load_name TEXT,
+    users INTEGER NOT NULL,
+    rate REAL NOT NULL,
+    run_time TEXT NOT NULL,
+    tag TEXT,
+    cores REAL NOT NULL DEFAULT 1,
+    target TEXT NOT NULL,
+    state TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    exit_code INTEGER,
+    pid INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs (state, enqueued_at);
+"""
+
+
+class JobQueue:
+    """
+    调度器的持久化任务队列 (SQLite)。
+
+    调度进程重启后, 排队中的任务继续执行; 上次运行中被中断的任务重新排队。
+    同一 target (project:env) 同时只运行一个任务, 并受总核数预算限制。
+    """
+
+    def __init__(self, db_path=DEFAULT_QUEUE_PATH):
+        """
+        Args:
+            db_path: SQLite 文件路径
+        """
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def enqueue(self, project, env, users, rate, run_time, load_name=None, tag=None, cores=1):
+        """
+        加入任务; 相同参数的任务已在排队时不重复加入 (避免调度周期短于运行时长时堆积)
+
+        Returns:
+            job id, 重复时返回 None
+        """
+        params = (project, env, load_name, int(users), float(rate), str(run_time), tag)
+        with self.conn:
+            duplicate = self.conn.execute(
+                "SELECT id FROM jobs WHERE state = ? AND project = ? AND env = ? AND load_name IS ? AND users = ? "
+                "AND rate = ? AND run_time = ? AND tag IS ?", (STATE_QUEUED,) + params
+            ).fetchone()
+            if duplicate:
+                logger.info(f"Job already queued: {project}/{env}/{load_name or users} (#{duplicate['id']})")
+                return None
+            cursor = self.conn.execute(
+                "INSERT INTO jobs (project, env, load_name, users, rate, run_time, tag, cores, target, state, "
+                "enqueued_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                params + (float(cores), f"{project}:{env}", STATE_QUEUED, time.time()),
+            )
+        return cursor.lastrowid
+
+    def recover(self, is_alive):
+        """
+        调度进程重启时处理上次遗留的 running 任务:
+        进程已不存在的重新排队, 仍在运行的保留 (由调度器按 pid 等待其结束)
+
+        Args:
+            is_alive: pid -> bool
+        """
+        requeued = 0
+        for job in self.running():
+            if job["pid"] and is_alive(job["pid"]):
+                continue
+            with self.conn:
+                self.conn.execute("UPDATE jobs SET state = ?, started_at = NULL, pid = NULL WHERE id = ?",
+                                  (STATE_QUEUED, job["id"]))
+            requeued += 1
+        if requeued:
+            logger.warning(f"Re-queued {requeued} interrupted job(s)")
+        return requeued
+
+    def running(self):
+        return self.conn.execute("SELECT * FROM jobs WHERE state = ?", (STATE_RUNNING,)).fetchall()
+
+    def claim_next(self, free_cores):
+        """
+        按 FIFO 取出第一个可运行的任务并标记为 running:
+        target 未被占用, 且所需核数不超过剩余预算
+
+        Returns:
+            job 行, 无可运行任务时返回 None
+        """
+        busy_targets = {job["target"] for job in self.running()}
+        queued = self.conn.execute(
+            "SELECT * FROM jobs WHERE state = ? ORDER BY enqueued_at, id", (STATE_QUEUED,)
+        ).fetchall()
+        for job in queued:
+            if job["target"] in busy_targets or job["cores"] > free_cores:
+                continue
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE jobs SET state = ?, started_at = ? WHERE id = ? AND state = ?",
+                    (STATE_RUNNING, time.time(), job["id"], STATE_QUEUED),
+                )
+            return self.get(job["id"])
+        return None
+
+    def set_pid(self, job_id, pid):
+        with self.conn:
+            self.conn.execute("UPDATE jobs SET pid = ? WHERE id = ?", (pid, job_id))
+
+    def finish(self, job_id, exit_code):
+        """记录任务结束, 返回更新后的 job 行"""
+        state = STATE_DONE if exit_code == 0 else STATE_FAILED
+        with self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET state = ?, finished_at = ?, exit_code = ? WHERE id = ?",
+                (state, time.time(), exit_code, job_id),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id):
+        return self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+    def recent(self, last=20):
+        """最近的任务, 附带排队延迟与运行时长 (秒)"""
+        return self.conn.execute(
+            "SELECT *, started_at - enqueued_at AS queue_latency, finished_at - started_at AS duration "
+            "FROM jobs ORDER BY id DESC LIMIT ?", (int(last),)
+        ).fetchall()
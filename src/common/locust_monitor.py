@@ -0,0 +1,162 @@
+import os
+import re
+import json
+import time
+import logging
+import subprocess
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOG_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_LOG_BACKUP_COUNT = 5
+DEFAULT_STATUS_INTERVAL = 2.0
+TAIL_LINES = 50
+
+# Locust 控制台统计表中的 Aggregated 行:
+#          Aggregated     1234     5(0.40%) |     52      10     300     45 |   12.30        0.10
+AGGREGATED_PATTERN = re.compile(
+    r"^\s*Aggregated\s+(?P<requests>\d+)\s+(?P<failures>\d+)\((?P<fail_pct>[\d.]+)%\)\s*\|"
+    r"\s*(?P<avg_rt>\d+)\s+(?P<min_rt>\d+)\s+(?P<max_rt>\d+)\s*(?P<median_rt>\d+)\s*\|"
+    r"\s*(?P<rps>[\d.]+)\s+(?P<fail_per_s>[\d.]+)\s*$"
+)
+RAMPING_PATTERN = re.compile(r"Ramping to (?P<target>\d+) users")
+SPAWNED_PATTERN = re.compile(r"\((?P<users>\d+) total users\)")
+
+
+class LocustProgressParser:
+    """
+    从 Locust headless 输出中逐行解析实时进度 (RPS、失败数、用户数)
+    """
+
+    def __init__(self):
+        self.progress = {"requests": 0, "failures": 0, "fail_ratio": 0.0, "rps": 0.0, "fail_per_s": 0.0,
+                         "avg_rt": 0, "max_rt": 0, "users": 0, "target_users": 0}
+
+    def feed(self, line):
+        """
+        解析一行输出
+
+        Returns:
+            该行是否更新了进度
+        """
+        match = AGGREGATED_PATTERN.match(line)
+        if match:
+            requests = int(match.group("requests"))
+            failures = int(match.group("failures"))
+            self.progress.update(
+                requests=requests,
+                failures=failures,
+                fail_ratio=failures / requests if requests else 0.0,
+                rps=float(match.group("rps")),
+                fail_per_s=float(match.group("fail_per_s")),
+                avg_rt=int(match.group("avg_rt")),
+                max_rt=int(match.group("max_rt")),
+            )
+            return True
+        match = RAMPING_PATTERN.search(line)
+        if match:
+            self.progress["target_users"] = int(match.group("target"))
+            return True
+        match = SPAWNED_PATTERN.search(line)
+        if match:
+            self.progress["users"] = int(match.group("users"))
+            return True
+        return False
+
+
+class StatusFile:
+    """
+    运行状态文件 (JSON), 原子替换写入, 供运维人员与调度器查看运行中的进度
+    """
+
+    def __init__(self, path, interval=DEFAULT_STATUS_INTERVAL, **context):
+        """
+        Args:
+            path: 状态文件路径
+            interval: 最小写入间隔 (秒)
+            context: 附加字段 (project / env 等)
+        """
+        self.path = path
+        self.interval = interval
+        self.context = context
+        self._last_write = 0.0
+
+    def write(self, state, progress, force=False, **extra):
+        now = time.time()
+        if not force and now - self._last_write < self.interval:
+            return
+        self._last_write = now
+        data = {"state": state, "updated_at": now, **self.context, **progress, **extra}
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to write status file {self.path}: {e}")
+
+
+def _output_logger(log_file, max_bytes, backup_count):
+    """创建写入滚动日志文件的 logger (同时传递给根 logger 输出到控制台)"""
+    output_logger = logging.getLogger(f"{__name__}.output.{os.path.basename(log_file)}")
+    output_logger.setLevel(logging.INFO)
+    handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    output_logger.addHandler(handler)
+    return output_logger, handler
+
+
+def stream_locust(cmd, env_vars, log_file, status_file=None, max_bytes=DEFAULT_LOG_MAX_BYTES,
+                  backup_count=DEFAULT_LOG_BACKUP_COUNT, **context):
+    """
+    运行 Locust 子进程并逐行转发输出, 内存占用与运行时长无关
+
+    - 每行输出写入 logger 与滚动日志文件
+    - 实时解析进度写入状态文件
+    - 只保留最后 TAIL_LINES 行用于失败时展示
+
+    Args:
+        cmd: Locust 命令
+        env_vars: 子进程环境变量
+        log_file: 滚动日志文件路径
+        status_file: 状态文件路径, None 表示不写
+        max_bytes: 单个日志文件上限
+        backup_count: 保留的历史日志文件数
+        context: 写入状态文件的附加字段
+
+    Returns:
+        (returncode, progress, tail_lines)
+    """
+    output_logger, handler = _output_logger(log_file, max_bytes, backup_count)
+    parser = LocustProgressParser()
+    status = StatusFile(status_file, **context) if status_file else None
+    tail = deque(maxlen=TAIL_LINES)
+    started_at = time.time()
+    process = None
+
+    try:
+        # stderr 合并到 stdout, 避免两个管道互相阻塞; 关闭子进程输出缓冲以便实时读取
+        env_vars = {**(env_vars or os.environ), "PYTHONUNBUFFERED": "1"}
+        process = subprocess.Popen(cmd, env=env_vars, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   text=True, bufsize=1, errors="replace")
+        if status:
+            status.write("running", parser.progress, force=True, pid=process.pid, started_at=started_at)
+        for line in process.stdout:
+            line = line.rstrip("\n")
+            output_logger.info(line)
+            tail.append(line)
+            if parser.feed(line) and status:
+                status.write("running", parser.progress, pid=process.pid, started_at=started_at,
+                             elapsed=time.time() - started_at)
+        returncode = process.wait()
+        if status:
+            status.write("finished", parser.progress, force=True, returncode=returncode, started_at=started_at,
+                         elapsed=time.time() - started_at)
+        return returncode, parser.progress, list(tail)
+    finally:
+        if process is not None and process.poll() is None:
+            process.terminate()
+        output_logger.removeHandler(handler)
+        handler.close()
@@ -1,5 +1,10 @@
+import _thread
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import time
 
 class ColoredFormatter(logging.Formatter):
     """
@@ -30,14 +35,161 @@ class ColoredFormatter(logging.Formatter):
     def __init__(self, use_short_format=False):
         super().__init__()
         self.use_short_format = use_short_format
+        # One formatter per level, built once instead of on every record
+        fmt = self.SHORT_FORMAT_STR if use_short_format else self.FORMAT_STR
+        self._formatters = {level: logging.Formatter(f"{color}{fmt}{self.RESET}")
+                            for level, color in self.LEVEL_COLORS.items()}
+        self._default_formatter = logging.Formatter(f"{self.RESET}{fmt}{self.RESET}")
 
     def format(self, record):
-        log_color = self.LEVEL_COLORS.get(record.levelno, self.RESET)
-        fmt = self.SHORT_FORMAT_STR if self.use_short_format else self.FORMAT_STR
-        formatter = logging.Formatter(f"{log_color}{fmt}{self.RESET}")
-        return formatter.format(record)
+        return self._formatters.get(record.levelno, self._default_formatter).format(record)
 
-def setup_logger(name=None, level=logging.INFO, log_to_file=True, log_file="logs/locust_run.log"):
+
+class RateLimitFilter(logging.Filter):
+    """
+    Per call-site rate limiting for repetitive hot-path messages.
+
+    Each call site (file + line) may emit at most `rate` records per `interval` seconds;
+    the rest are dropped and counted, and the next record that gets through from
+    that site is suffixed with the number of suppressed messages.
+    Records at `exempt_level` (WARNING) or above are never dropped.
+    """
+
+    def __init__(self, rate=10, interval=1.0, exempt_level=logging.WARNING):
+        super().__init__()
+        self.rate = int(rate)
+        self.interval = float(interval)
+        self.exempt_level = exempt_level
+        self._sites = {}
+
+    def filter(self, record):
+        # The same filter instance is shared by several handlers: decide once per record
+        allowed = getattr(record, "_rate_limit_allowed", None)
+        if allowed is None:
+            allowed = record._rate_limit_allowed = self._allow(record)
+        return allowed
+
+    def _allow(self, record):
+        if record.levelno >= self.exempt_level:
+            return True
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        site = self._sites.get(key)
+        if site is None:
+            # [window start, records in window, suppressed since last emit]
+            self._sites[key] = [now, 1, 0]
+            return True
+        if now - site[0] >= self.interval:
+            site[0], site[1] = now, 0
+        if site[1] >= self.rate:
+            site[2] += 1
+            return False
+        site[1] += 1
+        if site[2]:
+            record.msg = f"{record.msg} [suppressed {site[2]} similar messages]"
+            site[2] = 0
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that enqueues the record untouched.
+
+    The standard QueueHandler formats the message in prepare() so that it can be pickled;
+    the queue here never leaves the process, so formatting is left to the listener thread.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class NativeQueueListener(logging.handlers.QueueListener):
+    """
+    QueueListener running on a native OS thread even when gevent has monkey-patched
+    threading, so formatting and I/O never run inside the greenlets that generate load.
+
+    threading.Thread cannot be used here: after patching, even the original class
+    starts a greenlet, so the thread is started through the unpatched _thread module.
+    """
+
+    def start(self):
+        start_new_thread = _native("_thread", "start_new_thread", _thread.start_new_thread)
+        self._done = _native("_thread", "allocate_lock", _thread.allocate_lock)()
+        self._done.acquire()
+        self._thread = start_new_thread(self._run, ())
+
+    def _run(self):
+        try:
+            self._monitor()
+        finally:
+            self._done.release()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self.enqueue_sentinel()
+        self._done.acquire()
+        self._thread = None
+
+
+def _native(module, name, default):
+    try:
+        from gevent import monkey
+        return monkey.get_original(module, name)
+    except ImportError:
+        return default
+
+
+def add_rate_limit(logger, rate_limit):
+    """
+    Attach one shared RateLimitFilter to all handlers of the logger.
+
+    Filters are set on the handlers rather than the logger so that records
+    propagated from child loggers are limited as well.
+    """
+    rate_filter = RateLimitFilter(rate_limit)
+    for handler in logger.handlers:
+        handler.addFilter(rate_filter)
+    return rate_filter
+
+
+def enable_queue_logging(logger=None, rate_limit=0, keep=("log_reader",)):
+    """
+    Move the logger's handlers behind a queue so that callers only pay for enqueueing a record.
+
+    Handlers named in `keep` stay attached (e.g. Locust's in-memory web UI log reader,
+    which the UI looks up by name on the root logger).
+
+    Args:
+        logger: Logger instance or name (None for the root logger)
+        rate_limit: Per call-site records per second, 0 to disable
+        keep: Handler names to leave attached directly
+
+    Returns:
+        The started QueueListener, or None when there is nothing to move
+    """
+    if not isinstance(logger, logging.Logger):
+        logger = logging.getLogger(logger)
+    moved = [h for h in logger.handlers
+             if h.name not in keep and not isinstance(h, logging.handlers.QueueHandler)]
+    if not moved:
+        return None
+
+    log_queue = _native("queue", "SimpleQueue", queue.SimpleQueue)()
+    listener = NativeQueueListener(log_queue, *moved, respect_handler_level=True)
+    queue_handler = DeferredQueueHandler(log_queue)
+    for handler in moved:
+        logger.removeHandler(handler)
+    logger.addHandler(queue_handler)
+    if rate_limit:
+        add_rate_limit(logger, rate_limit)
+
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+def setup_logger(name=None, level=logging.INFO, log_to_file=True, log_file="logs/locust_run.log",
+                 use_queue=False, rate_limit=0):
     """
     Utility function to set up a logger with colored console output and optional file output.
     
@@ -46,6 +198,8 @@ def setup_logger(name=None, level=logging.INFO, log_to_file=True, log_file="logs
         level: Logging level
         log_to_file: Whether to log to a file
         log_file: Path to the log file
+        use_queue: Format and write records on a background thread (QueueHandler/QueueListener)
+        rate_limit: Per call-site records per second, 0 to disable
     """
     logger = logging.getLogger(name)
     logger.setLevel(level)
@@ -69,5 +223,10 @@ def setup_logger(name=None, level=logging.INFO, log_to_file=True, log_file="logs
         file_handler = RotatingFileHandler(log_file, maxBytes=10*1024*1024, backupCount=5)
         file_handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(name)s: %(message)s'))
         logger.addHandler(file_handler)
+
+    if use_queue:
+        enable_queue_logging(logger, rate_limit)
+    elif rate_limit:
+        add_rate_limit(logger, rate_limit)
         
     return logger
@@ -8,15 +8,41 @@ import base64
 import urllib.parse
 import smtplib
 import zipfile
+from concurrent.futures import ThreadPoolExecutor, wait
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
 import requests
+from requests.adapters import HTTPAdapter
 from src.config.manager import config
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_TIMEOUT = 10
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.0
+DEFAULT_TOTAL_TIMEOUT = 60
+DEFAULT_MAX_ATTACHMENT_MB = 20
+
+# 附件优先级: HTML 报告与汇总 CSV 优先, stats history 等大文件最后加入
+ATTACHMENT_PRIORITY = ["_stats.csv", "_scalability.svg", "_scalability.json", "_failures.csv", "_exceptions.csv"]
+ATTACHMENT_SUFFIXES = (".csv", "_scalability.svg", "_scalability.json")
+
 class Notifier:
+    """
+    多渠道报告通知 (钉钉 / 企业微信 / 邮件)
+
+    各渠道并发发送, 单渠道有超时与指数退避重试, webhook 共享连接池 Session,
+    整体耗时受 total_timeout 限制。
+
+    Example config (in yaml):
+    notification:
+      timeout: 10              # 单次请求超时 (秒)
+      retries: 3               # 单渠道最大尝试次数
+      backoff: 1.0             # 重试退避基数 (秒), 依次等待 1s, 2s, 4s ...
+      total_timeout: 60        # 所有渠道的总等待时间 (秒)
+      max_attachment_mb: 20    # ZIP 附件大小上限
+    """
     def __init__(self):
         self.config = config.get("notification", {})
         # Global switch
@@ -25,14 +51,36 @@ class Notifier:
         self.enable_dingtalk = self.config.get("dingtalk", {}).get("enabled", False)
         self.enable_wechat = self.config.get("wechat", {}).get("enabled", False)
         self.enable_email = self.config.get("email", {}).get("enabled", False)
+        # Delivery settings
+        self.timeout = self.config.get("timeout", DEFAULT_TIMEOUT)
+        self.retries = max(1, int(self.config.get("retries", DEFAULT_RETRIES)))
+        self.backoff = self.config.get("backoff", DEFAULT_BACKOFF)
+        self.total_timeout = self.config.get("total_timeout", DEFAULT_TOTAL_TIMEOUT)
+        self.max_attachment_bytes = int(self.config.get("max_attachment_mb", DEFAULT_MAX_ATTACHMENT_MB) * 1024 * 1024)
+
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=4))
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=4))
 
     def send_report(self, report_path, project_name, stats=None):
+        """
+        发送测试报告通知
+
+        Args:
+            report_path: HTML 报告路径
+            project_name: 项目名
+            stats: run_test 解析出的统计信息
+
+        Returns:
+            {渠道: 是否发送成功}
+        """
         if not self.enabled:
             logger.info("Notifications are globally disabled.")
-            return
+            return {}
+        stats = stats or {}
 
-        # Prepare ZIP file
-        zip_path = self._zip_report(report_path)
+        # Prepare ZIP file once (only the email channel sends attachments)
+        zip_path = self._zip_report(report_path) if self.enable_email else None
         
         # Construct message content
         title = f"Locust Test Report - {project_name}"
@@ -58,6 +106,9 @@ class Notifier:
 
         content = f"各位同事, 大家好:\n"
         content += f"【{project_name}】性能压测于 {start_time} 开始运行，运行时长：{duration}，目前已执行完成。\n\n"
+        sla_breach = stats.get("sla_breach")
+        if sla_breach:
+            content += f"⚠️ 触发 SLA 熔断，测试已提前终止：{sla_breach}\n\n"
         content += f"测试人： {tester}\n"
         content += f"所属部门： {department}\n"
         content += f"压测环境： `{host}`\n"
@@ -78,37 +129,95 @@ class Notifier:
                 content += f"{i}. [{item['method']}] {item['name']} - P95: {item['p95']:.0f}ms (Avg: {item['avg']:.0f}ms, Count: {item['count']})\n"
             content += "\n"
 
+        analysis_summary = stats.get("analysis_summary")
+        if analysis_summary:
+            content += f"运行分析:\n{analysis_summary}\n\n"
+
+        scalability_summary = stats.get("scalability_summary")
+        if scalability_summary:
+            content += f"并发扫描:\n{scalability_summary}\n\n"
+
+        soak_summary = stats.get("soak_summary")
+        if soak_summary:
+            content += f"长稳测试:\n{soak_summary}\n\n"
+
+        regression_table = stats.get("regression_table")
+        if regression_table:
+            content += f"基线对比: {stats.get('regression_summary', '')}\n"
+            content += f"{regression_table}\n\n"
+
         content += f"附件为详细的 HTML 性能报告及数据文件，请查阅。谢谢。"
 
         # Send Notifications based on channel config
+        channels = {}
         if self.enable_dingtalk:
-            self._send_dingtalk(title, content)
+            channels["dingtalk"] = (self._send_dingtalk, title, content)
         if self.enable_wechat:
-            self._send_wechat(title, content)
+            channels["wechat"] = (self._send_wechat, title, content)
         if self.enable_email:
-            self._send_email(title, content, zip_path)
+            channels["email"] = (self._send_email, title, content, zip_path)
+        return self._dispatch(channels)
+
+    def _dispatch(self, channels):
+        """并发发送各渠道, 最多等待 total_timeout 秒"""
+        if not channels:
+            return {}
+        executor = ThreadPoolExecutor(max_workers=len(channels), thread_name_prefix="notifier")
+        futures = {executor.submit(self._with_retries, name, *call): name for name, call in channels.items()}
+        done, not_done = wait(futures, timeout=self.total_timeout)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        results = {futures[f]: f.result() for f in done}
+        for future in not_done:
+            logger.error(f"{futures[future]} notification did not finish within {self.total_timeout}s")
+            results[futures[future]] = False
+        return results
+
+    def _with_retries(self, name, send, *args):
+        """按指数退避重试发送, 返回是否成功"""
+        for attempt in range(1, self.retries + 1):
+            try:
+                send(*args)
+                return True
+            except Exception as e:
+                if attempt == self.retries:
+                    logger.error(f"Failed to send {name} notification after {attempt} attempts: {e}")
+                    return False
+                delay = self.backoff * (2 ** (attempt - 1))
+                logger.warning(f"Failed to send {name} notification (attempt {attempt}): {e}, retrying in {delay}s")
+                time.sleep(delay)
+        return False
 
     def _zip_report(self, report_path):
-        """Compress the HTML report and associated CSV files into a ZIP file"""
+        """
+        Compress the HTML report and associated CSV files into a ZIP file.
+
+        Files are streamed into the archive one by one; files that would push the archive
+        over max_attachment_mb are skipped (largest, lowest priority files first).
+        """
         if not report_path or not os.path.exists(report_path):
             logger.warning(f"Report file not found, skipping zip: {report_path}")
             return None
             
         zip_path = report_path.replace(".html", ".zip")
         base_name = os.path.splitext(os.path.basename(report_path))[0]
-        report_dir = os.path.dirname(report_path)
-        
+        report_dir = os.path.dirname(report_path) or "."
+
+        csv_files = [f for f in os.listdir(report_dir) if f.startswith(base_name) and f.endswith(ATTACHMENT_SUFFIXES)]
+        csv_files.sort(key=lambda f: (next((i for i, suffix in enumerate(ATTACHMENT_PRIORITY)
+                                            if f.endswith(suffix)), len(ATTACHMENT_PRIORITY)),
+                                      os.path.getsize(os.path.join(report_dir, f))))
+        candidates = [(report_path, os.path.basename(report_path))]
+        candidates += [(os.path.join(report_dir, f), f) for f in csv_files]
+
         try:
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-                # Add HTML report
-                zf.write(report_path, os.path.basename(report_path))
-                
-                # Add associated CSV files
-                for filename in os.listdir(report_dir):
-                    if filename.startswith(base_name) and filename.endswith(".csv"):
-                        full_path = os.path.join(report_dir, filename)
-                        zf.write(full_path, filename)
-                        
+            with open(zip_path, 'wb') as fp, zipfile.ZipFile(fp, 'w', zipfile.ZIP_DEFLATED) as zf:
+                for full_path, arcname in candidates:
+                    # Uncompressed size is an upper bound for the compressed entry
+                    if fp.tell() + os.path.getsize(full_path) > self.max_attachment_bytes:
+                        logger.warning(f"Skipping {arcname} from report zip: attachment size limit reached")
+                        continue
+                    zf.write(full_path, arcname)
             return zip_path
         except Exception as e:
             logger.error(f"Failed to zip report: {e}")
@@ -139,11 +248,9 @@ class Notifier:
             }
         }
         
-        try:
-            resp = requests.post(webhook, json=data)
-            logger.info(f"DingTalk notification sent: {resp.text}")
-        except Exception as e:
-            logger.error(f"Failed to send DingTalk notification: {e}")
+        resp = self.session.post(webhook, json=data, timeout=self.timeout)
+        resp.raise_for_status()
+        logger.info(f"DingTalk notification sent: {resp.text}")
 
     def _send_wechat(self, title, content):
         wc_config = self.config.get("wechat", {})
@@ -159,11 +266,9 @@ class Notifier:
             }
         }
         
-        try:
-            resp = requests.post(webhook, json=data)
-            logger.info(f"WeChat notification sent: {resp.text}")
-        except Exception as e:
-            logger.error(f"Failed to send WeChat notification: {e}")
+        resp = self.session.post(webhook, json=data, timeout=self.timeout)
+        resp.raise_for_status()
+        logger.info(f"WeChat notification sent: {resp.text}")
 
     def _send_email(self, title, content, attachment_path):
         email_config = self.config.get("email", {})
@@ -184,21 +289,19 @@ class Notifier:
         msg.attach(MIMEText(content, 'plain'))
 
         if attachment_path and os.path.exists(attachment_path):
-            with open(attachment_path, "rb") as f:
-                part = MIMEApplication(f.read(), Name=os.path.basename(attachment_path))
+            if os.path.getsize(attachment_path) > self.max_attachment_bytes:
+                logger.warning(f"Attachment exceeds size limit, not attached: {attachment_path}")
+            else:
+                with open(attachment_path, "rb") as f:
+                    part = MIMEApplication(f.read(), Name=os.path.basename(attachment_path))
                 part['Content-Disposition'] = f'attachment; filename="{os.path.basename(attachment_path)}"'
                 msg.attach(part)
 
-        try:
-            if email_config.get("use_ssl"):
-                server = smtplib.SMTP_SSL(host, port)
-            else:
-                server = smtplib.SMTP(host, port)
+        use_ssl = email_config.get("use_ssl")
+        smtp_class = smtplib.SMTP_SSL if use_ssl else smtplib.SMTP
+        with smtp_class(host, port, timeout=self.timeout) as server:
+            if not use_ssl:
                 server.starttls()
-            
             server.login(sender, password)
             server.sendmail(sender, receivers, msg.as_string())
-            server.quit()
-            logger.info(f"Email sent to {receivers}")
-        except Exception as e:
-            logger.error(f"Failed to send email: {e}")
+        logger.info(f"Email sent to {receivers}")
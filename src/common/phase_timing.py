@@ -0,0 +1,254 @@
+import time
+import logging
+import functools
+
+from gevent.local import local
+from geventhttpclient.connectionpool import ConnectionPool, SSLConnectionPool
+from geventhttpclient.response import HTTPSocketResponse
+
+from src.common.results_store import format_table
+
+logger = logging.getLogger(__name__)
+
+# request 事件 context 中保存分阶段耗时的键
+CONTEXT_KEY = "phases"
+PHASE_FIELDS = ("dns_ms", "connect_ms", "tls_ms", "ttfb_ms", "transfer_ms")
+REPORT_KEY = "phase_timing"
+
+_installed = False
+
+
+class _Current(local):
+    """每个 greenlet 当前正在计时的请求"""
+    timings = None
+
+
+_current = _Current()
+
+
+class PhaseTimings:
+    """
+    单个逻辑请求 (含重定向与重试) 的分阶段耗时, 单位毫秒。
+
+    - dns: 解析地址 (仅新建连接时发生)
+    - connect: TCP 建连
+    - tls: TLS 握手
+    - ttfb: 请求发出后等待响应头
+    - transfer: 其余部分 (发送请求、读取响应体与客户端开销), 由总响应时间减去前几项得到
+    """
+    __slots__ = ("dns", "connect", "tls", "ttfb", "new_connections")
+
+    def __init__(self):
+        self.dns = 0.0
+        self.connect = 0.0
+        self.tls = 0.0
+        self.ttfb = 0.0
+        self.new_connections = 0
+
+    @property
+    def reused(self):
+        """整个请求未新建连接 (完全复用 keep-alive 连接)"""
+        return self.new_connections == 0
+
+    def as_fields(self, response_time):
+        """
+        Args:
+            response_time: Locust 统计的响应时间 (毫秒)
+
+        Returns:
+            dict, 可直接作为 InfluxDB fields
+        """
+        transfer = float(response_time) - self.dns - self.connect - self.tls - self.ttfb
+        return {
+            "dns_ms": self.dns,
+            "connect_ms": self.connect,
+            "tls_ms": self.tls,
+            "ttfb_ms": self.ttfb,
+            "transfer_ms": transfer if transfer > 0 else 0.0,
+            "reused": 1 if self.reused else 0,
+            "new_connections": self.new_connections,
+        }
+
+
+def _accumulate(attr):
+    """将被包装方法的耗时累加到当前请求的 attr 上 (不在计时中的请求直接调用原方法)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = _current.timings
+            if timings is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                setattr(timings, attr, getattr(timings, attr) + (time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorator
+
+
+def _count_connection(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        timings = _current.timings
+        if timings is not None:
+            timings.new_connections += 1
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def _tls_handshake(func):
+    """SSLConnectionPool._connect_socket 包含 TCP 建连 (super) 与握手, 扣除建连部分即为 TLS 耗时"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        timings = _current.timings
+        if timings is None:
+            return func(*args, **kwargs)
+        connect_before = timings.connect
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            timings.tls += elapsed - (timings.connect - connect_before)
+    return wrapper
+
+
+def install():
+    """
+    为 geventhttpclient 连接池与响应解析安装计时钩子 (进程内只安装一次)。
+    钩子只在 instrument() 包装的请求执行期间记录, 对其他请求几乎没有开销。
+    """
+    global _installed
+    if _installed:
+        return
+    ConnectionPool._resolve = _accumulate("dns")(ConnectionPool._resolve)
+    ConnectionPool._create_socket = _count_connection(ConnectionPool._create_socket)
+    ConnectionPool._connect_socket = _accumulate("connect")(ConnectionPool._connect_socket)
+    SSLConnectionPool._connect_socket = _tls_handshake(SSLConnectionPool._connect_socket)
+    HTTPSocketResponse._read_headers = _accumulate("ttfb")(HTTPSocketResponse._read_headers)
+    _installed = True
+
+
+def instrument(session):
+    """
+    为一个 FastHttpSession 开启分阶段计时: 每次请求创建 PhaseTimings 并放入 request 事件的
+    context["phases"], 监听器可通过 get_timings(context) 读取。
+
+    Args:
+        session: FastHttpUser.client
+    """
+    install()
+    request = session.request
+
+    def timed_request(method, url, *args, context=None, **kwargs):
+        timings = PhaseTimings()
+        context = {**context, CONTEXT_KEY: timings} if context else {CONTEXT_KEY: timings}
+        _current.timings = timings
+        try:
+            return request(method, url, *args, context=context, **kwargs)
+        finally:
+            _current.timings = None
+
+    session.request = timed_request
+    return session
+
+
+def get_timings(context):
+    """从 request 事件的 context 中取出 PhaseTimings, 未计时的请求返回 None"""
+    return context.get(CONTEXT_KEY) if context else None
+
+
+class PhaseStats:
+    """
+    按接口聚合分阶段耗时与连接复用率。worker 随统计报告发送增量, master 合并后在测试结束时输出汇总,
+    用于发现连接池配置不当或 keep-alive 失效 (复用率低、new_connections 高)。
+
+    Example config (in yaml):
+    phase_timing:
+      enabled: true   # 默认开启
+    """
+
+    def __init__(self):
+        # (method, name) -> [count, dns, connect, tls, ttfb, transfer, reused, new_connections]
+        self.entries = {}
+
+    @classmethod
+    def attach(cls, environment):
+        """注册 request / 报告 / test_stop 事件"""
+        from locust.runners import MasterRunner
+        stats = cls()
+        events = environment.events
+        if not isinstance(environment.runner, MasterRunner):
+            events.request.add_listener(stats.on_request)
+            events.report_to_master.add_listener(stats.on_report_to_master)
+        events.worker_report.add_listener(stats.on_worker_report)
+        events.test_start.add_listener(stats.on_test_start)
+        events.test_stop.add_listener(stats.on_test_stop)
+        return stats
+
+    def on_request(self, request_type, name, response_time, response_length, exception=None, context=None,
+                   **kwargs):
+        timings = get_timings(context)
+        if timings is None or response_time is None:
+            return
+        key = (request_type, name)
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries[key] = [0, 0.0, 0.0, 0.0, 0.0, 0.0, 0, 0]
+        fields = timings.as_fields(response_time)
+        entry[0] += 1
+        entry[1] += fields["dns_ms"]
+        entry[2] += fields["connect_ms"]
+        entry[3] += fields["tls_ms"]
+        entry[4] += fields["ttfb_ms"]
+        entry[5] += fields["transfer_ms"]
+        entry[6] += fields["reused"]
+        entry[7] += fields["new_connections"]
+
+    def merge(self, rows):
+        """合并 export() 导出的行"""
+        for request_type, name, *values in rows:
+            entry = self.entries.setdefault((request_type, name), [0, 0.0, 0.0, 0.0, 0.0, 0.0, 0, 0])
+            for i, value in enumerate(values):
+                entry[i] += value
+
+    def export(self):
+        """导出为可序列化的行 [method, name, count, ...]"""
+        return [[request_type, name, *entry] for (request_type, name), entry in self.entries.items()]
+
+    def on_report_to_master(self, client_id, data, **kwargs):
+        data[REPORT_KEY] = self.export()
+        self.entries = {}
+
+    def on_worker_report(self, client_id, data, **kwargs):
+        self.merge(data.get(REPORT_KEY) or [])
+
+    def on_test_start(self, environment, **kwargs):
+        self.entries = {}
+
+    def on_test_stop(self, environment, **kwargs):
+        from locust.runners import WorkerRunner
+        if self.entries and not isinstance(environment.runner, WorkerRunner):
+            logger.info("Connection phase timing (avg ms):\n%s", self.format())
+
+    def summary(self):
+        """
+        Returns:
+            [{"method", "name", "requests", "dns_ms", ..., "reuse_ratio", "new_connections"}], 按请求数降序
+        """
+        rows = []
+        for (request_type, name), (count, *sums, reused, new_connections) in self.entries.items():
+            if not count:
+                continue
+            row = {"method": request_type, "name": name, "requests": count}
+            row.update({field: total / count for field, total in zip(PHASE_FIELDS, sums)})
+            row["reuse_ratio"] = reused / count
+            row["new_connections"] = new_connections
+            rows.append(row)
+        rows.sort(key=lambda row: row["requests"], reverse=True)
+        return rows
+
+    def format(self):
+        headers = ["method", "name", "requests", *PHASE_FIELDS, "reuse_ratio", "new_connections"]
+        return format_table(headers, [[row[h] for h in headers] for row in self.summary()])
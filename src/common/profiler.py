@@ -0,0 +1,165 @@
+import _thread
+import os
+import sys
+import time
+import signal
+import socket
+import logging
+from collections import Counter
+
+from src.common.logger_utils import _native
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MESSAGE = "sampling_profile"
+DEFAULT_SECONDS = 30
+DEFAULT_INTERVAL = 0.005
+MAX_SECONDS = 600
+
+
+def _threadsafe_callback():
+    """返回可从其他原生线程调用、在当前 gevent hub 中执行函数的 callback"""
+    try:
+        import gevent
+        return gevent.get_hub().loop.run_callback_threadsafe
+    except (ImportError, AttributeError):
+        return lambda func, *args: func(*args)
+
+
+class SamplingProfiler:
+    """
+    按需开启的采样剖析器: 在原生线程 (不受 gevent monkey patch 影响) 中以固定间隔读取
+    主线程当前栈帧。所有 greenlet 都运行在主线程上, 因此样本反映的正是占用 CPU 的 greenlet;
+    hub 空闲等待时栈顶为 gevent hub 的 run。
+
+    结果为 collapsed stack 格式 (每行 "frame;frame;... count"), 可直接交给 flamegraph.pl 或 speedscope。
+    可通过 master Web UI 的 /profile?seconds=N 触发 (分发到所有 worker), 或向进程发送 SIGUSR2。
+
+    Example config (in yaml):
+    profiler:
+      enabled: true
+      interval: 0.005     # 采样间隔 (秒)
+      seconds: 30         # SIGUSR2 触发时的采样时长
+      dir: reports
+    """
+
+    def __init__(self, output_dir="reports", interval=DEFAULT_INTERVAL):
+        """
+        Args:
+            output_dir: 输出目录
+            interval: 采样间隔 (秒)
+        """
+        self.output_dir = output_dir
+        self.interval = max(float(interval), 0.001)
+        self.running = False
+        self._labels = {}
+
+    @classmethod
+    def attach(cls, environment, profiler_config):
+        """
+        注册触发方式: master/本地模式注册 Web UI 路由, worker 注册 master 消息, 所有进程注册 SIGUSR2
+
+        Returns:
+            SamplingProfiler
+        """
+        from locust.runners import MasterRunner, WorkerRunner
+
+        profiler = cls(profiler_config.get("dir", "reports"), profiler_config.get("interval", DEFAULT_INTERVAL))
+        runner = environment.runner
+        if isinstance(runner, WorkerRunner):
+            runner.register_message(PROFILE_MESSAGE, lambda msg, **kwargs: profiler.start(**msg.data))
+
+        if environment.web_ui is not None:
+            web_ui = environment.web_ui
+
+            @web_ui.app.route("/profile")
+            @web_ui.auth_required_if_enabled
+            def profile():
+                from flask import jsonify, request
+                seconds = min(float(request.args.get("seconds", DEFAULT_SECONDS)), MAX_SECONDS)
+                tag = time.strftime("%Y%m%d_%H%M%S")
+                if isinstance(runner, MasterRunner):
+                    runner.send_message(PROFILE_MESSAGE, {"seconds": seconds, "tag": tag})
+                    return jsonify({"seconds": seconds, "tag": tag, "workers": runner.worker_count})
+                return jsonify({"seconds": seconds, "tag": tag, "path": profiler.start(seconds, tag)})
+
+        try:
+            import gevent
+            seconds = profiler_config.get("seconds", DEFAULT_SECONDS)
+            gevent.signal_handler(signal.SIGUSR2, lambda: profiler.start(seconds))
+        except (AttributeError, ValueError):
+            # Windows 没有 SIGUSR2; 非主线程无法注册信号
+            pass
+        return profiler
+
+    def start(self, seconds=DEFAULT_SECONDS, tag=None):
+        """
+        在后台采样 seconds 秒并写入文件 (已有采样在运行时忽略)
+
+        Returns:
+            输出文件路径, 忽略时返回 None
+        """
+        if self.running:
+            logger.warning("Sampling profiler is already running, request ignored.")
+            return None
+        tag = tag or time.strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.output_dir, f"profile_{tag}_{socket.gethostname()}_{os.getpid()}.collapsed")
+        self.running = True
+        start_new_thread = _native("_thread", "start_new_thread", _thread.start_new_thread)
+        target = _native("_thread", "get_ident", _thread.get_ident)()
+        start_new_thread(self._run, (target, float(seconds), path, _threadsafe_callback()))
+        logger.info(f"Sampling profiler started for {seconds}s -> {path}")
+        return path
+
+    def _run(self, target, seconds, path, callback):
+        # 原生线程中不能直接使用 (被 patch 为 gevent 锁的) logging, 结果交回 hub 再记录
+        try:
+            samples = self.sample(target, seconds)
+            self.write(samples, path)
+            callback(logger.info, "Sampling profile written: %s (%d samples)", path, sum(samples.values()))
+        except Exception as e:
+            callback(logger.error, "Sampling profiler failed: %s", e)
+        finally:
+            self.running = False
+
+    def sample(self, target, seconds):
+        """
+        采样线程 target 的栈 (需在其他原生线程中调用)
+
+        Returns:
+            Counter: collapsed stack -> 样本数
+        """
+        sleep = _native("time", "sleep", time.sleep)
+        current_frames = sys._current_frames
+        collapse = self.collapse
+        samples = Counter()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            frame = current_frames().get(target)
+            if frame is not None:
+                samples[collapse(frame)] += 1
+            frame = None
+            sleep(self.interval)
+        return samples
+
+    def collapse(self, frame):
+        """将栈帧转换为 collapsed stack 字符串 (根在前)"""
+        labels = self._labels
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            stack.append(label)
+            frame = frame.f_back
+        stack.reverse()
+        return ";".join(stack)
+
+    def write(self, samples, path):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(path, "w") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
@@ -0,0 +1,273 @@
+import json
+import math
+import logging
+import statistics
+
+from src.common.results_store import format_table, HISTORY_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# 检测到性能回归时 run_test 的退出码 (Locust 自身使用 1 表示存在失败请求)
+REGRESSION_EXIT_CODE = 3
+
+AGGREGATED = ("", "Aggregated")
+DEFAULT_TOLERANCES = {"p50": 0.15, "p95": 0.10, "p99": 0.20}
+DEFAULT_WINDOW = 5
+DEFAULT_MIN_DELTA_MS = 5.0
+DEFAULT_MIN_REQUESTS = 50
+DEFAULT_MAX_FAIL_RATIO_INCREASE = 0.01
+DEFAULT_ALPHA = 0.05
+MIN_SAMPLES = 5
+# 按运行参数过滤前最多检查的历史运行数
+CANDIDATE_SCAN = 50
+# 基线必须与当前运行一致的负载参数
+LOAD_PARAMS = ("users", "spawn_rate", "run_time")
+
+STATUS_REGRESSION = "REGRESSION"
+STATUS_NOISE = "noise"
+STATUS_OK = "ok"
+STATUS_IMPROVED = "improved"
+
+
+def mann_whitney_u(baseline, current):
+    """
+    单侧 Mann-Whitney U 检验: current 是否显著大于 baseline
+    (正态近似, 含并列值修正与连续性校正, 适用于每组 >= 5 个样本)
+
+    Args:
+        baseline: 基线样本
+        current: 本次样本
+
+    Returns:
+        p 值
+    """
+    n1, n2 = len(baseline), len(current)
+    n = n1 + n2
+    combined = sorted([(v, 0) for v in baseline] + [(v, 1) for v in current])
+
+    rank_sum, tie_term, i = 0.0, 0.0, 0
+    while i < n:
+        j = i
+        while j + 1 < n and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        # 并列值取平均秩 (秩从 1 开始)
+        avg_rank = (i + j + 2) / 2.0
+        rank_sum += avg_rank * sum(1 for k in range(i, j + 1) if combined[k][1] == 1)
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        i = j + 1
+
+    u = rank_sum - n2 * (n2 + 1) / 2.0
+    mu = n1 * n2 / 2.0
+    sigma = math.sqrt(n1 * n2 / 12.0 * ((n + 1) - tie_term / (n * (n - 1))))
+    if sigma == 0:
+        return 1.0
+    z = (u - mu - 0.5) / sigma
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+class RegressionChecker:
+    """
+    将一次运行的各接口指标与基线对比, 判断是否发生性能回归。
+
+    - 基线可以是指定的 run_id, 或同 project/env/tag 最近 N 次运行的滚动中位数;
+      滚动基线只选择负载参数 (users/spawn_rate/run_time) 相同且有请求统计的普通运行,
+      不包括提前终止 (params.aborted, 如 SLA 熔断) 以及 sweep 与 soak 运行;
+      存在失败请求 (Locust 退出码 1) 的运行仍可作为基线
+    - 延迟指标超过相对容忍度且绝对差值超过 min_delta_ms 时视为候选回归,
+      再对两组 stats history 采样做 Mann-Whitney U 检验, 显著 (p < alpha) 才判定为回归,
+      否则标记为 noise; 采样不足时仅按容忍度判断
+    - 失败率按绝对增量判断
+
+    Example config (in yaml):
+    regression:
+      enabled: true
+      baseline: median       # median (滚动中位数) 或具体 run_id
+      window: 5              # 滚动中位数使用的历史运行数
+      tolerances: {p50: 0.15, p95: 0.10, p99: 0.20}
+      min_delta_ms: 5
+      min_requests: 50       # 请求数过少的接口不参与比较
+      max_fail_ratio_increase: 0.01
+      alpha: 0.05
+    """
+
+    def __init__(self, store, baseline="median", window=DEFAULT_WINDOW, tolerances=None,
+                 min_delta_ms=DEFAULT_MIN_DELTA_MS, min_requests=DEFAULT_MIN_REQUESTS,
+                 max_fail_ratio_increase=DEFAULT_MAX_FAIL_RATIO_INCREASE, alpha=DEFAULT_ALPHA):
+        """
+        Args:
+            store: ResultsStore 实例
+            baseline: "median" 或基线 run_id
+            window: 滚动中位数使用的历史运行数
+            tolerances: {指标: 相对容忍度}
+            min_delta_ms: 延迟增加的最小绝对值 (毫秒)
+            min_requests: 参与比较的最少请求数
+            max_fail_ratio_increase: 失败率允许的最大绝对增量
+            alpha: 显著性水平
+        """
+        self.store = store
+        self.baseline = baseline
+        self.window = int(window)
+        self.tolerances = tolerances or dict(DEFAULT_TOLERANCES)
+        self.min_delta_ms = float(min_delta_ms)
+        self.min_requests = int(min_requests)
+        self.max_fail_ratio_increase = float(max_fail_ratio_increase)
+        self.alpha = float(alpha)
+
+    @classmethod
+    def from_config(cls, store, regression_config, baseline=None):
+        regression_config = regression_config or {}
+        return cls(
+            store,
+            baseline=baseline or regression_config.get("baseline", "median"),
+            window=regression_config.get("window", DEFAULT_WINDOW),
+            tolerances=regression_config.get("tolerances"),
+            min_delta_ms=regression_config.get("min_delta_ms", DEFAULT_MIN_DELTA_MS),
+            min_requests=regression_config.get("min_requests", DEFAULT_MIN_REQUESTS),
+            max_fail_ratio_increase=regression_config.get("max_fail_ratio_increase", DEFAULT_MAX_FAIL_RATIO_INCREASE),
+            alpha=regression_config.get("alpha", DEFAULT_ALPHA),
+        )
+
+    def baseline_runs(self, run):
+        """选择基线运行 (不包含当前运行)"""
+        if str(self.baseline).isdigit():
+            baseline_run = self.store.get_run(int(self.baseline))
+            return [baseline_run] if baseline_run else []
+        candidates = self.store.runs(project=run["project"], env=run["env"], tag=run["tag"],
+                                     last=max(CANDIDATE_SCAN, self.window + 1))
+        return [r for r in candidates if r["id"] != run["id"] and r["started_at"] <= run["started_at"]
+                and self._comparable(run, r)][:self.window]
+
+    @staticmethod
+    def _comparable(run, candidate):
+        """负载参数一致、有请求统计, 且候选运行没有被提前终止 (aborted)、不是 sweep / soak 运行"""
+        if not candidate["requests"] or any(candidate[key] != run[key] for key in LOAD_PARAMS):
+            return False
+        params = json.loads(candidate["params"] or "{}")
+        return not params.get("aborted") and not params.get("sweep") and not params.get("soak")
+
+    def _endpoint_rows(self, run):
+        rows = {(r["method"], r["name"]): r for r in self.store.endpoint_stats(run["id"])}
+        rows[AGGREGATED] = run
+        return rows
+
+    def check(self, run_id):
+        """
+        对比指定运行与基线
+
+        Returns:
+            RegressionResult
+        """
+        run = self.store.get_run(run_id)
+        if run is None:
+            raise ValueError(f"Run not found: {run_id}")
+        baselines = self.baseline_runs(run)
+        result = RegressionResult(run_id, [b["id"] for b in baselines])
+        if not baselines:
+            logger.info(f"No baseline runs found for run {run_id}, skipping regression check.")
+            return result
+
+        baseline_rows = [self._endpoint_rows(b) for b in baselines]
+        for key, current in self._endpoint_rows(run).items():
+            if (current["requests"] or 0) < self.min_requests:
+                continue
+            history = [rows[key] for rows in baseline_rows if key in rows]
+            if not history:
+                result.new_endpoints.append(key)
+                continue
+            for metric, tolerance in self.tolerances.items():
+                result.diffs.append(self._compare_latency(key, metric, float(tolerance), current, history, result))
+            result.diffs.append(self._compare_failures(key, current, history))
+        return result
+
+    def _compare_latency(self, key, metric, tolerance, current, history, result):
+        method, name = key
+        base_values = [h[metric] for h in history if h[metric] is not None]
+        diff = {"method": method, "name": name, "metric": metric, "baseline": None,
+                "current": current[metric], "change": None, "p_value": None, "status": STATUS_OK}
+        if not base_values or current[metric] is None:
+            return diff
+        base = statistics.median(base_values)
+        delta = current[metric] - base
+        diff["baseline"] = base
+        diff["change"] = delta / base if base else None
+
+        if delta > self.min_delta_ms and (not base or delta / base > tolerance):
+            current_samples = base_samples = []
+            if metric in HISTORY_COLUMNS:
+                current_samples = self.store.history_samples([result.run_id], name, metric, method)
+                base_samples = self.store.history_samples(result.baseline_run_ids, name, metric, method)
+            if len(current_samples) >= MIN_SAMPLES and len(base_samples) >= MIN_SAMPLES:
+                diff["p_value"] = mann_whitney_u(base_samples, current_samples)
+                diff["status"] = STATUS_REGRESSION if diff["p_value"] < self.alpha else STATUS_NOISE
+            else:
+                diff["status"] = STATUS_REGRESSION
+        elif -delta > self.min_delta_ms and base and -delta / base > tolerance:
+            diff["status"] = STATUS_IMPROVED
+        return diff
+
+    def _compare_failures(self, key, current, history):
+        method, name = key
+
+        def fail_ratio(row):
+            return (row["failures"] or 0) / row["requests"] if row["requests"] else 0.0
+
+        base = statistics.median(fail_ratio(h) for h in history)
+        value = fail_ratio(current)
+        status = STATUS_REGRESSION if value - base > self.max_fail_ratio_increase else STATUS_OK
+        return {"method": method, "name": name, "metric": "fail_ratio", "baseline": base, "current": value,
+                "change": value - base, "p_value": None, "status": status}
+
+
+class RegressionResult:
+    """回归检查结果"""
+
+    def __init__(self, run_id, baseline_run_ids):
+        self.run_id = run_id
+        self.baseline_run_ids = baseline_run_ids
+        self.diffs = []
+        self.new_endpoints = []
+
+    @property
+    def regressions(self):
+        return [d for d in self.diffs if d["status"] == STATUS_REGRESSION]
+
+    @property
+    def has_regression(self):
+        return bool(self.regressions)
+
+    def format_table(self, only_changed=True, limit=None):
+        """
+        生成对比表格文本
+
+        Args:
+            only_changed: 仅显示状态不为 ok 的行
+            limit: 最多显示行数 (回归优先)
+        """
+        diffs = [d for d in self.diffs if d["status"] != STATUS_OK] if only_changed else list(self.diffs)
+        order = {STATUS_REGRESSION: 0, STATUS_NOISE: 1, STATUS_IMPROVED: 2, STATUS_OK: 3}
+        diffs.sort(key=lambda d: order[d["status"]])
+        if limit:
+            diffs = diffs[:limit]
+        if not diffs:
+            return ""
+
+        def value(d, key):
+            v = d[key]
+            if v is None:
+                return None
+            return f"{v * 100:.2f}%" if d["metric"] == "fail_ratio" else f"{v:.0f}ms"
+
+        def change(d):
+            if d["change"] is None:
+                return None
+            return f"{d['change'] * 100:+.2f}pp" if d["metric"] == "fail_ratio" else f"{d['change'] * 100:+.1f}%"
+
+        rows = [[f"{d['method']} {d['name']}".strip(), d["metric"], value(d, "baseline"), value(d, "current"),
+                 change(d), None if d["p_value"] is None else f"{d['p_value']:.3f}", d["status"]] for d in diffs]
+        return format_table(["endpoint", "metric", "baseline", "current", "change", "p", "status"], rows)
+
+    def summary(self):
+        baseline = ", ".join(str(i) for i in self.baseline_run_ids) or "-"
+        return (f"Run {self.run_id} vs baseline runs [{baseline}]: "
+                f"{len(self.regressions)} regression(s) in {len(self.diffs)} comparisons")
@@ -0,0 +1,221 @@
+import os
+import re
+import gzip
+import time
+import logging
+import gevent
+from gevent.queue import Queue, Empty
+from locust import FastHttpUser, task, constant
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_MAX_LAG = 5.0
+QUEUE_POLL_TIMEOUT = 1.0
+
+# 统计名称归一化: 数字、UUID、长十六进制 ID 替换为 {id}, 避免统计条目无限增长
+_ID_SEGMENT_PATTERN = re.compile(
+    r"/(?:\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|[0-9a-fA-F]{16,})(?=/|$)"
+)
+
+
+def open_text(path, mode="rt"):
+    """按后缀透明打开普通文件或 gzip 文件"""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode, encoding="utf-8", errors="replace")
+    return open(path, mode, encoding="utf-8", errors="replace")
+
+
+def format_replay_line(offset_ms, method, target):
+    """
+    回放文件格式: 每行 `offset_ms<TAB>method<TAB>target`, offset 为相对首条请求的毫秒数
+    """
+    return f"{int(offset_ms)}\t{method}\t{target}\n"
+
+
+def iter_replay_file(path):
+    """
+    流式读取回放文件
+
+    Yields:
+        (offset_seconds, method, target)
+    """
+    with open_text(path) as f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) != 3 or not parts[0].isdigit():
+                continue
+            yield int(parts[0]) / 1000.0, parts[1], parts[2]
+
+
+def normalize_name(target):
+    """将请求路径归一化为统计名称 (去掉 query, ID 段替换为 {id})"""
+    path = target.split("?", 1)[0]
+    return _ID_SEGMENT_PATTERN.sub("/{id}", path) or "/"
+
+
+class ReplayDispatcher:
+    """
+    访问日志回放调度器 (每个进程一个)。
+
+    - 流式读取回放文件, 按 `行号 % worker_count == worker_index` 将请求分配到各 worker
+    - 按原始相对时间戳 / speedup 计算每条请求的绝对计划时间, 落后时不会累积漂移
+    - 请求通过有界队列交给 LogReplayUser 执行; 超过 max_lag 的过期请求丢弃并计数,
+      避免追赶时产生突发流量, 保持请求速率与原始日志一致
+
+    Example config (in yaml):
+    replay:
+      file: data/replay/prod_20260101.tsv.gz   # 相对项目目录, 由 tools/log_to_replay.py 生成
+      speedup: 2.0          # 时间压缩倍数
+      worker_count: 4       # 分布式 worker 数, 也可通过环境变量 REPLAY_WORKER_COUNT 设置
+      queue_size: 1000
+      max_lag: 5            # 落后超过该秒数的请求直接丢弃
+      loop: false
+    """
+
+    def __init__(self, path, speedup=1.0, worker_count=1, worker_index=0, queue_size=DEFAULT_QUEUE_SIZE,
+                 max_lag=DEFAULT_MAX_LAG, loop=False):
+        """
+        Args:
+            path: 回放文件路径 (.tsv 或 .tsv.gz)
+            speedup: 时间压缩倍数, 2.0 表示以两倍速度回放
+            worker_count: worker 总数
+            worker_index: 当前 worker 序号
+            queue_size: 待执行请求队列上限
+            max_lag: 允许的最大落后秒数
+            loop: 文件结束后是否从头循环
+        """
+        self.path = path
+        self.speedup = max(float(speedup), 1e-6)
+        self.worker_count = max(1, int(worker_count))
+        self.worker_index = int(worker_index)
+        self.max_lag = float(max_lag)
+        self.loop = loop
+        self.queue = Queue(maxsize=max(1, int(queue_size)))
+        self.finished = False
+        self.dispatched = 0
+        self.dropped = 0
+        self.max_observed_lag = 0.0
+        self.environment = None
+        self._greenlet = None
+
+    @classmethod
+    def from_config(cls, replay_config, project_dir):
+        path = replay_config["file"]
+        if not os.path.isabs(path):
+            path = os.path.join(project_dir, path)
+        return cls(
+            path,
+            speedup=replay_config.get("speedup", 1.0),
+            worker_count=os.getenv("REPLAY_WORKER_COUNT", replay_config.get("worker_count", 1)),
+            queue_size=replay_config.get("queue_size", DEFAULT_QUEUE_SIZE),
+            max_lag=replay_config.get("max_lag", DEFAULT_MAX_LAG),
+            loop=replay_config.get("loop", False),
+        )
+
+    def attach(self, environment):
+        """注册 test_start / test_stop 事件 (master 不运行用户, 不调度)"""
+        from locust.runners import MasterRunner
+        if isinstance(environment.runner, MasterRunner):
+            return
+        self.environment = environment
+        environment.events.test_start.add_listener(self._on_test_start)
+        environment.events.test_stop.add_listener(self._on_test_stop)
+
+    def _on_test_start(self, environment, **kwargs):
+        self.worker_index = max(getattr(environment.runner, "worker_index", 0), 0)
+        self.start()
+
+    def _on_test_stop(self, environment, **kwargs):
+        self.stop()
+
+    def start(self):
+        if self._greenlet is None:
+            self.finished = False
+            self._greenlet = gevent.spawn(self._run)
+
+    def stop(self):
+        if self._greenlet is not None:
+            self._greenlet.kill(block=False)
+            self._greenlet = None
+        logger.info(
+            f"Replay dispatcher stopped: dispatched={self.dispatched}, dropped={self.dropped}, "
+            f"max_lag={self.max_observed_lag:.2f}s"
+        )
+
+    def _run(self):
+        try:
+            while True:
+                self._dispatch_file()
+                if not self.loop:
+                    break
+        finally:
+            self.finished = True
+            logger.info(f"Replay file exhausted: {self.path}")
+
+    def _dispatch_file(self):
+        start = time.time()
+        for line_no, (offset, method, target) in enumerate(iter_replay_file(self.path)):
+            if line_no % self.worker_count != self.worker_index:
+                continue
+            due = start + offset / self.speedup
+            delay = due - time.time()
+            if delay > 0:
+                gevent.sleep(delay)
+            else:
+                lag = -delay
+                self.max_observed_lag = max(self.max_observed_lag, lag)
+                if lag > self.max_lag:
+                    self.dropped += 1
+                    continue
+            # 队列已满说明用户数不足, put 阻塞导致后续请求落后, 由 max_lag 丢弃补偿
+            self.queue.put((due, method, target))
+            self.dispatched += 1
+
+    def get(self):
+        """
+        获取下一条待执行请求
+
+        Returns:
+            (due, method, target); 暂无请求时返回 None
+        """
+        try:
+            return self.queue.get(timeout=QUEUE_POLL_TIMEOUT)
+        except Empty:
+            return None
+
+
+class LogReplayUser(FastHttpUser):
+    """
+    访问日志回放用户: 从 ReplayDispatcher 队列中取出请求并立即执行。
+    用户数需要覆盖回放的并发度 (约等于 峰值 RPS x 平均响应时间)。
+
+    子类需设置 dispatcher 类属性。
+    """
+    abstract = True
+    wait_time = constant(0)
+    dispatcher = None
+
+    @task
+    def replay_next(self):
+        item = self.dispatcher.get()
+        if item is None:
+            if self.dispatcher.finished and self.dispatcher.queue.empty():
+                self._on_replay_finished()
+            return
+
+        due, method, target = item
+        lag = time.time() - due
+        if lag > self.dispatcher.max_lag:
+            self.dispatcher.dropped += 1
+            return
+        self.client.request(method, target, name=normalize_name(target))
+
+    def _on_replay_finished(self):
+        """单机模式下回放结束即停止测试, 分布式 worker 空闲等待"""
+        from locust.runners import LocalRunner
+        if isinstance(self.environment.runner, LocalRunner):
+            logger.info("Replay finished, stopping test.")
+            self.environment.runner.quit()
+        else:
+            gevent.sleep(QUEUE_POLL_TIMEOUT)
@@ -0,0 +1,322 @@
+import os
+import csv
+import json
+import time
+import sqlite3
+import logging
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join("reports", "results.db")
+HISTORY_BATCH_SIZE = 5000
+
+# Locust CSV 统计列 -> 数据库列 (runs 保存 Aggregated 行, endpoint_stats 保存各接口行)
+STAT_COLUMNS = [
+    ("Request Count", "requests", "INTEGER"), ("Failure Count", "failures", "INTEGER"),
+    ("Median Response Time", "median_rt", "REAL"), ("Average Response Time", "avg_rt", "REAL"),
+    ("Min Response Time", "min_rt", "REAL"), ("Max Response Time", "max_rt", "REAL"),
+    ("Average Content Size", "avg_size", "REAL"), ("Requests/s", "rps", "REAL"), ("Failures/s", "fps", "REAL"),
+]
+PERCENTILE_COLUMNS = [
+    ("50%", "p50"), ("66%", "p66"), ("75%", "p75"), ("80%", "p80"), ("90%", "p90"), ("95%", "p95"),
+    ("98%", "p98"), ("99%", "p99"), ("99.9%", "p999"), ("99.99%", "p9999"), ("100%", "p100"),
+]
+_STAT_SQL = ",\n    ".join([f"{col} {kind}" for _, col, kind in STAT_COLUMNS]
+                           + [f"{col} REAL" for _, col in PERCENTILE_COLUMNS])
+_PERCENTILE_SQL = ",\n    ".join(f"{col} REAL" for _, col in PERCENTILE_COLUMNS)
+_STAT_NAMES = [col for _, col, _ in STAT_COLUMNS] + [col for _, col in PERCENTILE_COLUMNS]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project TEXT NOT NULL,
+    env TEXT NOT NULL,
+    tag TEXT,
+    git_sha TEXT,
+    started_at REAL NOT NULL,
+    duration_s REAL,
+    users INTEGER,
+    spawn_rate REAL,
+    run_time TEXT,
+    params TEXT,
+    report_path TEXT,
+    exit_code INTEGER,
+    {_STAT_SQL}
+);
+CREATE INDEX IF NOT EXISTS idx_runs_lookup ON runs (project, env, tag, started_at);
+
+CREATE TABLE IF NOT EXISTS endpoint_stats (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    method TEXT NOT NULL,
+    name TEXT NOT NULL,
+    {_STAT_SQL},
+    PRIMARY KEY (run_id, method, name)
+);
+CREATE INDEX IF NOT EXISTS idx_endpoint_name ON endpoint_stats (name, method, run_id);
+
+CREATE TABLE IF NOT EXISTS stats_history (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    ts INTEGER NOT NULL,
+    method TEXT,
+    name TEXT NOT NULL,
+    user_count INTEGER,
+    rps REAL,
+    fps REAL,
+    {_PERCENTILE_SQL},
+    total_requests INTEGER,
+    total_failures INTEGER,
+    total_avg_rt REAL
+);
+CREATE INDEX IF NOT EXISTS idx_history_lookup ON stats_history (run_id, name, ts);
+"""
+
+HISTORY_COLUMNS = {"rps", "fps"} | {col for _, col in PERCENTILE_COLUMNS}
+
+# 可用于趋势查询的指标 (白名单, 防止 SQL 注入), 响应时间单位为毫秒
+TREND_METRICS = {col: col for col in _STAT_NAMES}
+TREND_METRICS.update({
+    "avg": "avg_rt", "median": "median_rt", "min": "min_rt", "max": "max_rt",
+    "fail_ratio": "CAST(failures AS REAL) / NULLIF(requests, 0)",
+})
+
+
+def get_git_sha(cwd=None):
+    """获取当前 git commit SHA, 非 git 目录时返回 None"""
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=cwd, capture_output=True, text=True, timeout=5)
+        return (result.stdout.strip() or None) if result.returncode == 0 else None
+    except Exception:
+        return None
+
+
+def format_table(headers, rows):
+    """将行数据格式化为对齐的文本表格"""
+    cells = [[("-" if v is None else f"{v:.2f}" if isinstance(v, float) else str(v)) for v in row] for row in rows]
+    widths = [max(len(str(h)), *(len(row[i]) for row in cells)) if cells else len(str(h))
+              for i, h in enumerate(headers)]
+    lines = ["  ".join(str(h).ljust(w) for h, w in zip(headers, widths)),
+             "  ".join("-" * w for w in widths)]
+    lines += ["  ".join(c.ljust(w) for c, w in zip(row, widths)) for row in cells]
+    return "\n".join(lines)
+
+
+def _num(value, cast=float):
+    """解析 CSV 数值, 'N/A' 或空值返回 None"""
+    try:
+        return cast(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _percentiles(row):
+    return [_num(row.get(csv_col)) for csv_col, _ in PERCENTILE_COLUMNS]
+
+
+class ResultsStore:
+    """
+    本地 SQLite 结果库: 保存每次运行的汇总、各接口统计与 stats history。
+
+    以 project / env / tag / git_sha / 运行参数作为索引键, 便于查询趋势,
+    例如 "最近 30 次 nightly 运行中 /api/crm/v4/user/login 的 p95"。
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        """
+        Args:
+            db_path: SQLite 文件路径 (目录不存在时自动创建)
+        """
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def ingest_run(self, csv_prefix, project, env, params=None, tag=None, git_sha=None, started_at=None,
+                   duration=None, report_path=None, exit_code=None):
+        """
+        导入一次运行的 <csv_prefix>_stats.csv 与 <csv_prefix>_stats_history.csv
+
+        Args:
+            csv_prefix: Locust --csv 前缀
+            project: 项目名
+            env: 环境
+            params: 运行参数 dict (users / spawn_rate / run_time 等)
+            tag: 运行类型标签, 例如 nightly / ci / manual
+            git_sha: 代码版本
+            started_at: 开始时间 (epoch 秒)
+            duration: 运行耗时 (秒)
+            report_path: HTML 报告路径
+            exit_code: Locust 退出码
+
+        Returns:
+            新运行的 run_id
+        """
+        params = params or {}
+        stats_csv = f"{csv_prefix}_stats.csv"
+        history_csv = f"{csv_prefix}_stats_history.csv"
+
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (project, env, tag, git_sha, started_at, duration_s, users, spawn_rate, run_time, "
+                "params, report_path, exit_code) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (project, env, tag, git_sha, started_at or time.time(), duration, _num(params.get("users"), int),
+                 _num(params.get("spawn_rate")), params.get("run_time"), json.dumps(params, default=str),
+                 report_path, exit_code),
+            )
+            run_id = cursor.lastrowid
+            if os.path.exists(stats_csv):
+                self._ingest_stats(run_id, stats_csv)
+            else:
+                logger.warning(f"Stats CSV not found, only run metadata stored: {stats_csv}")
+            if os.path.exists(history_csv):
+                self._ingest_history(run_id, history_csv)
+
+        logger.info(f"Run {run_id} stored in results database: {self.db_path}")
+        return run_id
+
+    def _ingest_stats(self, run_id, stats_csv):
+        columns = ", ".join(_STAT_NAMES)
+        placeholders = ", ".join("?" * (3 + len(_STAT_NAMES)))
+        with open(stats_csv, 'r') as f:
+            for row in csv.DictReader(f):
+                name = row.get("Name")
+                values = [_num(row.get(csv_col), int if kind == "INTEGER" else float)
+                          for csv_col, _, kind in STAT_COLUMNS] + _percentiles(row)
+                if name in ["Aggregated", "Total"]:
+                    self.conn.execute(
+                        f"UPDATE runs SET {', '.join(f'{col} = ?' for col in _STAT_NAMES)} WHERE id = ?",
+                        values + [run_id],
+                    )
+                else:
+                    self.conn.execute(
+                        f"INSERT OR REPLACE INTO endpoint_stats (run_id, method, name, {columns}) "
+                        f"VALUES ({placeholders})",
+                        [run_id, row.get("Type", ""), name] + values,
+                    )
+
+    def _ingest_history(self, run_id, history_csv):
+        """分批写入 stats history, 避免整表读入内存"""
+        percentile_cols = ", ".join(col for _, col in PERCENTILE_COLUMNS)
+        sql = (f"INSERT INTO stats_history (run_id, ts, method, name, user_count, rps, fps, {percentile_cols}, "
+               f"total_requests, total_failures, total_avg_rt) "
+               f"VALUES ({', '.join('?' * (10 + len(PERCENTILE_COLUMNS)))})")
+        batch = []
+        with open(history_csv, 'r') as f:
+            for row in csv.DictReader(f):
+                batch.append(
+                    [run_id, _num(row.get("Timestamp"), int), row.get("Type", ""), row.get("Name"),
+                     _num(row.get("User Count"), int), _num(row.get("Requests/s")), _num(row.get("Failures/s"))]
+                    + _percentiles(row)
+                    + [_num(row.get("Total Request Count"), int), _num(row.get("Total Failure Count"), int),
+                       _num(row.get("Total Average Response Time"))]
+                )
+                if len(batch) >= HISTORY_BATCH_SIZE:
+                    self.conn.executemany(sql, batch)
+                    batch = []
+        if batch:
+            self.conn.executemany(sql, batch)
+
+    def runs(self, project=None, env=None, tag=None, last=20):
+        """最近的运行记录 (按开始时间倒序)"""
+        where, args = self._filters(project=project, env=env, tag=tag)
+        return self.conn.execute(
+            f"SELECT * FROM runs {where} ORDER BY started_at DESC LIMIT ?", args + [int(last)]
+        ).fetchall()
+
+    def get_run(self, run_id):
+        return self.conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+
+    def endpoint_stats(self, run_id):
+        return self.conn.execute(
+            "SELECT * FROM endpoint_stats WHERE run_id = ? ORDER BY name, method", (run_id,)
+        ).fetchall()
+
+    def history(self, run_id, name="Aggregated"):
+        return self.conn.execute(
+            "SELECT * FROM stats_history WHERE run_id = ? AND name = ? ORDER BY ts", (run_id, name)
+        ).fetchall()
+
+    def history_samples(self, run_ids, name, metric, method=None, interval=10):
+        """
+        读取多次运行中某接口的 stats history 采样值 (跳过空值与无流量的采样点)
+
+        history 中的百分位为最近 10 秒滑动窗口统计, 相邻采样高度相关,
+        因此每 interval 秒只保留一个采样点。
+
+        Args:
+            run_ids: 运行 id 列表
+            name: 接口名称, "Aggregated" 表示整体
+            metric: stats_history 中的列名 (p50 / p95 / p99 / rps 等)
+            method: 请求方法
+            interval: 采样间隔 (秒)
+        """
+        if metric not in HISTORY_COLUMNS:
+            raise ValueError(f"Unsupported history metric: {metric}")
+        if not run_ids:
+            return []
+        where, args = self._filters(name=name, method=None if name == "Aggregated" else method)
+        rows = self.conn.execute(
+            f"SELECT run_id, ts, {metric} AS value FROM stats_history {where} "
+            f"AND run_id IN ({', '.join('?' * len(run_ids))}) AND {metric} IS NOT NULL AND rps > 0 "
+            f"ORDER BY run_id, ts",
+            args + list(run_ids),
+        ).fetchall()
+        samples, last_run, last_ts = [], None, None
+        for row in rows:
+            if row["run_id"] != last_run or row["ts"] >= last_ts + interval:
+                samples.append(row["value"])
+                last_run, last_ts = row["run_id"], row["ts"]
+        return samples
+
+    def trend(self, name, metric="p95", project=None, env=None, tag=None, method=None, last=30):
+        """
+        查询某个接口指标在最近 N 次运行中的变化 (按时间正序)
+
+        Args:
+            name: 接口名称 (Locust 统计中的 Name), "Aggregated" 表示整体
+            metric: TREND_METRICS 中的指标, 响应时间单位为毫秒
+            method: 请求方法, 同名接口存在多个方法时用于区分
+            last: 最近运行次数
+
+        Returns:
+            [{run_id, started_at, git_sha, tag, value}, ...]
+        """
+        if metric not in TREND_METRICS:
+            raise ValueError(f"Unsupported metric: {metric}. Choose from {sorted(TREND_METRICS)}")
+
+        if name == "Aggregated":
+            source, endpoint_filters = "runs", {}
+        else:
+            source = ("(SELECT e.*, r.id, r.project, r.env, r.tag, r.git_sha, r.started_at "
+                      "FROM endpoint_stats e JOIN runs r ON r.id = e.run_id)")
+            endpoint_filters = {"name": name, "method": method.upper() if method else None}
+        where, args = self._filters(project=project, env=env, tag=tag, **endpoint_filters)
+        rows = self.conn.execute(
+            f"SELECT id AS run_id, started_at, git_sha, tag, {TREND_METRICS[metric]} AS value "
+            f"FROM {source} {where} ORDER BY started_at DESC LIMIT ?",
+            args + [int(last)],
+        ).fetchall()
+        return [dict(row) for row in reversed(rows)]
+
+    @staticmethod
+    def _filters(**filters):
+        clauses, args = [], []
+        for key, value in filters.items():
+            if value is not None:
+                clauses.append(f"{key} = ?")
+                args.append(value)
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", args
@@ -0,0 +1,278 @@
+import os
+import glob
+import json
+import mmap
+import time
+import socket
+import struct
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 每条样本固定 24 字节: 时间戳(秒) / 名称 id / 响应时间(ms) / 响应大小 / 状态码 / 是否失败
+RECORD = struct.Struct("<dIfIHB1x")
+RECORD_DTYPE = np.dtype([("ts", "<f8"), ("name_id", "<u4"), ("latency", "<f4"), ("size", "<u4"),
+                         ("status", "<u2"), ("failed", "u1"), ("_pad", "V1")])
+assert RECORD.size == RECORD_DTYPE.itemsize
+
+DEFAULT_BUFFER_RECORDS = 4096
+DEFAULT_GROW_BYTES = 64 * 1024 * 1024
+DEFAULT_PERCENTILES = [50, 90, 95, 99, 99.9, 100]
+
+
+def names_path(sample_path):
+    """名称 id 映射文件 (JSON 列表, 下标即 name_id)"""
+    return sample_path + ".names.json"
+
+
+class SampleRecorder:
+    """
+    逐请求原始样本记录器 (每个 worker 一个二进制文件)。
+
+    请求事件中只做一次字典查找与 struct.pack_into 写入预分配缓冲区 (每次请求约 0.5 微秒),
+    缓冲区写满后整块复制到按块扩容的 mmap 文件; 测试结束时截断文件并写出名称映射。
+    使用 tools/merge_samples.py 合并各 worker 文件并计算精确百分位。
+
+    Example config (in yaml):
+    sample_recorder:
+      enabled: true
+      dir: reports/samples         # run_test.py 运行时写到报告目录 (LOCUST_SAMPLES_PREFIX)
+      buffer_records: 4096
+    """
+
+    def __init__(self, env, path, buffer_records=DEFAULT_BUFFER_RECORDS, grow_bytes=DEFAULT_GROW_BYTES):
+        """
+        Args:
+            env: Locust Environment
+            path: 样本文件路径
+            buffer_records: 缓冲区可容纳的样本数
+            grow_bytes: mmap 文件每次扩容的字节数
+        """
+        self.env = env
+        self.path = path
+        self.grow_bytes = max(int(grow_bytes), mmap.PAGESIZE)
+        self._buffer = bytearray(RECORD.size * max(1, int(buffer_records)))
+        self._buffer_view = memoryview(self._buffer)
+
+        self._name_ids = {}
+        self._names = []
+        self._names_dirty = False
+
+        self._written = 0
+        self._capacity = 0
+        self._mmap = None
+        self._file = None
+        self._closed = False
+
+        self.on_request, self._drain = self._make_request_hook()
+
+        if env is not None:
+            env.events.request.add_listener(self.on_request)
+            env.events.test_stop.add_listener(self.on_test_stop)
+            env.events.quitting.add_listener(self.on_quitting)
+
+    @classmethod
+    def from_config(cls, env, recorder_config, project_name=None):
+        """
+        按配置创建记录器 (master 不产生请求, 不记录)
+
+        Returns:
+            SampleRecorder 或 None
+        """
+        from locust.runners import MasterRunner
+        if isinstance(env.runner, MasterRunner):
+            return None
+        prefix = os.getenv("LOCUST_SAMPLES_PREFIX")
+        if not prefix:
+            prefix = os.path.join(recorder_config.get("dir", os.path.join("reports", "samples")),
+                                  f"{project_name or 'locust'}_{time.strftime('%Y%m%d_%H%M%S')}")
+        path = f"{prefix}_samples_{socket.gethostname()}_{os.getpid()}.bin"
+        recorder = cls(env, path, buffer_records=recorder_config.get("buffer_records", DEFAULT_BUFFER_RECORDS))
+        logger.info(f"Raw sample recorder enabled: {path}")
+        return recorder
+
+    def _make_request_hook(self):
+        """
+        构造 request 事件处理函数 (热路径)。
+
+        以闭包形式实现, 所有依赖绑定为局部变量, 每次请求只有一次字典查找与一次 pack_into;
+        时间戳使用 Locust 事件自带的 start_time, 省去额外的 time.time() 调用。
+
+        Returns:
+            (on_request, drain): drain 将缓冲区中未写出的样本写入文件
+        """
+        buffer = self._buffer
+        pack_into = RECORD.pack_into
+        record_size = RECORD.size
+        limit = len(buffer)
+        name_ids = self._name_ids
+        register = self._register
+        write = self._write
+        now = time.time
+        offset = 0
+
+        def on_request(request_type, name, response_time, response_length, exception=None, response=None,
+                       context=None, start_time=None, url=None, **kwargs):
+            nonlocal offset
+            name_id = name_ids.get((request_type, name))
+            if name_id is None:
+                name_id = register(request_type, name)
+            pack_into(buffer, offset, start_time or now(), name_id, response_time or 0, response_length or 0,
+                      (response.status_code or 0) if response is not None else 0, exception is not None)
+            offset += record_size
+            if offset == limit:
+                write(offset)
+                offset = 0
+
+        def drain():
+            nonlocal offset
+            if offset:
+                write(offset)
+                offset = 0
+
+        return on_request, drain
+
+    def _register(self, request_type, name):
+        name_id = len(self._names)
+        self._names.append([request_type, name])
+        self._name_ids[(request_type, name)] = name_id
+        self._names_dirty = True
+        return name_id
+
+    def _ensure_capacity(self, size):
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self._file = open(self.path, "w+b")
+        if self._written + size <= self._capacity:
+            return
+        if self._mmap is not None:
+            self._mmap.close()
+        while self._capacity < self._written + size:
+            self._capacity += self.grow_bytes
+        self._file.truncate(self._capacity)
+        self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+
+    def _write(self, size):
+        self._ensure_capacity(size)
+        self._mmap[self._written:self._written + size] = self._buffer_view[:size]
+        self._written += size
+
+    def flush(self):
+        """将缓冲区写入 mmap 文件, 并在有新名称时更新名称映射"""
+        self._drain()
+        if self._names_dirty:
+            with open(names_path(self.path), "w") as f:
+                json.dump(self._names, f)
+            self._names_dirty = False
+
+    def close(self):
+        """写出剩余样本, 并把文件截断为实际长度"""
+        if self._closed:
+            return
+        self.flush()
+        if self._mmap is not None:
+            self._mmap.flush()
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.truncate(self._written)
+            self._file.close()
+            self._file = None
+        self._closed = True
+        logger.info(f"Raw samples saved: {self.path} ({self._written // RECORD.size} requests)")
+
+    def on_test_stop(self, environment, **kwargs):
+        self.flush()
+
+    def on_quitting(self, environment, **kwargs):
+        self.close()
+
+
+def find_sample_files(prefix):
+    """查找某次运行各 worker 的样本文件"""
+    return sorted(glob.glob(f"{prefix}_samples_*.bin"))
+
+
+def load_samples(paths):
+    """
+    合并多个 worker 的样本文件, 将各文件的本地 name_id 映射为全局 id
+
+    Returns:
+        (samples 结构化数组, names 列表 [[method, name], ...])
+    """
+    names, global_ids, parts = [], {}, []
+    for path in paths:
+        with open(names_path(path)) as f:
+            local_names = json.load(f)
+        mapping = np.empty(max(len(local_names), 1), dtype=np.uint32)
+        for local_id, (method, name) in enumerate(local_names):
+            key = (method, name)
+            if key not in global_ids:
+                global_ids[key] = len(names)
+                names.append([method, name])
+            mapping[local_id] = global_ids[key]
+
+        data = np.fromfile(path, dtype=RECORD_DTYPE)
+        # 异常退出时文件尾部可能是未写入的预分配空间
+        data = data[data["ts"] > 0]
+        data["name_id"] = mapping[data["name_id"]]
+        parts.append(data)
+    samples = np.concatenate(parts) if parts else np.empty(0, dtype=RECORD_DTYPE)
+    return samples, names
+
+
+def exact_stats(samples, names, percentiles=None):
+    """
+    按接口计算精确百分位 (基于全部原始样本, 非分桶近似)
+
+    Returns:
+        [{method, name, count, failures, min, avg, max, percentiles: {p: ms}}, ...] (最后一项为 Aggregated)
+    """
+    percentiles = percentiles or DEFAULT_PERCENTILES
+    if not len(samples):
+        return []
+    order = np.argsort(samples["name_id"], kind="stable")
+    ids = samples["name_id"][order]
+    latency = samples["latency"][order].astype(np.float64)
+    failed = samples["failed"][order]
+    boundaries = np.flatnonzero(np.diff(ids)) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(ids)]))
+
+    def summarize(method, name, values, failures):
+        return {
+            "method": method,
+            "name": name,
+            "count": int(len(values)),
+            "failures": int(failures),
+            "min": float(values.min()),
+            "avg": float(values.mean()),
+            "max": float(values.max()),
+            "percentiles": dict(zip([str(p) for p in percentiles], np.percentile(values, percentiles).tolist())),
+        }
+
+    results = [summarize(*names[ids[start]], latency[start:end], failed[start:end].sum())
+               for start, end in zip(starts, ends)]
+    results.append(summarize("", "Aggregated", latency, failed.sum()))
+    return results
+
+
+def latency_histogram(samples, bins=50, name_id=None):
+    """
+    响应时间直方图 (对数刻度分桶)
+
+    Returns:
+        (counts, bin_edges_ms)
+    """
+    latency = samples["latency"] if name_id is None else samples["latency"][samples["name_id"] == name_id]
+    if not len(latency):
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    low = max(float(latency.min()), 0.1)
+    high = max(float(latency.max()), low * 1.01)
+    edges = np.concatenate(([0.0], np.geomspace(low, high, bins)))
+    counts, edges = np.histogram(latency, bins=edges)
+    return counts, edges
@@ -0,0 +1,262 @@
+import logging
+from itertools import combinations
+
+import numpy as np
+
+from src.common.analyzer import StatsHistory, P50, P95, PLATEAU_RATIO
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WARMUP_S = 15
+MIN_LEVELS = 3
+
+
+def measure_levels(history, warmup_s=DEFAULT_WARMUP_S):
+    """
+    按用户数档位提取稳态测量值 (并发扫描中每个档位为一段用户数不变的连续区间)。
+    每段排除前 warmup_s 秒; 加压过程中的过渡用户数持续时间不足, 会被自然排除。
+
+    Args:
+        history: StatsHistory (Aggregated)
+        warmup_s: 每个档位排除的预热秒数
+
+    Returns:
+        [{users, rps, p50_ms, p95_ms, fail_ratio, samples}, ...] 按用户数升序
+    """
+    if not len(history):
+        return []
+    requests, failures = history.interval_counts()
+    change = np.concatenate(([True], np.diff(history.users) != 0))
+    block_ids = np.cumsum(change)
+    levels = {}
+    for block in np.unique(block_ids):
+        in_block = block_ids == block
+        users = int(history.users[in_block][0])
+        if users <= 0:
+            continue
+        start = history.timestamps[in_block][0]
+        mask = in_block & (history.timestamps >= start + warmup_s) & (history.rps > 0)
+        if mask.any():
+            levels.setdefault(users, np.zeros(len(history), dtype=bool))
+            levels[users] |= mask
+
+    results = []
+    for users in sorted(levels):
+        mask = levels[users]
+        total = requests[mask].sum()
+        results.append({
+            "users": users,
+            "rps": float(np.median(history.rps[mask])),
+            "p50_ms": float(np.nanmedian(history.percentiles[mask, P50])),
+            "p95_ms": float(np.nanmedian(history.percentiles[mask, P95])),
+            "fail_ratio": float(failures[mask].sum() / total) if total else 0.0,
+            "samples": int(mask.sum()),
+        })
+    return results
+
+
+def usl_throughput(users, lam, sigma, kappa):
+    """Universal Scalability Law: X(N) = λN / (1 + σ(N-1) + κN(N-1))"""
+    n = np.asarray(users, dtype=np.float64)
+    return lam * n / (1.0 + sigma * (n - 1.0) + kappa * n * (n - 1.0))
+
+
+def fit_usl(users, throughput):
+    """
+    拟合 USL 参数。
+
+    USL 可线性化为 N/X = a + b(N-1) + cN(N-1), 其中 λ=1/a, σ=b/a, κ=c/a;
+    用最小二乘求解, 若 σ 或 κ 为负则在去掉对应项的子模型中选择误差最小的非负解。
+
+    Args:
+        users: 各档位用户数
+        throughput: 各档位吞吐 (RPS)
+
+    Returns:
+        {lambda, sigma, kappa, r2, optimal_users, peak_rps, saturation_users},
+        有效档位少于 3 个时返回 None
+    """
+    n = np.asarray(users, dtype=np.float64)
+    x = np.asarray(throughput, dtype=np.float64)
+    valid = (n > 0) & (x > 0)
+    n, x = n[valid], x[valid]
+    if len(n) < MIN_LEVELS:
+        return None
+
+    y = n / x
+    terms = {"sigma": n - 1.0, "kappa": n * (n - 1.0)}
+    best = None
+    for size in (2, 1, 0):
+        for names in combinations(terms, size):
+            design = np.column_stack([np.ones_like(n)] + [terms[name] for name in names])
+            coef = np.linalg.lstsq(design, y, rcond=None)[0]
+            # 数值误差级别的系数视为 0 (例如线性扩展时)
+            coef[1:][np.abs(coef[1:]) < 1e-9 * abs(coef[0])] = 0.0
+            if coef[0] <= 0 or (coef[1:] < 0).any():
+                continue
+            params = {"sigma": 0.0, "kappa": 0.0, **{name: c / coef[0] for name, c in zip(names, coef[1:])}}
+            params["lambda"] = 1.0 / coef[0]
+            sse = float(((usl_throughput(n, params["lambda"], params["sigma"], params["kappa"]) - x) ** 2).sum())
+            if best is None or sse < best[0]:
+                best = (sse, params)
+        if best is not None:
+            break
+    if best is None:
+        return None
+
+    sse, params = best
+    lam, sigma, kappa = params["lambda"], params["sigma"], params["kappa"]
+    sst = float(((x - x.mean()) ** 2).sum())
+    result = {
+        "lambda": float(lam),
+        "sigma": float(sigma),
+        "kappa": float(kappa),
+        "r2": 1.0 - sse / sst if sst else 1.0,
+        "optimal_users": None,
+        "peak_rps": None,
+        "saturation_users": None,
+    }
+    if kappa > 0 and sigma < 1:
+        optimal = float(np.sqrt((1.0 - sigma) / kappa))
+        result["optimal_users"] = optimal
+        result["peak_rps"] = float(usl_throughput(optimal, lam, sigma, kappa))
+    elif sigma > 0:
+        # 无相干开销时吞吐单调趋近 λ/σ
+        result["peak_rps"] = float(lam / sigma)
+    if result["peak_rps"] is not None:
+        # 吞吐达到峰值 95% 的最小用户数 (X(N) = target 的较小根)
+        target = PLATEAU_RATIO * result["peak_rps"]
+        roots = np.roots([-target * kappa, lam - target * (sigma - kappa), -target * (1.0 - sigma)])
+        roots = roots[np.isreal(roots)].real
+        roots = roots[roots > 0]
+        if len(roots):
+            result["saturation_users"] = float(roots.min())
+    return result
+
+
+def littles_law(levels):
+    """
+    基于 Little 定律 N = X(R + Z) 的渐近界分析 (以 p50 近似平均响应时间 R):
+    由最低档位估算思考时间 Z, 饱和点 N* = X_max × (R_min + Z)
+
+    Returns:
+        {think_time_s, knee_users, max_rps}, 档位不足时返回 None
+    """
+    if not levels:
+        return None
+    first = levels[0]
+    r_min = min(level["p50_ms"] for level in levels) / 1000.0
+    think_time = max(first["users"] / first["rps"] - first["p50_ms"] / 1000.0, 0.0) if first["rps"] else 0.0
+    max_rps = max(level["rps"] for level in levels)
+    return {
+        "think_time_s": float(think_time),
+        "knee_users": float(max_rps * (r_min + think_time)),
+        "max_rps": float(max_rps),
+    }
+
+
+def analyze_sweep(history, warmup_s=DEFAULT_WARMUP_S):
+    """
+    Returns:
+        {levels, usl, littles_law} (可直接序列化为 JSON)
+    """
+    levels = measure_levels(history, warmup_s)
+    usl = fit_usl([level["users"] for level in levels], [level["rps"] for level in levels])
+    if usl is None:
+        logger.warning(f"Not enough sweep levels to fit the USL ({len(levels)} found, {MIN_LEVELS} required)")
+    return {"levels": levels, "usl": usl, "littles_law": littles_law(levels)}
+
+
+def analyze_sweep_history(history_csv, sweep_config=None):
+    """读取 stats_history CSV 并返回扫描分析结果"""
+    sweep_config = sweep_config or {}
+    history = StatsHistory.load(history_csv)
+    return analyze_sweep(history, float(sweep_config.get("warmup_s", DEFAULT_WARMUP_S)))
+
+
+def render_svg(result, width=640, height=400):
+    """
+    绘制吞吐-用户数曲线 (实测点与 USL 拟合曲线) 为独立 SVG
+
+    Returns:
+        SVG 文本
+    """
+    levels = result["levels"]
+    usl = result["usl"]
+    margin_left, margin_right, margin_top, margin_bottom = 60, 20, 30, 45
+    plot_w = width - margin_left - margin_right
+    plot_h = height - margin_top - margin_bottom
+
+    users = [level["users"] for level in levels]
+    rps = [level["rps"] for level in levels]
+    optimal = (usl["optimal_users"] or 0) if usl else 0
+    # 最优并发远超实测档位时不拉伸坐标轴
+    max_users = max(users + [min(optimal, 2 * max(users, default=1)), 1])
+    curve_n = np.linspace(1, max_users * 1.1, 100)
+    curve_x = usl_throughput(curve_n, usl["lambda"], usl["sigma"], usl["kappa"]) if usl else np.empty(0)
+    max_rps = max(rps + curve_x.tolist() + [1e-9]) * 1.1
+    max_n = float(curve_n[-1])
+
+    def sx(value):
+        return margin_left + value / max_n * plot_w
+
+    def sy(value):
+        return margin_top + plot_h - value / max_rps * plot_h
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="sans-serif" '
+        f'font-size="12">',
+        f'<rect width="{width}" height="{height}" fill="white"/>',
+        f'<line x1="{margin_left}" y1="{margin_top + plot_h}" x2="{margin_left + plot_w}" y2="{margin_top + plot_h}" '
+        f'stroke="black"/>',
+        f'<line x1="{margin_left}" y1="{margin_top}" x2="{margin_left}" y2="{margin_top + plot_h}" stroke="black"/>',
+    ]
+    for i in range(6):
+        n_tick, x_tick = max_n * i / 5, max_rps * i / 5
+        parts.append(f'<text x="{sx(n_tick):.1f}" y="{margin_top + plot_h + 16}" text-anchor="middle">'
+                     f'{n_tick:.0f}</text>')
+        parts.append(f'<text x="{margin_left - 6}" y="{sy(x_tick) + 4:.1f}" text-anchor="end">{x_tick:.1f}</text>')
+    parts.append(f'<text x="{margin_left + plot_w / 2}" y="{height - 8}" text-anchor="middle">Users</text>')
+    parts.append(f'<text x="14" y="{margin_top + plot_h / 2}" text-anchor="middle" '
+                 f'transform="rotate(-90 14 {margin_top + plot_h / 2})">Throughput (RPS)</text>')
+
+    if usl:
+        points = " ".join(f"{sx(n):.1f},{sy(x):.1f}" for n, x in zip(curve_n, curve_x))
+        parts.append(f'<polyline points="{points}" fill="none" stroke="#1f77b4" stroke-width="2"/>')
+        if usl["optimal_users"] and usl["optimal_users"] <= max_n:
+            x_opt = sx(usl["optimal_users"])
+            parts.append(f'<line x1="{x_opt:.1f}" y1="{margin_top}" x2="{x_opt:.1f}" y2="{margin_top + plot_h}" '
+                         f'stroke="#d62728" stroke-dasharray="4,4"/>')
+        parts.append(f'<text x="{margin_left + 8}" y="{margin_top - 10}">USL: λ={usl["lambda"]:.3f} '
+                     f'σ={usl["sigma"]:.4f} κ={usl["kappa"]:.6f} R²={usl["r2"]:.3f}</text>')
+    for n, x in zip(users, rps):
+        parts.append(f'<circle cx="{sx(n):.1f}" cy="{sy(x):.1f}" r="4" fill="#ff7f0e"/>')
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+def format_summary(result):
+    """
+    将扫描结果格式化为通知消息中的文本段落
+
+    Returns:
+        多行文本, 无档位时返回空字符串
+    """
+    levels = result.get("levels") or []
+    if not levels:
+        return ""
+    lines = ["• 档位: " + ", ".join(f"{level['users']}u→{level['rps']:.1f}rps/p95 {level['p95_ms']:.0f}ms"
+                                     for level in levels)]
+    usl = result.get("usl")
+    if usl:
+        lines.append(f"• USL: σ={usl['sigma']:.4f} (竞争), κ={usl['kappa']:.6f} (一致性), R²={usl['r2']:.3f}")
+        if usl["optimal_users"]:
+            lines.append(f"• 最优并发: {usl['optimal_users']:.0f} 用户, 预测峰值 {usl['peak_rps']:.1f} RPS")
+        elif usl["peak_rps"]:
+            lines.append(f"• 吞吐上限: 约 {usl['peak_rps']:.1f} RPS")
+        if usl["saturation_users"]:
+            lines.append(f"• 预测饱和点: {usl['saturation_users']:.0f} 用户 (达到峰值的 {PLATEAU_RATIO:.0%})")
+    law = result.get("littles_law")
+    if law:
+        lines.append(f"• Little 定律拐点: {law['knee_users']:.0f} 用户 (思考时间 {law['think_time_s']:.2f}s)")
+    return "\n".join(lines)
@@ -0,0 +1,265 @@
+import os
+import re
+import json
+import logging
+
+import gevent
+import yaml
+from locust import FastHttpUser, between, constant, constant_pacing
+
+from src.common.assertions import ResponseChecker
+from src.common.data_loader import DataLoaderFactory
+from src.common.transaction import Transaction
+
+logger = logging.getLogger(__name__)
+
+# ${name} / ${name.key.0}
+_VAR_PATTERN = re.compile(r"\$\{([^}]+)\}")
+# JSON 请求体中: 整个字符串值为 "${name}" 时按原类型写入, 其余按字符串内容转义
+_JSON_VAR_PATTERN = re.compile(r"\"\$\{([^}]+)\}\"|\$\{([^}]+)\}")
+
+
+class ScenarioError(ValueError):
+    """YAML 场景定义错误"""
+
+
+def _compile_path(expr):
+    """'data.list.0.id' -> ('data', 'list', 0, 'id'); 数字键用于列表下标"""
+    return tuple(int(key) if key.isdigit() else key for key in expr.strip().split("."))
+
+
+def _compile_ref(expr):
+    """'account.username' -> ('account', ('username',))"""
+    name, *keys = _compile_path(expr)
+    return name, tuple(keys)
+
+
+def _walk(value, keys):
+    try:
+        for key in keys:
+            value = value[key]
+    except (KeyError, IndexError, TypeError):
+        return None
+    return value
+
+
+def _lookup(variables, ref):
+    return _walk(variables.get(ref[0]), ref[1])
+
+
+def _as_text(value):
+    return "" if value is None else str(value)
+
+
+def _as_json_text(value):
+    return json.dumps(_as_text(value), ensure_ascii=False)[1:-1]
+
+
+def _as_json(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def compile_template(text, json_body=False):
+    """
+    预编译模板: 在加载时切分为常量片段与变量引用, 运行时只做一次 join
+
+    Args:
+        text: 含 ${var} 的字符串
+        json_body: text 为序列化后的 JSON, 变量按 JSON 规则转义
+
+    Returns:
+        不含变量时返回原字符串, 否则返回 render(variables) 函数
+    """
+    pattern = _JSON_VAR_PATTERN if json_body else _VAR_PATTERN
+    parts = []
+    pos = 0
+    for match in pattern.finditer(text):
+        if match.start() > pos:
+            parts.append(text[pos:match.start()])
+        if json_body and match.group(1) is not None:
+            parts.append((_compile_ref(match.group(1)), _as_json))
+        else:
+            parts.append((_compile_ref(match.group(2) if json_body else match.group(1)),
+                          _as_json_text if json_body else _as_text))
+        pos = match.end()
+    if not any(isinstance(part, tuple) for part in parts):
+        return text
+    if pos < len(text):
+        parts.append(text[pos:])
+    parts = tuple(parts)
+
+    def render(variables):
+        return "".join(part if part.__class__ is str else part[1](_lookup(variables, part[0])) for part in parts)
+    return render
+
+
+def _render(value, variables):
+    return value(variables) if callable(value) else value
+
+
+class RequestStep:
+    """一个请求步骤: 模板、断言与提取规则均在加载时编译"""
+    __slots__ = ("method", "url", "name", "headers", "body", "checker")
+
+    def __init__(self, spec, default_headers):
+        request = spec["request"]
+        self.method = request.get("method", "GET").upper()
+        url = request["url"]
+        self.url = compile_template(url)
+        self.name = request.get("name") or url.split("?")[0]
+
+        headers = {**default_headers, **(request.get("headers") or {})}
+        body = None
+        if request.get("json") is not None:
+            headers.setdefault("Content-Type", "application/json")
+            body = compile_template(_as_json(request["json"]), json_body=True)
+        elif request.get("body") is not None:
+            body = compile_template(str(request["body"]))
+        compiled = {key: compile_template(str(value)) for key, value in headers.items()}
+        if any(callable(value) for value in compiled.values()):
+            self.headers = lambda variables: {key: _render(value, variables) for key, value in compiled.items()}
+        else:
+            self.headers = compiled
+        self.body = body.encode("utf-8") if isinstance(body, str) else body
+
+        self.checker = ResponseChecker(spec.get("assert"), spec.get("extract"))
+
+    def __call__(self, user, variables, txn=None):
+        """执行请求, 失败时返回 False (后续步骤不再执行)"""
+        body = self.body
+        if callable(body):
+            body = body(variables).encode("utf-8")
+        with user.client.request(self.method, _render(self.url, variables), name=self.name,
+                                 headers=_render(self.headers, variables), data=body,
+                                 catch_response=True) as response:
+            error = self.checker.check(response, variables)
+            if error is not None:
+                response.failure(error)
+                return False
+        return True
+
+
+class ThinkStep:
+    __slots__ = ("seconds",)
+
+    def __init__(self, seconds):
+        self.seconds = float(seconds)
+
+    def __call__(self, user, variables, txn=None):
+        if txn is not None:
+            txn.sleep(self.seconds)
+        else:
+            gevent.sleep(self.seconds)
+        return True
+
+
+def _compile_steps(specs, default_headers):
+    steps = []
+    for spec in specs or []:
+        if "request" in spec:
+            steps.append(RequestStep(spec, default_headers))
+        elif "think" in spec:
+            steps.append(ThinkStep(spec["think"]))
+        else:
+            raise ScenarioError(f"Unknown step: {spec}")
+    return steps
+
+
+def _make_task(spec, default_headers, iteration_loaders):
+    steps = _compile_steps(spec.get("steps"), default_headers)
+    transaction = spec.get("transaction")
+
+    def run(user, txn=None):
+        variables = user.vars
+        for var, loader in iteration_loaders:
+            variables[var] = loader.next()
+        for step in steps:
+            if not step(user, variables, txn):
+                if txn is not None:
+                    txn.failure(f"Step failed in {spec.get('name', 'task')}")
+                return
+
+    if transaction:
+        def task(user):
+            with Transaction(user, transaction) as txn:
+                run(user, txn)
+    else:
+        task = run
+    task.__name__ = spec.get("name") or "task"
+    return task
+
+
+def _wait_time(spec):
+    if spec is None:
+        return constant(1)
+    if isinstance(spec, (int, float)):
+        return constant(spec)
+    if "between" in spec:
+        return between(*spec["between"])
+    if "constant_pacing" in spec:
+        return constant_pacing(spec["constant_pacing"])
+    if "constant" in spec:
+        return constant(spec["constant"])
+    raise ScenarioError(f"Unsupported wait_time: {spec}")
+
+
+def _load_data_bindings(spec, base_dir):
+    """data: {var: 文件} 每个用户启动时取一行; {var: {file, scope: iteration}} 每次执行任务前取一行"""
+    user_loaders, iteration_loaders = [], []
+    for var, binding in (spec or {}).items():
+        if isinstance(binding, str):
+            binding = {"file": binding}
+        path = binding["file"]
+        path = path if os.path.isabs(path) else os.path.join(base_dir, path)
+        loader = DataLoaderFactory.get_loader(path)
+        (iteration_loaders if binding.get("scope") == "iteration" else user_loaders).append((var, loader))
+    return user_loaders, iteration_loaders
+
+
+def compile_scenario(path, base_dir=None, module=__name__):
+    """
+    将 YAML 场景文件编译为 FastHttpUser 子类
+
+    Args:
+        path: YAML 文件路径
+        base_dir: 数据文件的相对路径基准, 默认为 YAML 所在目录的上一级 (项目目录)
+        module: 生成类的 __module__
+
+    Returns:
+        FastHttpUser 子类
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        spec = yaml.safe_load(f) or {}
+    if not spec.get("tasks"):
+        raise ScenarioError(f"Scenario {path} has no tasks")
+    base_dir = base_dir or os.path.dirname(os.path.dirname(os.path.abspath(path)))
+
+    default_headers = spec.get("headers") or {}
+    user_loaders, iteration_loaders = _load_data_bindings(spec.get("data"), base_dir)
+    variables = dict(spec.get("variables") or {})
+    on_start_steps = _compile_steps(spec.get("on_start"), default_headers)
+    tasks = {_make_task(task, default_headers, iteration_loaders): task.get("weight", 1) for task in spec["tasks"]}
+
+    def on_start(user):
+        user.vars = dict(variables)
+        for var, loader in user_loaders:
+            user.vars[var] = loader.next()
+        for step in on_start_steps:
+            if not step(user, user.vars):
+                logger.warning(f"on_start step failed in scenario {path}")
+                return
+
+    class_name = spec.get("name") or "".join(
+        part.title() for part in re.split(r"[^0-9a-zA-Z]+", os.path.splitext(os.path.basename(path))[0]) if part
+    ) + "User"
+    attrs = {
+        "host": spec.get("host"),
+        "wait_time": _wait_time(spec.get("wait_time")),
+        "weight": spec.get("weight", 1),
+        "tasks": tasks,
+        "abstract": bool(spec.get("abstract", False)),
+        "on_start": on_start,
+        "scenario_file": path,
+        "__module__": module,
+    }
+    return type(class_name, (FastHttpUser,), attrs)
@@ -51,3 +51,58 @@ class ConfigurableShape(LoadTestShape):
         # End of stages: stop the test (return None) or keep last stage?
         # Usually return None to let it stop or finish
         return None
+
+
+def sweep_levels(sweep_config):
+    """
+    解析并发扫描的用户数档位: 显式 levels 列表, 或 start/stop 加 step (等差) / factor (等比, 默认 2)
+
+    Returns:
+        升序去重的用户数列表
+    """
+    levels = sweep_config.get("levels")
+    if not levels:
+        start = int(sweep_config.get("start", 1))
+        stop = int(sweep_config.get("stop", start))
+        step = sweep_config.get("step")
+        factor = float(sweep_config.get("factor", 2))
+        levels, users = [], start
+        while users <= stop:
+            levels.append(users)
+            next_users = users + int(step) if step else int(round(users * factor))
+            users = max(next_users, users + 1)
+    return sorted({int(users) for users in levels if int(users) > 0})
+
+
+class SweepShape(LoadTestShape):
+    """
+    并发扫描: 在一次运行中依次以各用户数档位运行固定时长, 最后一个档位结束后停止测试。
+    各档位的稳态吞吐与延迟由 src/common/scalability.py 在运行后拟合 (tools/run_test.py --sweep)。
+
+    Example config (in yaml):
+    sweep:
+      levels: [5, 10, 20, 40, 80]   # 或 start: 5, stop: 80, factor: 2 (或 step: 10)
+      stage_duration: 60            # 每个档位的运行秒数
+      spawn_rate: 10
+      warmup_s: 15                  # 分析时每个档位排除的预热秒数
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.project_name = os.getenv("PROJECT")
+        self.config = config.get_project_config(self.project_name) if self.project_name else {}
+        sweep_config = self.config.get("sweep", {}) or {}
+        self.levels = sweep_levels(sweep_config)
+        self.stage_duration = float(sweep_config.get("stage_duration", 60))
+        self.spawn_rate = float(sweep_config.get("spawn_rate", max(self.levels or [1])))
+
+        if self.levels:
+            logger.info(f"Concurrency sweep: {self.levels} users, {self.stage_duration:.0f}s per level.")
+        else:
+            logger.warning("Sweep enabled but no levels configured.")
+
+    def tick(self):
+        stage = int(self.get_run_time() // self.stage_duration)
+        if stage >= len(self.levels):
+            return None
+        return self.levels[stage], self.spawn_rate
@@ -0,0 +1,254 @@
+import os
+import json
+import time
+import html
+import logging
+from collections import Counter, deque
+
+import gevent
+from locust.stats import calculate_response_time_percentile
+
+from src.common.asset_fetcher import PAGE_LOAD_REQUEST_TYPE
+from src.common.blocking_detector import REQUEST_TYPE as BLOCKED_REQUEST_TYPE
+from src.common.transaction import TRANSACTION_REQUEST_TYPE
+
+logger = logging.getLogger(__name__)
+
+SLA_EXIT_CODE = 5
+DEFAULT_WINDOW = 60
+DEFAULT_INTERVAL = 5
+DEFAULT_GRACE = 30
+DEFAULT_MIN_REQUESTS = 20
+# 事务、页面加载与阻塞事件是汇总多个请求或非 HTTP 的统计条目, 不计入 SLA
+DEFAULT_EXCLUDE_TYPES = (TRANSACTION_REQUEST_TYPE, PAGE_LOAD_REQUEST_TYPE, BLOCKED_REQUEST_TYPE)
+
+# 指标 -> (配置项, 违规判断, 说明)
+CHECKS = (
+    ("fail_ratio", "max_fail_ratio", lambda value, limit: value > limit, "failure ratio {value:.2%} > {limit:.2%}"),
+    ("p95_ms", "max_p95_ms", lambda value, limit: value > limit, "p95 {value:.0f}ms > {limit:.0f}ms"),
+    ("rps", "min_rps", lambda value, limit: value < limit, "RPS {value:.1f} < {limit:.1f}"),
+)
+
+
+class SlaGuard:
+    """
+    实时 SLA 熔断: master (或本地模式) 定期对汇总统计做快照, 计算滑动窗口内的失败率、p95 与 RPS。
+    任一阈值持续违规 breach_for 秒后提前结束测试, 进程以 SLA_EXIT_CODE 退出, 违规详情写入 <报告前缀>_sla.json,
+    由 run_test.py 标注到 HTML 报告与通知中。
+
+    启动后的 grace 秒内 (爬坡期) 不判定; 窗口内请求数不足 min_requests 时不判定失败率与 p95;
+    RPS 只在窗口填满且有在线用户时判定。只统计真实请求: exclude_types 中的请求类型 (默认 TXN/PAGE/BLOCKED) 不计入。
+
+    Example config (in yaml):
+    sla:
+      enabled: true
+      window: 60              # 滑动窗口 (秒)
+      interval: 5             # 评估间隔 (秒)
+      grace: 30               # 启动后不判定的时长 (秒)
+      breach_for: 10          # 持续违规多久才熔断 (秒)
+      max_fail_ratio: 0.05
+      max_p95_ms: 2000
+      min_rps: 10
+      exclude_types: [TXN, PAGE, BLOCKED]
+    """
+
+    def __init__(self, environment, sla_config=None, path=None):
+        """
+        Args:
+            environment: Locust Environment
+            sla_config: sla 配置
+            path: 违规记录文件路径, None 表示不写
+        """
+        sla_config = sla_config or {}
+        self.environment = environment
+        self.path = path
+        self.window = float(sla_config.get("window", DEFAULT_WINDOW))
+        self.interval = float(sla_config.get("interval", DEFAULT_INTERVAL))
+        self.grace = float(sla_config.get("grace", DEFAULT_GRACE))
+        self.breach_for = float(sla_config.get("breach_for", 0))
+        self.min_requests = int(sla_config.get("min_requests", DEFAULT_MIN_REQUESTS))
+        self.exclude_types = frozenset(sla_config.get("exclude_types", DEFAULT_EXCLUDE_TYPES))
+        self.limits = {metric: float(sla_config[key]) for metric, key, _, _ in CHECKS if sla_config.get(key) is not None}
+
+        self.breach = None
+        self._snapshots = deque()
+        self._violating_since = {}
+        self._started_at = None
+        self._greenlet = None
+
+    @classmethod
+    def attach(cls, environment, sla_config, project_name=None):
+        """
+        只在 master / 本地模式评估
+
+        Returns:
+            SlaGuard 或 None
+        """
+        from locust.runners import WorkerRunner
+        if isinstance(environment.runner, WorkerRunner):
+            return None
+        prefix = os.getenv("LOCUST_SAMPLES_PREFIX")
+        if not prefix:
+            prefix = os.path.join(sla_config.get("dir", "reports"),
+                                  f"{project_name or 'locust'}_{time.strftime('%Y%m%d_%H%M%S')}")
+        guard = cls(environment, sla_config, f"{prefix}_sla.json")
+        if not guard.limits:
+            logger.warning("SLA guard enabled without thresholds (max_fail_ratio / max_p95_ms / min_rps).")
+            return None
+        environment.events.test_start.add_listener(lambda **kwargs: guard.start())
+        environment.events.test_stop.add_listener(lambda **kwargs: guard.stop())
+        logger.info(f"Live SLA guard enabled: {guard.limits} over {guard.window:.0f}s")
+        return guard
+
+    def start(self):
+        if self._greenlet is not None:
+            return
+        self._started_at = time.time()
+        self._snapshots.clear()
+        self._violating_since = {}
+        self._greenlet = gevent.spawn(self._run)
+
+    def stop(self):
+        if self._greenlet is not None:
+            self._greenlet.kill(block=False)
+            self._greenlet = None
+
+    def _run(self):
+        while self.breach is None:
+            gevent.sleep(self.interval)
+            self.check()
+
+    def snapshot(self, now=None):
+        """记录真实请求的统计快照, 只保留覆盖一个窗口所需的快照"""
+        now = time.time() if now is None else now
+        num_requests = num_failures = 0
+        response_times = Counter()
+        for (_, method), entry in self.environment.stats.entries.items():
+            if method in self.exclude_types:
+                continue
+            num_requests += entry.num_requests
+            num_failures += entry.num_failures
+            response_times.update(entry.response_times)
+        self._snapshots.append((now, num_requests, num_failures, response_times))
+        while len(self._snapshots) > 2 and self._snapshots[1][0] <= now - self.window:
+            self._snapshots.popleft()
+
+    def window_stats(self):
+        """
+        Returns:
+            滑动窗口内的 {span, requests, failures, fail_ratio, p95_ms, rps}, 快照不足时返回 None
+        """
+        if len(self._snapshots) < 2:
+            return None
+        start, end = self._snapshots[0], self._snapshots[-1]
+        span = end[0] - start[0]
+        requests = end[1] - start[1]
+        failures = end[2] - start[2]
+        response_times = {rt: count - start[3].get(rt, 0) for rt, count in end[3].items() if count != start[3].get(rt, 0)}
+        return {
+            "span": span,
+            "requests": requests,
+            "failures": failures,
+            "fail_ratio": failures / requests if requests else 0.0,
+            "p95_ms": calculate_response_time_percentile(response_times, requests, 0.95) if requests else 0,
+            "rps": requests / span if span > 0 else 0.0,
+        }
+
+    def violations(self, stats):
+        """
+        Returns:
+            [(指标, 当前值, 阈值, 说明)]
+        """
+        result = []
+        runner = self.environment.runner
+        for metric, _, violated, template in CHECKS:
+            limit = self.limits.get(metric)
+            if limit is None:
+                continue
+            if metric == "rps":
+                if stats["span"] < self.window * 0.9 or (runner is not None and not runner.user_count):
+                    continue
+            elif stats["requests"] < self.min_requests:
+                continue
+            value = stats[metric]
+            if violated(value, limit):
+                result.append((metric, value, limit, template.format(value=value, limit=limit)))
+        return result
+
+    def check(self, now=None):
+        """
+        取快照并评估, 持续违规超过 breach_for 时熔断
+
+        Returns:
+            熔断记录 dict 或 None
+        """
+        now = time.time() if now is None else now
+        self.snapshot(now)
+        if self.breach is not None or now - (self._started_at or 0) < self.grace:
+            return self.breach
+        stats = self.window_stats()
+        if stats is None:
+            return None
+        violations = self.violations(stats)
+        current = {metric for metric, _, _, _ in violations}
+        self._violating_since = {metric: since for metric, since in self._violating_since.items() if metric in current}
+        for metric, value, limit, description in violations:
+            since = self._violating_since.setdefault(metric, now)
+            if now - since >= self.breach_for:
+                return self.trip(metric, value, limit, description, stats, now)
+        return None
+
+    def trip(self, metric, value, limit, description, stats, now=None):
+        """记录违规并以 SLA_EXIT_CODE 提前结束测试"""
+        now = time.time() if now is None else now
+        elapsed = now - (self._started_at or now)
+        message = f"{description} over the last {stats['span']:.0f}s, aborted after {elapsed:.0f}s"
+        logger.error(f"SLA breached: {message}")
+        self.breach = {
+            "metric": metric,
+            "value": value,
+            "threshold": limit,
+            "message": message,
+            "time": now,
+            "elapsed": elapsed,
+            "window": stats,
+        }
+        if self.path is not None:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.breach, f, indent=2)
+        self.environment.process_exit_code = SLA_EXIT_CODE
+        if self.environment.runner is not None:
+            gevent.spawn(self.environment.runner.quit)
+        return self.breach
+
+
+def load_breach(path):
+    """读取 SlaGuard 写出的违规记录, 不存在时返回 None"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to read SLA breach file {path}: {e}")
+        return None
+
+
+def annotate_report(report_file, message):
+    """在 Locust HTML 报告顶部插入 SLA 熔断提示"""
+    if not os.path.exists(report_file):
+        return False
+    with open(report_file, "r", encoding="utf-8") as f:
+        content = f.read()
+    index = content.find("<body")
+    index = content.find(">", index) + 1 if index != -1 else -1
+    if index <= 0:
+        return False
+    banner = ('<div style="padding:12px 16px;background:#c62828;color:#fff;font:600 15px sans-serif">'
+              f"SLA breached, test aborted early: {html.escape(message)}</div>")
+    with open(report_file, "w", encoding="utf-8") as f:
+        f.write(content[:index] + banner + content[index:])
+    return True
@@ -0,0 +1,353 @@
+import os
+import json
+import time
+import logging
+from collections import deque
+
+import gevent
+from locust.stats import StatsEntry, StatsError, calculate_response_time_percentile
+
+logger = logging.getLogger(__name__)
+
+SOAK_EXIT_CODE = 4
+OTHER_NAME = "(other)"
+OTHER_ERROR = "(other errors)"
+DEFAULT_WINDOW = 300
+# 每秒请求数只保留最近一段 (current_rps 只使用最近 12 秒)
+PER_SECOND_KEEP = 60
+WINDOW_PERCENTILES = (0.5, 0.95, 0.99)
+MAX_RSS_SAMPLES = 4096
+
+
+def rss_slope(samples):
+    """
+    最小二乘拟合 RSS 增长斜率
+
+    Args:
+        samples: [(时间戳秒, RSS MB)]
+
+    Returns:
+        MB/小时, 样本不足时返回 None
+    """
+    n = len(samples)
+    if n < 3:
+        return None
+    mean_t = sum(t for t, _ in samples) / n
+    mean_m = sum(m for _, m in samples) / n
+    var = sum((t - mean_t) ** 2 for t, _ in samples)
+    if var == 0:
+        return None
+    cov = sum((t - mean_t) * (m - mean_m) for t, m in samples)
+    return cov / var * 3600
+
+
+class SoakMonitor:
+    """
+    长稳测试 (soak) 模式: 限制压测机自身的内存占用, 并在压测机自身泄漏时尽早失败。
+
+    - 所有进程: 不同 name 的统计条目与错误条目数量有上限, 超出部分归入 "(other)" / "(other errors)";
+      master 上 worker 报告直接合并进 stats.entries / stats.errors, 每次合并后再折叠超出上限的条目
+    - master / 本地模式: 每个窗口把该窗口内的增量统计 (请求数、失败数、RPS、平均值与百分位) 追加到 JSONL 文件,
+      并裁剪只增不减的每秒计数与图表历史
+    - master / 本地模式: 跟踪各进程 RSS (worker 的 RSS 来自心跳), 预热期后按线性拟合计算增长斜率,
+      超过阈值时判定压测机泄漏, 记录到窗口文件并以 SOAK_EXIT_CODE 退出
+
+    Example config (in yaml):
+    soak:
+      window: 300                  # 统计窗口 (秒)
+      max_entries: 300             # 统计条目上限 (name + method)
+      max_errors: 200              # 错误条目上限
+      max_history: 720             # Web UI / HTML 报告图表保留的点数
+      rss_interval: 30             # RSS 采样间隔 (秒)
+      warmup: 600                  # 预热期 (秒), 不参与斜率计算
+      min_span: 1800               # 至少拟合这么长时间的样本才判定
+      max_rss_slope_mb_h: 50       # RSS 增长斜率上限 (MB/小时)
+      max_rss_mb: 0                # RSS 绝对上限, 0 表示不限制
+      dir: reports                 # run_test.py 运行时写到报告目录
+    """
+
+    def __init__(self, environment, soak_config=None, path=None):
+        """
+        Args:
+            environment: Locust Environment
+            soak_config: soak 配置
+            path: 窗口文件路径, None 表示不写
+        """
+        soak_config = soak_config or {}
+        self.environment = environment
+        self.path = path
+        self.window = float(soak_config.get("window", DEFAULT_WINDOW))
+        self.max_entries = int(soak_config.get("max_entries", 300))
+        self.max_errors = int(soak_config.get("max_errors", 200))
+        self.max_history = int(soak_config.get("max_history", 720))
+        self.rss_interval = float(soak_config.get("rss_interval", 30))
+        self.warmup = float(soak_config.get("warmup", 600))
+        self.min_span = float(soak_config.get("min_span", 1800))
+        self.max_slope = float(soak_config.get("max_rss_slope_mb_h", 50))
+        self.max_rss_mb = float(soak_config.get("max_rss_mb", 0) or 0)
+
+        self.folded = 0
+        self.leak = None
+        self.rss = {}  # node -> deque[(t, mb)]
+        self._previous = {}
+        self._started_at = None
+        self._window_start = None
+        self._greenlets = []
+
+    @classmethod
+    def attach(cls, environment, soak_config, project_name=None):
+        """
+        所有进程限制统计条目数; master / 本地模式额外写窗口文件并检测泄漏
+
+        Returns:
+            SoakMonitor
+        """
+        from locust.runners import WorkerRunner
+
+        path = None
+        if not isinstance(environment.runner, WorkerRunner):
+            prefix = os.getenv("LOCUST_SAMPLES_PREFIX")
+            if not prefix:
+                prefix = os.path.join(soak_config.get("dir", "reports"),
+                                      f"{project_name or 'locust'}_{time.strftime('%Y%m%d_%H%M%S')}")
+            path = f"{prefix}_soak.jsonl"
+        monitor = cls(environment, soak_config, path)
+        monitor.install_caps(environment.stats)
+        if hasattr(environment.runner, "clients"):
+            # 在 Locust 自身的 worker_report 监听器 (创建 runner 时注册) 之后执行
+            environment.events.worker_report.add_listener(lambda **kwargs: monitor.fold_overflow(environment.stats))
+        if path is not None:
+            environment.events.test_start.add_listener(lambda **kwargs: monitor.start())
+            environment.events.test_stop.add_listener(lambda **kwargs: monitor.stop())
+            logger.info(f"Soak mode enabled: {monitor.window:.0f}s windows -> {path}")
+        return monitor
+
+    def install_caps(self, stats):
+        """替换 stats 实例的 log_request / log_error, 超出上限的新条目归入 (other)"""
+        log_request, log_error = stats.log_request, stats.log_error
+        max_entries, max_errors = self.max_entries, self.max_errors
+
+        def capped_log_request(method, name, response_time, content_length):
+            if (name, method) not in stats.entries and len(stats.entries) >= max_entries:
+                if not self.folded:
+                    logger.warning(f"More than {max_entries} distinct request names, new names are counted as '{OTHER_NAME}'.")
+                self.folded += 1
+                name = OTHER_NAME
+            log_request(method, name, response_time, content_length)
+
+        def capped_log_error(method, name, error):
+            if (name, method) not in stats.entries:
+                name = OTHER_NAME
+            if len(stats.errors) >= max_errors and StatsError.create_key(method, name, error) not in stats.errors:
+                error = OTHER_ERROR
+            log_error(method, name, error)
+
+        stats.log_request = capped_log_request
+        stats.log_error = capped_log_error
+
+    def fold_overflow(self, stats):
+        """将超出上限的统计条目与错误条目合并到 (other) / (other errors), 用于不经过 log_request 的写入"""
+        names = [key for key in stats.entries if key[0] != OTHER_NAME]
+        for name, method in names[self.max_entries:]:
+            entry = stats.entries.pop((name, method))
+            other = stats.entries.get((OTHER_NAME, method))
+            if other is None:
+                other = stats.entries[(OTHER_NAME, method)] = StatsEntry(stats, OTHER_NAME, method,
+                                                                         use_response_times_cache=True)
+            other.extend(entry)
+            self._previous.pop((name, method), None)
+            if not self.folded:
+                logger.warning(f"More than {self.max_entries} distinct request names, new names are counted as '{OTHER_NAME}'.")
+            self.folded += 1
+
+        errors = [key for key, error in stats.errors.items() if error.error != OTHER_ERROR]
+        for key in errors[self.max_errors:]:
+            error = stats.errors.pop(key)
+            name = error.name if (error.name, error.method) in stats.entries else OTHER_NAME
+            other_key = StatsError.create_key(error.method, name, OTHER_ERROR)
+            other = stats.errors.get(other_key)
+            if other is None:
+                other = stats.errors[other_key] = StatsError(error.method, name, OTHER_ERROR)
+            other.occurrences += error.occurrences
+            other.first_seen = min(filter(None, (other.first_seen, error.first_seen)), default=None)
+            other.last_seen = max(filter(None, (other.last_seen, error.last_seen)), default=None)
+
+    def start(self):
+        if self._greenlets:
+            return
+        self._started_at = self._window_start = time.time()
+        self._previous = {}
+        self._greenlets = [gevent.spawn(self._window_loop), gevent.spawn(self._rss_loop)]
+
+    def stop(self):
+        for greenlet in self._greenlets:
+            greenlet.kill(block=False)
+        if self._greenlets:
+            self.flush_window()
+        self._greenlets = []
+
+    def _window_loop(self):
+        while True:
+            gevent.sleep(self.window)
+            self.flush_window()
+
+    def _rss_loop(self):
+        while True:
+            gevent.sleep(self.rss_interval)
+            self.sample_rss()
+            if self.leak is None:
+                self.check_leak()
+
+    def sample_rss(self, now=None):
+        """记录各进程 RSS: master 使用 worker 心跳中的内存占用, 本地模式使用自身"""
+        now = now or time.time()
+        runner = self.environment.runner
+        usage = {"master" if hasattr(runner, "clients") else "local": runner.current_memory_usage}
+        for worker in getattr(runner, "clients", {}).values():
+            usage[worker.id] = worker.memory_usage
+        for node, rss in usage.items():
+            if rss:
+                self.rss.setdefault(node, deque(maxlen=MAX_RSS_SAMPLES)).append((now, rss / 1024 / 1024))
+
+    def check_leak(self):
+        """
+        Returns:
+            发现泄漏时返回描述, 否则 None
+        """
+        for node, samples in self.rss.items():
+            rss_mb = samples[-1][1]
+            if self.max_rss_mb and rss_mb > self.max_rss_mb:
+                return self.fail(node, f"RSS of {node} is {rss_mb:.0f}MB, above the {self.max_rss_mb:.0f}MB limit")
+            steady = [sample for sample in samples if sample[0] >= (self._started_at or 0) + self.warmup]
+            if not steady or steady[-1][0] - steady[0][0] < self.min_span:
+                continue
+            slope = rss_slope(steady)
+            if slope is not None and slope > self.max_slope:
+                return self.fail(node, f"RSS of {node} grows {slope:.1f}MB/h (limit {self.max_slope:.1f}MB/h), "
+                                       f"now {rss_mb:.0f}MB: the load generator itself is leaking")
+        return None
+
+    def fail(self, node, message):
+        """判定压测机泄漏: 写入窗口文件并以 SOAK_EXIT_CODE 提前结束测试"""
+        logger.error(f"Soak test aborted: {message}")
+        self.leak = {"type": "leak", "time": time.time(), "node": node, "message": message}
+        self._append(self.leak)
+        self.environment.process_exit_code = SOAK_EXIT_CODE
+        if self.environment.runner is not None:
+            gevent.spawn(self.environment.runner.quit)
+        return message
+
+    def flush_window(self):
+        """写出当前窗口的增量统计, 并裁剪内存中只增不减的数据"""
+        now = time.time()
+        stats = self.environment.stats
+        duration = max(now - self._window_start, 1e-9)
+        record = {
+            "type": "window",
+            "start": self._window_start,
+            "end": now,
+            "users": self.environment.runner.user_count if self.environment.runner else 0,
+            "total": self._window_entry(stats.total, duration),
+            "entries": [entry for entry in (self._window_entry(e, duration) for e in stats.entries.values()) if entry],
+            "rss_mb": {node: round(samples[-1][1], 1) for node, samples in self.rss.items()},
+            "rss_slope_mb_h": {node: round(slope, 2) for node, slope in self.slopes().items()},
+        }
+        if self.folded:
+            record["folded_requests"] = self.folded
+        self._append(record)
+        self._window_start = now
+        self.prune(stats, now)
+        return record
+
+    def slopes(self):
+        result = {}
+        for node, samples in self.rss.items():
+            slope = rss_slope([sample for sample in samples if sample[0] >= (self._started_at or 0) + self.warmup])
+            if slope is not None:
+                result[node] = slope
+        return result
+
+    def _window_entry(self, entry, duration):
+        key = (entry.name, entry.method)
+        previous = self._previous.get(key)
+        requests, failures, total_time, response_times = (
+            entry.num_requests, entry.num_failures, entry.total_response_time, entry.response_times
+        )
+        self._previous[key] = (requests, failures, total_time, dict(response_times))
+        if previous is not None:
+            requests -= previous[0]
+            failures -= previous[1]
+            total_time -= previous[2]
+            response_times = {rt: count - previous[3].get(rt, 0) for rt, count in response_times.items()
+                              if count != previous[3].get(rt, 0)}
+        if requests <= 0 and failures <= 0:
+            return None
+        result = {
+            "method": entry.method,
+            "name": entry.name,
+            "requests": requests,
+            "failures": failures,
+            "rps": round(requests / duration, 2),
+            "avg_ms": round(total_time / requests, 1) if requests else 0,
+            "max_ms": max(response_times) if response_times else 0,
+        }
+        for percentile in WINDOW_PERCENTILES:
+            result[f"p{int(percentile * 100)}"] = calculate_response_time_percentile(response_times, requests, percentile)
+        return result
+
+    def prune(self, stats, now=None):
+        """裁剪每秒计数与图表历史, 使 master 内存不随运行时长增长"""
+        cutoff = int(now or time.time()) - PER_SECOND_KEEP
+        for entry in [stats.total, *stats.entries.values()]:
+            for per_second in (entry.num_reqs_per_sec, entry.num_fail_per_sec):
+                for second in [second for second in per_second if second < cutoff]:
+                    del per_second[second]
+        if len(stats.history) > self.max_history:
+            del stats.history[:-self.max_history]
+
+    def _append(self, record):
+        if self.path is None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def summarize_soak(path):
+    """
+    读取窗口文件生成摘要 (逐行读取, 与运行时长无关)
+
+    Returns:
+        (summary dict, 文本摘要); 文件不存在时返回 (None, "")
+    """
+    if not path or not os.path.exists(path):
+        return None, ""
+    windows, first, last, leak = 0, None, None, None
+    max_slopes = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("type") == "leak":
+                leak = record
+                continue
+            windows += 1
+            first = first or record
+            last = record
+            for node, slope in record.get("rss_slope_mb_h", {}).items():
+                max_slopes[node] = max(max_slopes.get(node, slope), slope)
+    summary = {"windows": windows, "leak": leak, "rss_slope_mb_h": max_slopes}
+    lines = [f"{windows} windows"]
+    if first and last and first.get("total") and last.get("total"):
+        lines.append(f"RPS {first['total']['rps']} -> {last['total']['rps']}, "
+                     f"P95 {first['total']['p95']}ms -> {last['total']['p95']}ms")
+    if last and last.get("rss_mb"):
+        lines.append("RSS " + ", ".join(f"{node} {mb}MB ({max_slopes.get(node, 0):+.1f}MB/h)"
+                                        for node, mb in last["rss_mb"].items()))
+    if leak:
+        lines.append(f"ABORTED: {leak['message']}")
+    return summary, "\n".join(lines)
@@ -0,0 +1,314 @@
+import os
+import json
+import time
+import base64
+import logging
+import itertools
+import gevent
+from gevent.pool import Pool
+from gevent.event import Event
+from gevent.lock import Semaphore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 10
+DEFAULT_REFRESH_BEFORE = 300
+DEFAULT_TTL = 3600
+CLUSTER_WAIT_TIMEOUT = 30
+
+# master -> worker 分发 token 使用的消息类型
+TOKEN_POOL_MESSAGE = "token_pool"
+
+
+def token_expiry(token, default_ttl=DEFAULT_TTL, now=None):
+    """
+    解析 JWT 的 exp 字段作为过期时间, 非 JWT 或解析失败时使用 default_ttl
+
+    Returns:
+        过期时间 (epoch 秒)
+    """
+    now = time.time() if now is None else now
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        if exp:
+            return float(exp)
+    except Exception:
+        pass
+    return now + default_ttl
+
+
+class _TokenSlot:
+    """一个账号及其当前 token"""
+    __slots__ = ("credential", "token", "expires_at", "lock")
+
+    def __init__(self, credential):
+        self.credential = credential
+        self.token = None
+        self.expires_at = 0.0
+        self.lock = Semaphore()
+
+    @property
+    def key(self):
+        return str(self.credential.get("username"))
+
+
+class TokenPool:
+    """
+    进程级共享 Token 池, 避免每个用户在 spawn 阶段各自登录。
+
+    - 测试开始前按有界并发预登录一批账号 (prewarm)
+    - 用户通过 acquire() 轮询获取 token, 不再直接请求登录接口
+    - 后台协程在 token 过期前 refresh_before 秒重新登录
+    - 请求返回 401 时通过 invalidate() 替换失效 token
+    - 可选: cache_file 持久化 token, 下次运行直接复用未过期的 token
+    - 可选: cluster 模式下由 master 统一登录并通过消息分发给 worker
+
+    Example config (in yaml):
+    auth:
+      username: admin
+      password: "123123"
+      token_pool:
+        enabled: true
+        credentials_file: data/accounts.csv   # 可选, 相对项目目录; 缺省使用上面的单个账号
+        size: 50
+        concurrency: 10
+        refresh_before: 300
+        default_ttl: 3600
+        cache_file: logs/crm_tokens.json
+        cluster: false
+    """
+
+    def __init__(self, login_func, credentials, size=None, concurrency=DEFAULT_CONCURRENCY,
+                 refresh_before=DEFAULT_REFRESH_BEFORE, default_ttl=DEFAULT_TTL, cache_file=None, cluster=False):
+        """
+        Args:
+            login_func: 登录函数, 接收 credential(dict) 返回 token 字符串, 失败时抛出异常或返回 None
+            credentials: 账号列表 (dict 列表)
+            size: 最多使用的账号数, None 表示全部
+            concurrency: 预热登录并发数
+            refresh_before: 过期前多少秒刷新
+            default_ttl: token 无法解析过期时间时的默认有效期 (秒)
+            cache_file: token 持久化文件路径, None 表示不持久化
+            cluster: 是否由 master 统一登录并分发
+        """
+        if size:
+            credentials = credentials[:int(size)]
+        self.login_func = login_func
+        self.slots = [_TokenSlot(c) for c in credentials]
+        self.concurrency = max(1, int(concurrency))
+        self.refresh_before = float(refresh_before)
+        self.default_ttl = float(default_ttl)
+        self.cache_file = cache_file
+        self.cluster = cluster
+        self.environment = None
+        self._cycle = itertools.cycle(self.slots) if self.slots else None
+        self._ready = Event()
+        self._refresher = None
+
+    @classmethod
+    def from_config(cls, login_func, credentials, pool_config):
+        """根据 auth.token_pool 配置创建 Token 池"""
+        return cls(
+            login_func,
+            credentials,
+            size=pool_config.get("size"),
+            concurrency=pool_config.get("concurrency", DEFAULT_CONCURRENCY),
+            refresh_before=pool_config.get("refresh_before", DEFAULT_REFRESH_BEFORE),
+            default_ttl=pool_config.get("default_ttl", DEFAULT_TTL),
+            cache_file=pool_config.get("cache_file"),
+            cluster=pool_config.get("cluster", False),
+        )
+
+    # ---- Locust 集成 ----
+
+    def attach(self, environment):
+        """
+        注册 Locust 事件: test_start 时预热并启动刷新协程, test_stop 时停止。
+        cluster 模式下 master 负责登录, worker 只接收 token。
+        """
+        from locust.runners import MasterRunner, WorkerRunner
+
+        self.environment = environment
+        runner = environment.runner
+        is_master = isinstance(runner, MasterRunner)
+        is_worker = isinstance(runner, WorkerRunner)
+
+        if self.cluster and is_worker:
+            runner.register_message(TOKEN_POOL_MESSAGE, self._on_cluster_message)
+            return
+        if is_master and not self.cluster:
+            # 非集群模式下 master 不运行用户, 无需登录
+            return
+
+        environment.events.test_start.add_listener(self._on_test_start)
+        environment.events.test_stop.add_listener(self._on_test_stop)
+
+    def _on_test_start(self, environment, **kwargs):
+        self.prewarm()
+        self._broadcast()
+        if self._refresher is None:
+            self._refresher = gevent.spawn(self._refresh_loop)
+
+    def _on_test_stop(self, environment, **kwargs):
+        if self._refresher is not None:
+            self._refresher.kill(block=False)
+            self._refresher = None
+        self.save_cache()
+
+    def _broadcast(self):
+        """cluster 模式下将当前 token 分发给所有 worker"""
+        if not (self.cluster and self.environment and self.environment.runner):
+            return
+        from locust.runners import MasterRunner
+        if isinstance(self.environment.runner, MasterRunner):
+            self.environment.runner.send_message(TOKEN_POOL_MESSAGE, self.export())
+
+    def _on_cluster_message(self, environment, msg, **kwargs):
+        self.ingest(msg.data)
+
+    # ---- 核心逻辑 ----
+
+    def prewarm(self):
+        """
+        按有界并发为所有账号登录 (已从缓存恢复且未临近过期的跳过)
+
+        Returns:
+            成功获取 token 的账号数
+        """
+        self.load_cache()
+        pending = [s for s in self.slots if self._needs_refresh(s)]
+        if pending:
+            started = time.time()
+            pool = Pool(self.concurrency)
+            pool.map(self._login_slot, pending)
+            logger.info(f"Token pool prewarmed {len(pending)} credentials in {time.time() - started:.2f}s")
+
+        ready = sum(1 for s in self.slots if s.token)
+        if ready:
+            self._ready.set()
+        else:
+            logger.error("Token pool prewarm failed: no credential could log in.")
+        self.save_cache()
+        return ready
+
+    def acquire(self, timeout=CLUSTER_WAIT_TIMEOUT):
+        """
+        轮询获取一个可用 token。
+        cluster worker 会等待 master 分发, 超时后回退为本地登录。
+
+        Returns:
+            token 字符串, 无可用 token 时返回 None
+        """
+        if not self.slots:
+            return None
+        if not self._ready.is_set() and self.cluster:
+            self._ready.wait(timeout)
+
+        for _ in range(len(self.slots)):
+            slot = next(self._cycle)
+            if slot.token is None or self._is_expired(slot):
+                self._login_slot(slot)
+            if slot.token:
+                return slot.token
+        return None
+
+    def invalidate(self, token):
+        """
+        token 失效 (例如接口返回 401) 时调用, 重新登录对应账号
+
+        Returns:
+            替换后的 token; 若该 token 不属于本池则返回下一个可用 token
+        """
+        for slot in self.slots:
+            if slot.token == token:
+                with slot.lock:
+                    # 其他用户已经替换过
+                    if slot.token != token:
+                        return slot.token
+                    slot.token = None
+                    slot.expires_at = 0.0
+                self._login_slot(slot)
+                self._broadcast()
+                if slot.token:
+                    return slot.token
+                break
+        return self.acquire()
+
+    def _needs_refresh(self, slot, now=None):
+        now = time.time() if now is None else now
+        return slot.token is None or slot.expires_at - now <= self.refresh_before
+
+    def _is_expired(self, slot, now=None):
+        return slot.expires_at <= (time.time() if now is None else now)
+
+    def _login_slot(self, slot):
+        """为单个账号登录, 同一账号同一时刻只会有一个登录请求"""
+        with slot.lock:
+            if slot.token and not self._needs_refresh(slot):
+                return
+            try:
+                token = self.login_func(slot.credential)
+            except Exception as e:
+                logger.warning(f"Token pool login failed for {slot.key}: {e}")
+                return
+            if token:
+                slot.token = token
+                slot.expires_at = token_expiry(token, self.default_ttl)
+
+    def _refresh_loop(self):
+        """在 token 过期前 refresh_before 秒重新登录"""
+        while True:
+            now = time.time()
+            due = [s for s in self.slots if s.token and self._needs_refresh(s, now)]
+            if due:
+                Pool(self.concurrency).map(self._login_slot, due)
+                self._broadcast()
+                self.save_cache()
+                logger.info(f"Token pool refreshed {len(due)} tokens.")
+            next_due = min(
+                (s.expires_at - self.refresh_before for s in self.slots if s.token),
+                default=now + self.default_ttl,
+            )
+            gevent.sleep(min(max(next_due - time.time(), 5.0), 60.0))
+
+    # ---- 集群分发与持久化 ----
+
+    def export(self):
+        """导出 {username: {token, expires_at}}"""
+        return {s.key: {"token": s.token, "expires_at": s.expires_at} for s in self.slots if s.token}
+
+    def ingest(self, data):
+        """导入 export() 的结果, 跳过已过期的 token"""
+        now = time.time()
+        for slot in self.slots:
+            item = (data or {}).get(slot.key)
+            if item and item.get("token") and item.get("expires_at", 0) > now:
+                slot.token = item["token"]
+                slot.expires_at = float(item["expires_at"])
+        if any(s.token for s in self.slots):
+            self._ready.set()
+
+    def load_cache(self):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self.ingest(json.load(f))
+        except Exception as e:
+            logger.warning(f"Failed to load token cache {self.cache_file}: {e}")
+
+    def save_cache(self):
+        if not self.cache_file:
+            return
+        try:
+            cache_dir = os.path.dirname(self.cache_file)
+            if cache_dir and not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+            tmp_path = f"{self.cache_file}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.export(), f)
+            os.replace(tmp_path, self.cache_file)
+        except Exception as e:
+            logger.warning(f"Failed to save token cache {self.cache_file}: {e}")
@@ -0,0 +1,129 @@
+import time
+import functools
+
+import gevent
+from gevent import GreenletExit
+from locust import TaskSet
+from locust.exception import InterruptTaskSet, RescheduleTask, RescheduleTaskImmediately, StopUser
+
+TRANSACTION_REQUEST_TYPE = "TXN"
+
+# Locust 的流程控制异常不代表事务失败, 不上报
+_CONTROL_FLOW = (GreenletExit, StopUser, InterruptTaskSet, RescheduleTask, RescheduleTaskImmediately)
+
+
+class TransactionFailure(Exception):
+    """事务内有请求失败, 或被显式标记为失败"""
+
+
+class Transaction:
+    """
+    业务事务: 将一段包含多个请求的用户操作归为一个命名事务, 以 request_type=TXN 的统计条目上报
+    墙钟耗时、成功与否与总字节数, 与普通请求一样进入 Web UI、CSV、InfluxDB 与原始样本。
+
+    with 块内经 user.client 发出的请求 (包括 AssetFetcher 在子 greenlet 中的请求) 照常上报,
+    任一失败、块内抛出异常或调用 failure() 时事务记为失败; 重试成功时可调用 success() 覆盖此前的失败。事务可以嵌套。
+    思考时间使用 txn.sleep() 时不计入事务耗时。
+
+    Example:
+        with Transaction(self, "Checkout") as txn:
+            self.client.get("/cart")
+            txn.sleep(2)
+            with self.client.post("/order", json=order, catch_response=True) as response:
+                if "orderId" not in response.text:
+                    txn.failure("order id missing")
+
+        @task
+        @transaction("Browse catalogue")
+        def browse(self):
+            ...
+    """
+
+    def __init__(self, user, name, request_type=TRANSACTION_REQUEST_TYPE):
+        """
+        Args:
+            user: Locust User 或 TaskSet
+            name: 事务名称 (统计中的 name)
+            request_type: 统计中的类型, 默认 TXN
+        """
+        self.user = user.user if isinstance(user, TaskSet) else user
+        self.name = name
+        self.request_type = request_type
+        self.exception = None
+        self.requests = 0
+        self.response_length = 0
+        self._request_event = None
+        self._client = None
+        self._start_time = None
+        self._start = None
+        self._excluded = 0.0
+
+    def fire(self, **kwargs):
+        """替代 client.request_event: 记录事务内请求的结果后转发给原事件"""
+        if kwargs.get("request_type") != TRANSACTION_REQUEST_TYPE:
+            self.requests += 1
+            self.response_length += kwargs.get("response_length") or 0
+        exception = kwargs.get("exception")
+        if exception is not None and self.exception is None:
+            self.exception = TransactionFailure(f"{kwargs.get('request_type')} {kwargs.get('name')}: {exception}")
+        self._request_event.fire(**kwargs)
+
+    def failure(self, exc):
+        """将事务标记为失败 (exc 为异常或描述字符串)"""
+        if not isinstance(exc, Exception):
+            exc = TransactionFailure(exc)
+        self.exception = exc
+
+    def success(self):
+        """将事务标记为成功, 覆盖此前记录的失败 (例如重试成功后, 前几次尝试的失败不计入事务)"""
+        self.exception = None
+
+    def sleep(self, seconds):
+        """思考时间, 不计入事务耗时"""
+        start = time.perf_counter()
+        gevent.sleep(seconds)
+        self._excluded += time.perf_counter() - start
+
+    def __enter__(self):
+        self._client = getattr(self.user, "client", None)
+        if self._client is not None and hasattr(self._client, "request_event"):
+            self._request_event = self._client.request_event
+            self._client.request_event = self
+        else:
+            self._client = None
+            self._request_event = self.user.environment.events.request
+        self._start_time = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        response_time = (time.perf_counter() - self._start - self._excluded) * 1000
+        if self._client is not None:
+            self._client.request_event = self._request_event
+        if exc_type is not None and issubclass(exc_type, _CONTROL_FLOW):
+            return False
+        if exc is not None:
+            self.exception = exc
+        self._request_event.fire(
+            request_type=self.request_type,
+            name=self.name,
+            response_time=response_time,
+            response_length=self.response_length,
+            exception=self.exception,
+            context=self.user.context(),
+            start_time=self._start_time,
+        )
+        return False
+
+
+def transaction(name, request_type=TRANSACTION_REQUEST_TYPE):
+    """
+    装饰器形式: 将 User / TaskSet 的方法 (通常是 task) 整体作为一个事务
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with Transaction(self, name, request_type):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,3 @@
+# Locust 在导入时执行 gevent monkey patch, 必须早于 requests/ssl 的导入,
+# 否则按文件名顺序收集测试时 ssl 会在 patch 之后被二次包装导致递归错误。
+import locust  # noqa: F401
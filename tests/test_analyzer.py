@@ -0,0 +1,88 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from src.common.analyzer import (StatsHistory, HistoryAnalyzer, analyze_history, contiguous_runs,
+                                 fraction_below, format_summary)
+from tests.test_results_store import HISTORY_HEADER
+
+
+def write_history(path):
+    """
+    0-9s 阶梯加压 (10 -> 50 用户), 之后 50 用户稳态 300 秒;
+    稳态中 200-219s 失败突发, 250-259s p95 超过 SLA
+    """
+    total_requests = total_failures = 0
+    with open(path, "w") as f:
+        f.write(HISTORY_HEADER)
+        for t in range(310):
+            users = min(10 * (t // 2 + 1), 50)
+            rps = min(users, 40) * 1.0
+            fps = 20.0 if 200 <= t < 220 else 0.0
+            p95 = 1500 if 250 <= t < 260 else 200 + t * 0.1
+            total_requests += rps
+            total_failures += fps
+            percentiles = [100, 120, 140, 150, 180, p95, p95 + 50, p95 + 100, p95 + 200, p95 + 200, p95 + 200]
+            f.write(f"{1700000000 + t},{users},,Aggregated,{rps},{fps},"
+                    + ",".join(str(p) for p in percentiles)
+                    + f",{int(total_requests)},{int(total_failures)},100,110,5,2000,64\n")
+            f.write(f"{1700000000 + t},{users},GET,/api/customers,1.0,0.0,"
+                    + ",".join("N/A" for _ in percentiles) + ",0,0,0,0,0,0,0\n")
+
+
+class TestAnalyzer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "run_stats_history.csv")
+        write_history(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_load_filters_by_name(self):
+        history = StatsHistory.load(self.path)
+        self.assertEqual(len(history), 310)
+        self.assertEqual(history.percentiles.shape, (310, 11))
+        self.assertTrue(np.isnan(StatsHistory.load(self.path, "/api/customers").percentiles).all())
+
+    def test_analyze(self):
+        analysis = analyze_history(self.path, {"warmup_s": 10, "sla_p95_ms": 1000, "apdex_t_ms": 300})
+        steady = analysis["steady_state"]
+        self.assertEqual((steady["start"], steady["users"]), (1700000018, 50))
+        self.assertAlmostEqual(steady["rps_mean"], 40.0)
+        self.assertAlmostEqual(analysis["trends_ms_per_min"]["p50"], 0.0)
+        self.assertGreater(analysis["trends_ms_per_min"]["p95"], 0)
+
+        breaches = analysis["sla_breaches"]
+        self.assertEqual([(b["start"], b["end"]) for b in breaches][-1], (1700000250, 1700000259))
+        self.assertEqual(analysis["error_bursts"][0]["start"], 1700000200)
+        self.assertEqual(analysis["error_bursts"][0]["duration_s"], 19)
+
+        self.assertEqual(analysis["plateau"]["users"], 40)
+        self.assertTrue(analysis["plateau"]["saturated"])
+        self.assertTrue(0.5 < analysis["apdex"] < 1.0)
+        self.assertIn("Apdex", format_summary(analysis))
+
+    def test_fraction_below(self):
+        p = np.array([[100, 120, 140, 150, 180, 200, 250, 300, 400, 400, 400]], dtype=float)
+        self.assertAlmostEqual(fraction_below(p, 50)[0], 0.25)
+        self.assertAlmostEqual(fraction_below(p, 190)[0], 0.925)
+        self.assertEqual(fraction_below(p, 1000)[0], 1.0)
+        self.assertTrue(np.isnan(fraction_below(np.full((1, 11), np.nan), 100)[0]))
+
+    def test_contiguous_runs(self):
+        self.assertEqual(contiguous_runs(np.array([1, 1, 0, 1, 0, 0, 1], dtype=bool)), [(0, 1), (3, 3), (6, 6)])
+        self.assertEqual(contiguous_runs(np.zeros(0, dtype=bool)), [])
+
+    def test_empty_history(self):
+        self.assertEqual(HistoryAnalyzer(StatsHistory.empty()).analyze(), {"samples": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import sys
+import unittest
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from src.common.assertions import AssertionSpecError, ResponseChecker, compile_path
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, content=b"", headers=None, response_time=10.0):
+        self.status_code = status_code
+        self._content = content
+        self.headers = headers or {}
+        self.request_meta = {"response_time": response_time}
+        self.reads = 0
+
+    @property
+    def content(self):
+        self.reads += 1
+        return self._content
+
+
+BODY = b'{"code": 0, "data": {"token": "abc", "total": 3, "list": [{"id": 7}, {"id": 8}]}}'
+
+
+class TestCompilePath(unittest.TestCase):
+    def test_syntaxes(self):
+        expected = ("data", "list", 0, "id")
+        self.assertEqual(compile_path("$.data.list[0].id"), expected)
+        self.assertEqual(compile_path("data.list.0.id"), expected)
+        self.assertEqual(compile_path("$['data']['list'][0]['id']"), expected)
+        self.assertEqual(compile_path(["data", "list", 0, "id"]), expected)
+        with self.assertRaises(AssertionSpecError):
+            compile_path("$.data[?(@.id)]")
+
+
+class TestResponseChecker(unittest.TestCase):
+    def test_status_only_does_not_read_body(self):
+        response = FakeResponse(200, BODY)
+        self.assertIsNone(ResponseChecker().check(response, {}))
+        self.assertIsNone(ResponseChecker({"status": [200, 201]}).check(response))
+        self.assertEqual(response.reads, 0)
+        self.assertEqual(ResponseChecker().check(FakeResponse(502)), "Unexpected status 502")
+        self.assertIn("expected [201]", ResponseChecker({"status": 201}).check(response))
+
+    def test_assertions(self):
+        checker = ResponseChecker({
+            "status": 200,
+            "max_ms": 50,
+            "contains": '"code": 0',
+            "regex": r'"id": \d+',
+            "headers": {"Content-Type": "json"},
+            "json": {"$.code": 0, "data.list": {"type": "list"}, "$.data.total": {"gt": 0, "lt": 10}},
+        })
+        headers = {"Content-Type": "application/json"}
+        response = FakeResponse(200, BODY, headers)
+        self.assertIsNone(checker.check(response))
+        # 所有规则共享一次读取与解析
+        self.assertEqual(response.reads, 1)
+
+        self.assertIn("exceeds 50ms", checker.check(FakeResponse(200, BODY, headers, response_time=80.0)))
+        self.assertIn("does not contain", checker.check(FakeResponse(200, BODY.replace(b'"code": 0', b'"code": 1'), headers)))
+        self.assertEqual(checker.check(FakeResponse(200, b'{"code": 0, "id": 1', headers)), "Response is not valid JSON")
+        failure = checker.check(FakeResponse(200, BODY.replace(b'"total": 3', b'"total": 30'), headers))
+        self.assertEqual(failure, "JSON $.data.total is 30, expected lt 10")
+        self.assertIn("Header Content-Type", checker.check(FakeResponse(200, BODY)))
+
+    def test_extract(self):
+        checker = ResponseChecker(extract={
+            "token": "$.data.token",
+            "second": "data.list[1].id",
+            "code": lambda data: data["code"],
+            "first_id": {"regex": r'"id": (\d+)'},
+            "trace": {"header": "X-Trace-Id"},
+            "page": {"json": "$.data.page", "default": 1},
+        })
+        variables = {}
+        self.assertIsNone(checker.check(FakeResponse(200, BODY, {"X-Trace-Id": "t-1"}), variables))
+        self.assertEqual(variables, {"token": "abc", "second": 8, "code": 0, "first_id": "7", "trace": "t-1", "page": 1})
+
+        self.assertEqual(ResponseChecker(extract={"x": "$.missing"}).check(FakeResponse(200, BODY), {}),
+                         "Failed to extract 'x'")
+        # 不提取时不解析响应体
+        response = FakeResponse(200, BODY)
+        self.assertIsNone(ResponseChecker(extract={"token": "$.data.token"}).check(response))
+        self.assertEqual(response.reads, 0)
+
+    def test_invalid_spec(self):
+        with self.assertRaises(AssertionSpecError):
+            ResponseChecker({"satus": 200})
+        with self.assertRaises(AssertionSpecError):
+            ResponseChecker(extract={"x": {"cookie": "sid"}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+import unittest
+from unittest.mock import MagicMock
+
+import gevent
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from src.common.asset_fetcher import AssetFetcher
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, content=b"x" * 10):
+        self.status_code = status_code
+        self.content = content
+        self.error = None
+
+
+class FakeClient:
+    """记录每个 origin 的并发峰值"""
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.active = {}
+        self.peak = {}
+
+    def get(self, url, name=None, headers=None):
+        origin = AssetFetcher.origin(url)
+        self.active[origin] = self.active.get(origin, 0) + 1
+        self.peak[origin] = max(self.peak.get(origin, 0), self.active[origin])
+        gevent.sleep(self.delay)
+        self.active[origin] -= 1
+        if url.endswith("missing.js"):
+            return FakeResponse(status_code=404)
+        return FakeResponse()
+
+
+class TestAssetFetcher(unittest.TestCase):
+    def setUp(self):
+        self.user = MagicMock()
+        self.user.client = FakeClient()
+        self.fetcher = AssetFetcher(self.user, max_concurrency=16, per_host_limit=6)
+
+    def test_resolve_relative_assets(self):
+        """资源路径按浏览器规则解析"""
+        page = "https://example.com/admin/me"
+        self.assertEqual(AssetFetcher.resolve(page, "app.js"), "https://example.com/admin/app.js")
+        self.assertEqual(AssetFetcher.resolve(page, "/static/a.css"), "https://example.com/static/a.css")
+        self.assertEqual(AssetFetcher.resolve(page, "//cdn.example.com/x.png"), "https://cdn.example.com/x.png")
+
+    def test_per_host_limit(self):
+        """同一 origin 并发不超过 per_host_limit, 且总耗时远小于串行耗时"""
+        assets = [f"https://a.example.com/{i}.js" for i in range(12)]
+        assets += [f"https://b.example.com/{i}.css" for i in range(4)]
+
+        start = time.perf_counter()
+        failed, total_bytes = self.fetcher.fetch_all(assets)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(failed, 0)
+        self.assertEqual(total_bytes, 160)
+        self.assertEqual(self.user.client.peak["https://a.example.com"], 6)
+        self.assertEqual(self.user.client.peak["https://b.example.com"], 4)
+        self.assertLess(elapsed, 16 * 0.05 / 2)
+
+    def test_failed_assets_counted(self):
+        failed, _ = self.fetcher.fetch_all(["https://a.example.com/ok.js", "https://a.example.com/missing.js"])
+        self.assertEqual(failed, 1)
+
+    def test_report_page_load(self):
+        """页面总耗时作为独立指标上报"""
+        start = time.perf_counter()
+        self.fetcher.report_page_load("Page Load: /admin/me", start, response_length=100)
+        kwargs = self.user.environment.events.request.fire.call_args.kwargs
+        self.assertEqual(kwargs["request_type"], "PAGE")
+        self.assertEqual(kwargs["name"], "Page Load: /admin/me")
+        self.assertEqual(kwargs["response_length"], 100)
+        self.assertIsNone(kwargs["exception"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import io
+import json
+import os
+import sys
+import unittest
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from benchmarks.stub_server import application, ASSET_SIZE
+from benchmarks.run_benchmarks import compare_results
+from benchmarks.micro import bench
+
+
+def call(path, method="GET", body=b""):
+    captured = {}
+
+    def start_response(status, headers):
+        captured["status"], captured["headers"] = status, dict(headers)
+
+    environ = {"PATH_INFO": path, "REQUEST_METHOD": method, "CONTENT_LENGTH": str(len(body)),
+               "wsgi.input": io.BytesIO(body)}
+    body = b"".join(application(environ, start_response))
+    return body, captured
+
+
+def report(**values):
+    better = {"rps": "higher", "ns": "lower"}
+    return {"results": {name: {"value": value, "unit": name.split(".")[0],
+                               "better": better[name.split(".")[0]]} for name, value in values.items()}}
+
+
+class TestStubServer(unittest.TestCase):
+    def test_routes(self):
+        body, response = call("/admin/me")
+        self.assertIn(b'src="/static/app.js"', body)
+        body, response = call("/static/app.js")
+        self.assertEqual(len(body), ASSET_SIZE)
+        body, response = call("/api/crm/v4/user/login", "POST", b'{"username": "admin"}')
+        self.assertEqual(json.loads(body)["data"]["token"], "stub-token-0123456789")
+        body, response = call("/write", "POST", b"locust_requests value=1")
+        self.assertEqual(response["status"], "204 No Content")
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_compare_results(self):
+        baseline = report(**{"rps.WebsiteUser": 1000, "ns.shape_tick": 500, "ns.loader": 100})
+        current = report(**{"rps.WebsiteUser": 850, "ns.shape_tick": 400, "ns.loader": 105, "rps.New": 10})
+        rows, regressions = compare_results(baseline, current, threshold=0.1)
+        verdicts = {row[0]: row[-1] for row in rows}
+        self.assertEqual(verdicts, {"rps.WebsiteUser": "worse", "ns.shape_tick": "better", "ns.loader": "same",
+                                    "rps.New": "new"})
+        self.assertEqual(regressions, ["rps.WebsiteUser"])
+
+    def test_bench_reports_per_call_time(self):
+        result = bench(lambda: None, min_time=0.01, repeat=2)
+        self.assertGreater(result["calls"], 1)
+        self.assertGreater(result["ns_per_call"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
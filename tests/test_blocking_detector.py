@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+import traceback
+import unittest
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+import gevent
+from gevent import monkey
+from locust.event import Events
+
+from src.common.blocking_detector import BlockingDetector, REQUEST_TYPE, ROOT_DIR
+
+
+def blocking_call(seconds):
+    # 绕过 monkey patch 的 time.sleep, 会占住整个事件循环
+    monkey.get_original("time", "sleep")(seconds)
+
+
+class TestBlockingDetector(unittest.TestCase):
+    def test_reports_blocking_call(self):
+        events = Events()
+        fired = []
+        events.request.add_listener(lambda **kwargs: fired.append(kwargs))
+        detector = BlockingDetector(events, threshold_ms=50)
+        detector.start()
+        try:
+            gevent.sleep(0.1)
+            blocking_call(0.3)
+            gevent.sleep(0.1)
+        finally:
+            detector.stop()
+
+        (location, (count, total, longest)), = detector.blocks.items()
+        self.assertIn("test_blocking_detector.py", location)
+        self.assertIn("(blocking_call)", location)
+        self.assertEqual(count, 1)
+        self.assertGreater(longest, 200)
+        self.assertEqual([(e["request_type"], e["name"]) for e in fired], [(REQUEST_TYPE, location)])
+
+    def test_no_report_when_cooperative(self):
+        detector = BlockingDetector(threshold_ms=50)
+        detector.start()
+        try:
+            time.sleep(0.3)
+        finally:
+            detector.stop()
+        self.assertEqual(detector.blocks, {})
+
+    def test_locate_prefers_project_frames(self):
+        stack = [
+            traceback.FrameSummary("/usr/lib/python3/site-packages/locust/user/task.py", 10, "execute_task"),
+            traceback.FrameSummary(os.path.join(ROOT_DIR, "projects", "crm", "scenarios", "pages.py"), 42, "view"),
+            traceback.FrameSummary(os.path.join(ROOT_DIR, "src", "common", "phase_timing.py"), 7, "timed_request"),
+            traceback.FrameSummary("/usr/lib/python3/site-packages/bs4/__init__.py", 99, "feed"),
+        ]
+        self.assertEqual(BlockingDetector.locate(stack), os.path.join("projects", "crm", "scenarios", "pages.py")
+                         + ":42 (view)")
+        self.assertEqual(BlockingDetector.locate(stack[3:]), "/usr/lib/python3/site-packages/bs4/__init__.py:99 (feed)")
+        self.assertEqual(BlockingDetector.locate(None), "unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import os
+import sys
+import unittest
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from tools.curl_to_locust import generate_fast_locust_script
+
+LOGIN_CURL = ("curl 'https://api.example.com/api/login' -H 'content-type: application/json' "
+              "--data-raw '{\"username\": \"admin\", \"password\": \"123123\"}'")
+LIST_CURL = "curl 'https://api.example.com/api/customers?page=1' -H 'accept: application/json'"
+
+
+class TestFastGeneration(unittest.TestCase):
+    def test_precomputed_constants(self):
+        """请求头与请求体生成为模块级常量, 请求体为紧凑 JSON bytes"""
+        script = generate_fast_locust_script([LOGIN_CURL])
+        compile(script, "fast.py", "exec")
+        self.assertIn("class LoginFastUser(FastHttpUser):", script)
+        self.assertIn("BODY_1 = b'{\"username\":\"admin\",\"password\":\"123123\"}'", script)
+        self.assertIn("headers=HEADERS_1, data=BODY_1", script)
+        self.assertNotIn("json=", script)
+
+    def test_identical_endpoints_merged(self):
+        """批量转换时相同 endpoint 合并为带权重的 task"""
+        script = generate_fast_locust_script([LOGIN_CURL, LIST_CURL, LOGIN_CURL], class_name="CrmApiUser")
+        compile(script, "fast.py", "exec")
+        self.assertIn("class CrmApiUser(FastHttpUser):", script)
+        self.assertEqual(script.count("@task("), 2)
+        self.assertIn("@task(2)\n    def post_login(self):", script)
+        self.assertIn("@task(1)\n    def get_customers(self):", script)
+        self.assertIn("'/api/customers?page=1', name='/api/customers'", script)
+
+    def test_transaction_flow(self):
+        """指定事务时不合并, 按输入顺序组成一个事务 task"""
+        script = generate_fast_locust_script([LOGIN_CURL, LIST_CURL, LOGIN_CURL], class_name="CrmApiUser",
+                                             transaction="Login and list")
+        compile(script, "fast.py", "exec")
+        self.assertIn("from src.common.transaction import Transaction", script)
+        self.assertEqual(script.count("@task"), 1)
+        self.assertIn("def login_and_list(self):\n        with Transaction(self, 'Login and list'):", script)
+        self.assertEqual(script.count("self.client.request("), 3)
+        self.assertLess(script.index("# Step 1:"), script.index("# Step 2:"))
+
+
+if __name__ == "__main__":
+    unittest.main()
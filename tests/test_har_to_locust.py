@@ -0,0 +1,99 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from tools.har_to_locust import iter_har_entries, convert_har
+
+
+def make_entry(method, url, started, response_json=None, headers=None, body=None, mime="application/json"):
+    entry = {
+        "startedDateTime": started,
+        "time": 100,
+        "request": {
+            "method": method,
+            "url": url,
+            "headers": [{"name": k, "value": v} for k, v in (headers or {}).items()],
+        },
+        "response": {
+            "status": 200,
+            "content": {"mimeType": mime, "text": json.dumps(response_json) if response_json is not None else ""},
+        },
+    }
+    if body is not None:
+        entry["request"]["postData"] = {"mimeType": "application/json", "text": body}
+    return entry
+
+
+class TestHarToLocust(unittest.TestCase):
+    def setUp(self):
+        token = "eyJhbGciOiJIUzI1NiJ9.payload.signature"
+        entries = [
+            make_entry("POST", "https://api.example.com/api/crm/v4/user/login", "2026-01-01T00:00:00.000Z",
+                       response_json={"data": {"token": token}},
+                       headers={":authority": "api.example.com", "content-type": "application/json"},
+                       body='{"username":"admin","password":"123123"}'),
+            make_entry("GET", "https://api.example.com/static/app.js", "2026-01-01T00:00:00.200Z",
+                       mime="application/javascript"),
+            make_entry("GET", "https://api.example.com/api/customers", "2026-01-01T00:00:02.100Z",
+                       response_json={"data": {"list": [{"customerId": 987654}]}},
+                       headers={"authorization": f"Bearer {token}"}),
+            make_entry("GET", "https://api.example.com/api/customers/987654", "2026-01-01T00:00:02.300Z",
+                       response_json={"data": {}},
+                       headers={"authorization": f"Bearer {token}"}),
+        ]
+        self.tmp = tempfile.TemporaryDirectory()
+        self.har_path = os.path.join(self.tmp.name, "crm_flow.har")
+        with open(self.har_path, "w", encoding="utf-8") as f:
+            json.dump({"log": {"version": "1.2", "pages": [{"title": "entries"}], "entries": entries}}, f, indent=2)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_streaming_parser(self):
+        """小块读取也能完整解析所有 entry"""
+        entries = list(iter_har_entries(self.har_path, chunk_size=17))
+        self.assertEqual(len(entries), 4)
+        self.assertEqual(entries[-1]["request"]["url"], "https://api.example.com/api/customers/987654")
+
+    def test_generated_scenario(self):
+        output = os.path.join(self.tmp.name, "crm_flow.py")
+        script = convert_har(self.har_path, output, assets="skip")
+        compile(script, output, "exec")
+
+        self.assertIn("class CrmFlowUser(FastHttpUser):", script)
+        self.assertIn("host = 'https://api.example.com'", script)
+        self.assertNotIn("app.js", script)
+        self.assertNotIn(":authority", script)
+        # 录制的请求间隔作为思考时间
+        self.assertIn("gevent.sleep(2.00)", script)
+        # token 与 ID 自动关联
+        self.assertIn("CHECK_1 = ResponseChecker(extract={'data_token': ['data', 'token']})", script)
+        self.assertIn("error = CHECK_1.check(response, self.vars)", script)
+        self.assertIn("'Bearer ' + str(self.vars['data_token'])", script)
+        self.assertIn("ResponseChecker(extract={'list_customerid': ['data', 'list', 0, 'customerId']})", script)
+        self.assertIn("'/api/customers/' + str(self.vars['list_customerid'])", script)
+        self.assertIn("name='/api/customers/{list_customerid}'", script)
+        # 静态请求体预先编码
+        self.assertIn("BODY_1 = b'{\"username\":\"admin\",\"password\":\"123123\"}'", script)
+
+    def test_group_assets(self):
+        script = convert_har(self.har_path, None, assets="group")
+        self.assertIn("self.asset_fetcher.fetch_all(['https://api.example.com/static/app.js'])", script)
+        compile(script, "grouped.py", "exec")
+
+    def test_transaction_flow(self):
+        script = convert_har(self.har_path, None, assets="skip", transaction="Customer lookup")
+        compile(script, "txn.py", "exec")
+        self.assertIn("        with Transaction(self, 'Customer lookup') as txn:", script)
+        # 思考时间不计入事务耗时
+        self.assertIn("            txn.sleep(2.00)", script)
+        self.assertIn("            with self.client.request(", script)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from src.common.http_cache import HttpCache
+
+
+class FakeHeaders(dict):
+    """大小写不敏感的响应头"""
+    def __init__(self, **kwargs):
+        super().__init__({k.lower(): v for k, v in kwargs.items()})
+
+    def get(self, key, default=None):
+        return super().get(key.lower(), default)
+
+
+class TestHttpCache(unittest.TestCase):
+    URL = "https://example.com/app.js"
+
+    def test_max_age_fresh_hit(self):
+        """max-age 内直接命中, 过期后无校验信息则重新下载"""
+        cache = HttpCache()
+        cache.store(self.URL, FakeHeaders(**{"Cache-Control": "public, max-age=60"}), now=1000)
+        self.assertEqual(cache.conditional_headers(self.URL, now=1030), (True, {}))
+        self.assertEqual(cache.conditional_headers(self.URL, now=1061), (False, {}))
+        self.assertEqual(cache.hits, 1)
+
+    def test_etag_and_last_modified_revalidation(self):
+        """过期后发送 If-None-Match / If-Modified-Since"""
+        cache = HttpCache()
+        cache.store(self.URL, FakeHeaders(
+            **{"Cache-Control": "no-cache", "ETag": '"v1"', "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT"}
+        ), now=1000)
+        fresh, headers = cache.conditional_headers(self.URL, now=1000)
+        self.assertFalse(fresh)
+        self.assertEqual(headers["If-None-Match"], '"v1"')
+        self.assertEqual(headers["If-Modified-Since"], "Wed, 21 Oct 2015 07:28:00 GMT")
+
+    def test_304_keeps_validators(self):
+        """304 响应未携带 ETag 时保留原有校验信息并刷新有效期"""
+        cache = HttpCache()
+        cache.store(self.URL, FakeHeaders(ETag='"v1"'), now=1000)
+        cache.store(self.URL, FakeHeaders(**{"Cache-Control": "max-age=10"}), now=2000)
+        self.assertEqual(cache.conditional_headers(self.URL, now=2005), (True, {}))
+        self.assertEqual(cache.conditional_headers(self.URL, now=2011)[1], {"If-None-Match": '"v1"'})
+
+    def test_no_store_not_cached(self):
+        cache = HttpCache()
+        cache.store(self.URL, FakeHeaders(**{"Cache-Control": "no-store", "ETag": '"v1"'}))
+        self.assertNotIn(self.URL, cache)
+
+    def test_lru_eviction(self):
+        cache = HttpCache(max_entries=2)
+        headers = FakeHeaders(**{"Cache-Control": "max-age=60"})
+        cache.store("a", headers, now=0)
+        cache.store("b", headers, now=0)
+        cache.conditional_headers("a", now=1)  # a 变为最近使用
+        cache.store("c", headers, now=0)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_cold_cache_cleared_per_page_view(self):
+        headers = FakeHeaders(**{"Cache-Control": "max-age=60"})
+        warm, cold = HttpCache(warm=True), HttpCache(warm=False)
+        for cache in (warm, cold):
+            cache.store(self.URL, headers)
+            cache.begin_page_view()
+        self.assertIn(self.URL, warm)
+        self.assertNotIn(self.URL, cold)
+
+    def test_for_user_ratio(self):
+        self.assertIsNone(HttpCache.for_user({"enabled": False}))
+        self.assertTrue(HttpCache.for_user({"enabled": True, "warm_ratio": 1}).warm)
+        self.assertFalse(HttpCache.for_user({"enabled": True, "warm_ratio": 0}).warm)
+
+    def test_get_skips_request_on_fresh_hit(self):
+        client = MagicMock()
+        client.get.return_value.status_code = 200
+        client.get.return_value.headers = FakeHeaders(**{"Cache-Control": "max-age=60"})
+        cache = HttpCache()
+        self.assertIsNotNone(cache.get(client, self.URL, name="Assets"))
+        self.assertIsNone(cache.get(client, self.URL, name="Assets"))
+        self.assertEqual(client.get.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import sys
+import unittest
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from src.common.influxdb_downsampling import InfluxDBDownsampling, duration_seconds
+
+
+class RecordingClient:
+    """记录 InfluxDBDownsampling 发出的管理操作"""
+
+    def __init__(self, policies=None, continuous_queries=None):
+        self.policies = policies or [{"name": "autogen", "duration": "0s", "default": True}]
+        self.continuous_queries = continuous_queries or []
+        self.calls = []
+
+    def create_database(self, database):
+        self.calls.append(("create_database", database))
+
+    def get_list_retention_policies(self, database):
+        return self.policies
+
+    def create_retention_policy(self, name, duration, replication, database, default=False):
+        self.calls.append(("create_rp", name, duration, default))
+
+    def alter_retention_policy(self, name, database, duration=None):
+        self.calls.append(("alter_rp", name, duration))
+
+    def get_list_continuous_queries(self):
+        return [{"locust": [{"name": name, "query": ""} for name in self.continuous_queries]}]
+
+    def drop_continuous_query(self, name, database):
+        self.calls.append(("drop_cq", name))
+
+    def query(self, query, database=None, method="GET"):
+        self.calls.append(("query", query))
+
+    def write_points(self, points, time_precision=None, retention_policy=None):
+        self.calls.append(("write", retention_policy, points))
+
+
+class TestInfluxDBDownsampling(unittest.TestCase):
+    def test_duration_seconds(self):
+        self.assertEqual(duration_seconds("30d"), 30 * 86400)
+        self.assertEqual(duration_seconds("720h0m0s"), 30 * 86400)
+        self.assertEqual(duration_seconds("1m"), 60)
+        self.assertEqual(duration_seconds("INF"), 0)
+        with self.assertRaises(ValueError):
+            duration_seconds("10 minutes")
+
+    def test_continuous_queries(self):
+        queries = InfluxDBDownsampling(RecordingClient(), "locust").continuous_queries("autogen")
+        self.assertEqual(len(queries), 6)
+        name, query = next((name, query) for name, query in queries.items() if name.startswith("cq_locust_requests_10s_"))
+        self.assertIn('RESAMPLE EVERY 10s FOR 30s', query)
+        self.assertIn('INTO "locust"."rollup_10s"."locust_requests" FROM "locust"."autogen"."locust_requests"', query)
+        self.assertIn('percentile("response_time", 95) AS "response_time_p95"', query)
+        self.assertTrue(query.endswith("GROUP BY time(10s), * END"))
+        all_query = next(query for name, query in queries.items() if name.startswith("cq_locust_requests_all_1m_"))
+        self.assertTrue(all_query.endswith("GROUP BY time(1m) END"))
+
+    def test_resolutions_follow_interval_order(self):
+        downsampling = InfluxDBDownsampling(RecordingClient(), "locust", {"rollups": [
+            {"interval": "1h", "duration": "INF"},
+            {"interval": "10s", "duration": "7d", "max_range": "6h"},
+            {"interval": "1m", "duration": "90d", "max_range": "7d"},
+        ]})
+        raw, (rp1, start1, end1), (rp2, start2, end2), (rp3, start3, _) = downsampling.resolutions("autogen")
+        # 短时间范围查询原始数据
+        self.assertEqual(raw, ("autogen", 0, 3600 * 1000))
+        self.assertEqual((rp1, start1, end1), ("rollup_10s", 3600 * 1000, 6 * 3600 * 1000))
+        self.assertEqual((rp2, start2, end2), ("rollup_1m", end1, 7 * 86400 * 1000))
+        self.assertEqual((rp3, start3), ("rollup_1h", end2))
+
+    def test_apply_is_idempotent(self):
+        wanted = InfluxDBDownsampling(RecordingClient(), "locust").continuous_queries("autogen")
+        client = RecordingClient(
+            policies=[
+                {"name": "autogen", "duration": "0s", "default": True},
+                {"name": "rollup_10s", "duration": "720h0m0s", "default": False},
+                {"name": "rollup_1m", "duration": "168h0m0s", "default": False},
+            ],
+            continuous_queries=list(wanted)[:5] + ["cq_locust_requests_10s_deadbeef", "cq_custom"],
+        )
+        InfluxDBDownsampling(client, "locust", {"raw_duration": "7d"}).apply()
+        calls = client.calls
+
+        self.assertIn(("alter_rp", "autogen", "7d"), calls)
+        self.assertIn(("alter_rp", "rollup_1m", "365d"), calls)
+        self.assertIn(("create_rp", "forever", "INF", False), calls)
+        self.assertNotIn("rollup_10s", [call[1] for call in calls if call[0] in ("create_rp", "alter_rp")])
+        # 只删除本模块管理的过期连续查询, 只创建缺少的
+        self.assertEqual([call for call in calls if call[0] == "drop_cq"], [("drop_cq", "cq_locust_requests_10s_deadbeef")])
+        created = [call[1] for call in calls if call[0] == "query" and call[1].startswith("CREATE CONTINUOUS QUERY")]
+        self.assertEqual(created, [wanted[list(wanted)[5]]])
+
+        write, = [call for call in calls if call[0] == "write"]
+        self.assertEqual(write[1], "forever")
+        self.assertEqual([point["fields"]["rp"] for point in write[2]], ["autogen", "rollup_10s", "rollup_1m"])
+
+    def test_raw_only_fallback(self):
+        client = RecordingClient()
+        InfluxDBDownsampling(client, "locust", {"enabled": False}).apply_raw_only()
+
+        self.assertEqual([call for call in client.calls if call[0] in ("create_rp", "drop_cq")],
+                         [("create_rp", "forever", "INF", False)])
+        write, = [call for call in client.calls if call[0] == "write"]
+        self.assertEqual([(point["fields"]["rp"], point["fields"]["start_ms"]) for point in write[2]], [("autogen", 0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
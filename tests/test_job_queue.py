@@ -0,0 +1,95 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from src.common.job_queue import JobQueue
+from tools.scheduler import MatrixScheduler, expand_matrix
+
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.queue = JobQueue(os.path.join(self.tmp.name, "scheduler.db"))
+
+    def tearDown(self):
+        self.queue.close()
+        self.tmp.cleanup()
+
+    def test_enqueue_skips_duplicate_queued_job(self):
+        first = self.queue.enqueue("crm", "dev", 10, 2, "1m", load_name="smoke")
+        self.assertIsNotNone(first)
+        self.assertIsNone(self.queue.enqueue("crm", "dev", 10, 2, "1m", load_name="smoke"))
+        self.assertIsNotNone(self.queue.enqueue("crm", "dev", 200, 20, "10m", load_name="peak"))
+
+    def test_claim_respects_target_and_core_budget(self):
+        smoke = self.queue.enqueue("crm", "dev", 10, 2, "1m", load_name="smoke")
+        peak = self.queue.enqueue("crm", "dev", 200, 20, "10m", load_name="peak", cores=2)
+        site = self.queue.enqueue("website", "dev", 200, 20, "10m", load_name="peak", cores=2)
+
+        job = self.queue.claim_next(free_cores=4)
+        self.assertEqual(job["id"], smoke)
+        # crm:dev 已被占用, 跳过 peak; website 所需核数超出剩余预算
+        self.assertIsNone(self.queue.claim_next(free_cores=1))
+        self.assertEqual(self.queue.claim_next(free_cores=3)["id"], site)
+
+        self.queue.finish(smoke, 0)
+        self.assertEqual(self.queue.claim_next(free_cores=2)["id"], peak)
+
+    def test_finish_records_latency_and_duration(self):
+        job_id = self.queue.enqueue("crm", "dev", 10, 2, "1m")
+        self.queue.claim_next(free_cores=1)
+        job = self.queue.finish(job_id, 3)
+        self.assertEqual(job["state"], "failed")
+        recent = self.queue.recent(1)[0]
+        self.assertGreaterEqual(recent["queue_latency"], 0)
+        self.assertGreaterEqual(recent["duration"], 0)
+
+    def test_recover_requeues_dead_jobs(self):
+        alive = self.queue.enqueue("crm", "dev", 10, 2, "1m")
+        dead = self.queue.enqueue("website", "dev", 10, 2, "1m")
+        self.queue.set_pid(self.queue.claim_next(2)["id"], 111)
+        self.queue.set_pid(self.queue.claim_next(2)["id"], 222)
+
+        self.assertEqual(self.queue.recover(lambda pid: pid == 111), 1)
+        self.assertEqual(self.queue.get(alive)["state"], "running")
+        self.assertEqual(self.queue.get(dead)["state"], "queued")
+
+    def test_expand_matrix(self):
+        jobs = expand_matrix({
+            "projects": ["crm", "website"],
+            "envs": ["dev", "test"],
+            "loads": [{"name": "smoke", "users": 10}, {"name": "peak", "users": 200, "cores": 2}],
+        })
+        self.assertEqual(len(jobs), 8)
+        self.assertEqual(jobs[1]["load_name"], "peak")
+        self.assertEqual(jobs[1]["cores"], 2)
+
+    def test_scheduler_rejects_jobs_over_cpu_budget(self):
+        scheduler = MatrixScheduler(self.queue, "reports", cpu_budget=2)
+        jobs = expand_matrix({"projects": ["crm"], "envs": ["dev"],
+                              "loads": [{"name": "smoke", "cores": 1}, {"name": "huge", "cores": 4}]})
+        with self.assertLogs("tools.scheduler", level="ERROR") as logs:
+            scheduler.enqueue(jobs, "nightly")
+        self.assertIn("needs 4 cores", logs.output[0])
+        self.assertEqual([job["load_name"] for job in self.queue.recent(10)], ["smoke"])
+
+    def test_job_runs_with_its_own_env(self):
+        self.queue.enqueue("crm", "test", 10, 2, "1m")
+        scheduler = MatrixScheduler(self.queue, "reports", cpu_budget=1)
+        with mock.patch.dict(os.environ, {"LOCUST_ENV": "dev"}), \
+                mock.patch("tools.scheduler.subprocess.Popen") as popen:
+            popen.return_value.pid = 123
+            scheduler.start_jobs()
+
+        cmd, = popen.call_args.args
+        self.assertEqual(cmd[cmd.index("-e") + 1], "test")
+        self.assertEqual(popen.call_args.kwargs["env"]["LOCUST_ENV"], "test")
+
+
+if __name__ == "__main__":
+    unittest.main()
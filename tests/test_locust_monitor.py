@@ -0,0 +1,50 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from src.common.locust_monitor import LocustProgressParser, stream_locust
+
+OUTPUT = [
+    "[2026-01-01 00:00:00,000] host/INFO/locust.runners: Ramping to 20 users at a rate of 5.00 per second",
+    '[2026-01-01 00:00:04,000] host/INFO/locust.runners: All users spawned: {"U": 20} (20 total users)',
+    "GET      /api/customers                       1200     6(0.50%) |     52      10     300     45 |   12.30        0.10",
+    "         Aggregated                           1234     6(0.49%) |     52      10    1300    145 |   12.30        0.10",
+    "         Aggregated                              5      6      6      7      9     10     14     39     49     49     49    269",
+]
+
+
+class TestLocustMonitor(unittest.TestCase):
+    def test_parse_progress(self):
+        parser = LocustProgressParser()
+        updates = [parser.feed(line) for line in OUTPUT]
+        self.assertEqual(updates, [True, True, False, True, False])
+        self.assertEqual(parser.progress["requests"], 1234)
+        self.assertEqual(parser.progress["failures"], 6)
+        self.assertEqual(parser.progress["rps"], 12.30)
+        self.assertEqual(parser.progress["max_rt"], 1300)
+        self.assertEqual((parser.progress["users"], parser.progress["target_users"]), (20, 20))
+
+    def test_stream_to_log_and_status_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log_file = os.path.join(tmp, "locust.log")
+            status_file = os.path.join(tmp, "status.json")
+            script = "import sys; print(sys.argv[1]); sys.exit(2)"
+            returncode, progress, tail = stream_locust(
+                [sys.executable, "-c", script, OUTPUT[3]], None, log_file, status_file, project="crm", env="dev"
+            )
+            self.assertEqual(returncode, 2)
+            self.assertEqual(tail, [OUTPUT[3]])
+            with open(log_file) as f:
+                self.assertIn("Aggregated", f.read())
+            with open(status_file) as f:
+                status = json.load(f)
+            self.assertEqual((status["state"], status["project"], status["requests"]), ("finished", "crm", 1234))
+
+
+if __name__ == "__main__":
+    unittest.main()
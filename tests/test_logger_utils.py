@@ -0,0 +1,87 @@
+import logging
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from src.common.logger_utils import ColoredFormatter, RateLimitFilter, enable_queue_logging
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(self.format(record))
+
+
+def make_record(msg="hello", lineno=10, level=logging.INFO):
+    return logging.LogRecord("test", level, "/app/pages.py", lineno, msg, None, None)
+
+
+class TestColoredFormatter(unittest.TestCase):
+    def test_formatters_are_cached_per_level(self):
+        formatter = ColoredFormatter(use_short_format=True)
+        with patch("logging.Formatter.__init__", side_effect=AssertionError("formatter rebuilt")):
+            info = formatter.format(make_record())
+            error = formatter.format(make_record(level=logging.ERROR))
+        self.assertTrue(info.startswith(ColoredFormatter.GREEN))
+        self.assertTrue(error.startswith(ColoredFormatter.RED))
+        self.assertIn("[INFO] hello", info)
+
+
+class TestRateLimitFilter(unittest.TestCase):
+    def test_limits_per_call_site_and_reports_suppressed(self):
+        rate_filter = RateLimitFilter(rate=2, interval=1.0)
+        with patch("src.common.logger_utils.time.monotonic", return_value=100.0):
+            allowed = [rate_filter.filter(make_record()) for _ in range(5)]
+            # 其他调用点不受影响
+            self.assertTrue(rate_filter.filter(make_record(lineno=20)))
+        self.assertEqual(allowed, [True, True, False, False, False])
+
+        record = make_record()
+        with patch("src.common.logger_utils.time.monotonic", return_value=101.5):
+            self.assertTrue(rate_filter.filter(record))
+        self.assertEqual(record.getMessage(), "hello [suppressed 3 similar messages]")
+
+    def test_warnings_are_never_dropped(self):
+        rate_filter = RateLimitFilter(rate=1)
+        self.assertTrue(rate_filter.filter(make_record()))
+        self.assertFalse(rate_filter.filter(make_record()))
+        self.assertTrue(all(rate_filter.filter(make_record(level=level))
+                            for level in (logging.WARNING, logging.ERROR, logging.ERROR)))
+
+    def test_shared_filter_decides_once_per_record(self):
+        rate_filter = RateLimitFilter(rate=1)
+        record = make_record()
+        self.assertTrue(rate_filter.filter(record))
+        self.assertTrue(rate_filter.filter(record))
+        self.assertFalse(rate_filter.filter(make_record()))
+
+
+class TestQueueLogging(unittest.TestCase):
+    def test_records_are_handled_by_listener(self):
+        logger = logging.getLogger("test_queue_logging")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        handler = ListHandler()
+        handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+        logger.addHandler(handler)
+
+        listener = enable_queue_logging(logger, rate_limit=3)
+        try:
+            self.assertNotIn(handler, logger.handlers)
+            for i in range(10):
+                logger.info("page %d", i)
+        finally:
+            listener.stop()
+            logger.handlers.clear()
+        self.assertEqual(handler.messages, ["INFO page 0", "INFO page 1", "INFO page 2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
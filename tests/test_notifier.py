@@ -1,6 +1,8 @@
 import os
 import unittest
 import sys
+import zipfile
+import tempfile
 from unittest.mock import MagicMock, patch
 
 # Add project root to sys.path
@@ -16,11 +18,13 @@ class TestNotifier(unittest.TestCase):
                 "enabled": True,
                 "dingtalk": {"enabled": True, "webhook": "http://mock"},
                 "wechat": {"enabled": False},
-                "email": {"enabled": False}
+                "email": {"enabled": False},
+                "backoff": 0,
+                "max_attachment_mb": 1
             }
             self.notifier = Notifier()
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_send_dingtalk(self, mock_post):
         """测试钉钉通知发送逻辑"""
         mock_post.return_value.status_code = 200
@@ -55,5 +59,30 @@ class TestNotifier(unittest.TestCase):
             if os.path.exists(zip_path):
                 os.remove(zip_path)
 
+    @patch('requests.Session.post')
+    def test_retry_then_succeed(self, mock_post):
+        """webhook 失败后按配置重试"""
+        ok = MagicMock(status_code=200)
+        mock_post.side_effect = [Exception("timeout"), ok]
+        results = self.notifier._dispatch({"dingtalk": (self.notifier._send_dingtalk, "title", "content")})
+        self.assertEqual(results, {"dingtalk": True})
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual(mock_post.call_args.kwargs["timeout"], self.notifier.timeout)
+
+    def test_zip_respects_size_limit(self):
+        """超过附件上限的 CSV 不会被打包"""
+        with tempfile.TemporaryDirectory() as tmp:
+            report_path = os.path.join(tmp, "run.html")
+            with open(report_path, "w") as f:
+                f.write("report")
+            with open(os.path.join(tmp, "run_stats.csv"), "w") as f:
+                f.write("Type,Name\n")
+            with open(os.path.join(tmp, "run_stats_history.csv"), "wb") as f:
+                f.write(os.urandom(2 * 1024 * 1024))
+
+            zip_path = self.notifier._zip_report(report_path)
+            with zipfile.ZipFile(zip_path) as zf:
+                self.assertEqual(sorted(zf.namelist()), ["run.html", "run_stats.csv"])
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,85 @@
+import os
+import socket
+import sys
+import unittest
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from locust.contrib.fasthttp import FastHttpSession
+from locust.env import Environment
+
+from benchmarks.stub_server import start_stub_server, stop_stub_server
+from src.common.phase_timing import PhaseStats, PhaseTimings, get_timings, instrument
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestPhaseTimings(unittest.TestCase):
+    def test_transfer_is_remainder(self):
+        timings = PhaseTimings()
+        timings.dns, timings.connect, timings.ttfb, timings.new_connections = 1.0, 2.0, 5.0, 1
+        fields = timings.as_fields(10.0)
+        self.assertAlmostEqual(fields["transfer_ms"], 2.0)
+        self.assertEqual((fields["reused"], fields["new_connections"]), (0, 1))
+        # 超时等异常情况下各阶段之和可能大于响应时间, transfer 不为负
+        self.assertEqual(timings.as_fields(5.0)["transfer_ms"], 0.0)
+
+    def test_stats_merge_and_summary(self):
+        stats = PhaseStats()
+        reused = PhaseTimings()
+        reused.ttfb = 4.0
+        fresh = PhaseTimings()
+        fresh.connect, fresh.ttfb, fresh.new_connections = 2.0, 4.0, 1
+        stats.on_request("GET", "/a", 10.0, 0, context={"phases": reused})
+        stats.on_request("GET", "/a", 10.0, 0, context={"phases": fresh})
+        stats.on_request("GET", "/untimed", 10.0, 0, context={})
+
+        master = PhaseStats()
+        data = {}
+        stats.on_report_to_master("worker-1", data)
+        master.on_worker_report("worker-1", data)
+        self.assertEqual(stats.entries, {})
+
+        row, = master.summary()
+        self.assertEqual((row["name"], row["requests"], row["new_connections"]), ("/a", 2, 1))
+        self.assertAlmostEqual(row["reuse_ratio"], 0.5)
+        self.assertAlmostEqual(row["connect_ms"], 1.0)
+        self.assertAlmostEqual(row["transfer_ms"], 5.0)
+
+
+class TestInstrumentedSession(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.port = free_port()
+        cls.stub = start_stub_server(cls.port)
+
+    @classmethod
+    def tearDownClass(cls):
+        stop_stub_server(cls.stub)
+
+    def test_keep_alive_reuse(self):
+        env = Environment()
+        captured = []
+        env.events.request.add_listener(lambda context=None, **kwargs: captured.append(get_timings(context)))
+        session = instrument(FastHttpSession(f"http://127.0.0.1:{self.port}", env.events.request, user=None))
+
+        session.get("/api/ping")
+        with session.get("/api/ping", catch_response=True, context={"tag": "x"}):
+            pass
+
+        first, second = captured
+        self.assertEqual(first.new_connections, 1)
+        self.assertGreater(first.connect, 0)
+        self.assertGreater(first.ttfb, 0)
+        self.assertTrue(second.reused)
+        self.assertEqual(second.connect, 0)
+        self.assertGreater(second.ttfb, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
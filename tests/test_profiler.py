@@ -0,0 +1,47 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from src.common.profiler import SamplingProfiler
+
+
+def busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(100))
+    return total
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    def test_collapse_is_root_first(self):
+        profiler = SamplingProfiler()
+        stack = profiler.collapse(sys._getframe())
+        *callers, leaf = stack.split(";")
+        self.assertTrue(leaf.startswith("test_collapse_is_root_first (test_profiler.py:"))
+        self.assertTrue(callers)
+
+    def test_profiles_busy_main_thread(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            profiler = SamplingProfiler(output_dir=tmp, interval=0.001)
+            path = profiler.start(0.3, tag="test")
+            self.assertIsNone(profiler.start(0.3))
+            deadline = time.perf_counter() + 5
+            while profiler.running and time.perf_counter() < deadline:
+                busy_loop(0.05)
+            self.assertFalse(profiler.running)
+
+            with open(path) as f:
+                samples = {stack: int(count) for stack, count in (line.rsplit(" ", 1) for line in f)}
+        self.assertGreater(sum(samples.values()), 10)
+        busy = sum(count for stack, count in samples.items() if "busy_loop" in stack)
+        self.assertGreater(busy / sum(samples.values()), 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
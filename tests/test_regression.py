@@ -0,0 +1,109 @@
+import os
+import sys
+import random
+import tempfile
+import unittest
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from src.common.results_store import ResultsStore
+from src.common.regression import RegressionChecker, mann_whitney_u, STATUS_REGRESSION, STATUS_NOISE
+from tests.test_results_store import STATS_HEADER, HISTORY_HEADER
+
+LOGIN = ("POST", "/api/crm/v4/user/login")
+
+
+def write_run(prefix, login_p95, history_p95s, failures=0):
+    with open(f"{prefix}_stats.csv", "w") as f:
+        f.write(STATS_HEADER)
+        f.write(f'POST,/api/crm/v4/user/login,1000,{failures},50,60,10,300,64,10.0,0.0,'
+                f'50,55,60,65,80,{login_p95},150,200,290,300,300\n')
+        f.write(f',Aggregated,1000,{failures},50,60,10,300,64,10.0,0.0,50,55,60,65,80,{login_p95},150,200,290,300,300\n')
+    with open(f"{prefix}_stats_history.csv", "w") as f:
+        f.write(HISTORY_HEADER)
+        # 每 10 秒一个采样, 与 history_samples 的抽样间隔一致
+        for i, p95 in enumerate(history_p95s):
+            f.write(f'{1700000000 + i * 10},10,POST,/api/crm/v4/user/login,10.0,0.0,50,55,60,65,80,{p95},'
+                    f'150,200,290,300,300,{i * 10},0,50,60,10,300,64\n')
+
+
+class TestRegressionChecker(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ResultsStore(os.path.join(self.tmp.name, "results.db"))
+        self.rng = random.Random(42)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def ingest(self, index, center, spread=10, failures=0, summary_p95=None, **kwargs):
+        samples = [self.rng.uniform(center - spread, center + spread) for _ in range(30)]
+        prefix = os.path.join(self.tmp.name, f"run{index}")
+        write_run(prefix, summary_p95 or center, samples, failures)
+        return self.store.ingest_run(prefix, "crm", "dev", tag="nightly", started_at=1700000000 + index, **kwargs)
+
+    def login_diff(self, result, metric="p95"):
+        return next(d for d in result.diffs if (d["method"], d["name"]) == LOGIN and d["metric"] == metric)
+
+    def test_no_baseline(self):
+        run_id = self.ingest(0, 100)
+        result = RegressionChecker(self.store).check(run_id)
+        self.assertEqual(result.baseline_run_ids, [])
+        self.assertFalse(result.has_regression)
+
+    def test_rolling_median_detects_regression(self):
+        for i in range(5):
+            self.ingest(i, 100)
+        run_id = self.ingest(5, 150)
+        result = RegressionChecker(self.store, window=3).check(run_id)
+        self.assertEqual(len(result.baseline_run_ids), 3)
+        diff = self.login_diff(result)
+        self.assertEqual(diff["status"], STATUS_REGRESSION)
+        self.assertAlmostEqual(diff["change"], 0.5)
+        self.assertLess(diff["p_value"], 0.05)
+        self.assertIn("REGRESSION", result.format_table())
+
+    def test_noisy_shift_is_not_regression(self):
+        """汇总值超过容忍度, 但分布差异不显著时标记为 noise"""
+        for i in range(3):
+            self.ingest(i, 100, spread=60)
+        run_id = self.ingest(3, 100, spread=60, summary_p95=130)
+        result = RegressionChecker(self.store, baseline=1).check(run_id)
+        self.assertEqual(result.baseline_run_ids, [1])
+        self.assertEqual(self.login_diff(result)["status"], STATUS_NOISE)
+
+    def test_failure_ratio_increase(self):
+        self.ingest(0, 100)
+        run_id = self.ingest(1, 100, failures=50)
+        result = RegressionChecker(self.store).check(run_id)
+        self.assertEqual(self.login_diff(result, "fail_ratio")["status"], STATUS_REGRESSION)
+        self.assertEqual(self.login_diff(result)["status"], "ok")
+
+    def test_rolling_baseline_skips_incomparable_runs(self):
+        load = {"users": 100, "spawn_rate": 10, "run_time": "10m"}
+        clean = self.ingest(0, 100, params=load, exit_code=0)
+        # 存在失败请求时 Locust 退出码为 1, 仍可作为基线
+        with_failures = self.ingest(1, 100, failures=5, params=load, exit_code=1)
+        self.ingest(2, 100, params={**load, "users": 200}, exit_code=0)
+        self.ingest(3, 100, params={**load, "run_time": "1m"}, exit_code=0)
+        self.ingest(4, 100, params={**load, "aborted": "sla"}, exit_code=5)
+        self.ingest(5, 100, params={"sweep": {"users": [10, 20]}}, exit_code=0)
+        self.ingest(6, 100, params={**load, "soak": True}, exit_code=0)
+        # 没有统计数据的运行 (stats CSV 缺失)
+        self.store.ingest_run(os.path.join(self.tmp.name, "missing"), "crm", "dev", params=load, tag="nightly",
+                              started_at=1700000006, exit_code=0)
+        run_id = self.ingest(7, 100, params=load, exit_code=0)
+
+        result = RegressionChecker(self.store).check(run_id)
+        self.assertEqual(result.baseline_run_ids, [with_failures, clean])
+
+    def test_mann_whitney_u(self):
+        self.assertLess(mann_whitney_u(list(range(10)), list(range(20, 30))), 0.001)
+        self.assertGreater(mann_whitney_u(list(range(20, 30)), list(range(10))), 0.99)
+        self.assertEqual(mann_whitney_u([1] * 5, [1] * 5), 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import sys
+import gzip
+import tempfile
+import unittest
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from src.common.replay import ReplayDispatcher, iter_replay_file, normalize_name
+from tools.log_to_replay import convert_logs
+
+NGINX_LINES = [
+    '10.0.0.1 - - [01/Jan/2026:00:00:00 +0000] "GET /api/customers/123 HTTP/1.1" 200 512 "-" "curl"\n',
+    '10.0.0.2 - - [01/Jan/2026:00:00:00 +0000] "POST /api/crm/v4/user/login HTTP/1.1" 200 64 "-" "curl"\n',
+    'garbage line\n',
+    '10.0.0.3 - - [01/Jan/2026:00:00:02 +0000] "GET /static/app.js HTTP/1.1" 200 10 "-" "curl"\n',
+    '10.0.0.4 - - [01/Jan/2026:00:00:03 +0000] "GET /api/customers?page=2 HTTP/1.1" 200 10 "-" "curl"\n',
+]
+
+ALB_LINE = ('https 2026-01-01T00:00:01.500000Z app/my-alb/abc 10.0.0.1:1234 10.0.1.1:80 0.001 0.020 0.000 '
+            '200 200 100 512 "GET https://crm.example.com:443/api/orders/9f8e7d6c5b4a39281706f5e4d3c2b1a0 HTTP/1.1" '
+            '"curl" - -\n')
+
+
+class TestLogToReplay(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.tmp.name, "access.log.gz")
+        with gzip.open(self.log_path, "wt") as f:
+            f.writelines(NGINX_LINES)
+        self.replay_path = os.path.join(self.tmp.name, "replay.tsv.gz")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_convert_nginx_gzip_with_spread(self):
+        """同一秒内的请求均匀分布, 无法解析的行与静态资源被跳过"""
+        written, skipped = convert_logs([self.log_path], self.replay_path, exclude_static=True)
+        self.assertEqual((written, skipped), (3, 2))
+        rows = list(iter_replay_file(self.replay_path))
+        self.assertEqual(rows[0], (0.0, "GET", "/api/customers/123"))
+        self.assertEqual(rows[1], (0.5, "POST", "/api/crm/v4/user/login"))
+        self.assertEqual(rows[2], (3.0, "GET", "/api/customers?page=2"))
+
+    def test_convert_alb(self):
+        alb_path = os.path.join(self.tmp.name, "alb.log")
+        with open(alb_path, "w") as f:
+            f.write(ALB_LINE)
+        convert_logs([alb_path], self.replay_path, log_format="alb")
+        rows = list(iter_replay_file(self.replay_path))
+        self.assertEqual(rows, [(0.0, "GET", "/api/orders/9f8e7d6c5b4a39281706f5e4d3c2b1a0")])
+
+    def test_normalize_name(self):
+        self.assertEqual(normalize_name("/api/customers/123?x=1"), "/api/customers/{id}")
+        self.assertEqual(normalize_name("/api/orders/9f8e7d6c5b4a39281706f5e4d3c2b1a0/items"), "/api/orders/{id}/items")
+        self.assertEqual(normalize_name("/api/v4/user/login"), "/api/v4/user/login")
+
+    def test_dispatcher_splits_across_workers(self):
+        """按行号分配给不同 worker, 并按 speedup 压缩时间"""
+        convert_logs([self.log_path], self.replay_path)
+        targets = []
+        for index in range(2):
+            dispatcher = ReplayDispatcher(self.replay_path, speedup=1000, worker_count=2, worker_index=index)
+            dispatcher._dispatch_file()
+            targets.append([dispatcher.queue.get()[2] for _ in range(dispatcher.dispatched)])
+        self.assertEqual(targets[0], ["/api/customers/123", "/static/app.js"])
+        self.assertEqual(targets[1], ["/api/crm/v4/user/login", "/api/customers?page=2"])
+
+    def test_dispatcher_drops_stale_requests(self):
+        """落后超过 max_lag 的请求被丢弃, 不会突发补发"""
+        convert_logs([self.log_path], self.replay_path)
+        dispatcher = ReplayDispatcher(self.replay_path, speedup=1e6, max_lag=-1)
+        dispatcher._dispatch_file()
+        self.assertEqual(dispatcher.dispatched + dispatcher.dropped, 4)
+        self.assertGreater(dispatcher.dropped, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from src.common.results_store import ResultsStore
+
+STATS_HEADER = ('"Type","Name","Request Count","Failure Count","Median Response Time","Average Response Time",'
+                '"Min Response Time","Max Response Time","Average Content Size","Requests/s","Failures/s",'
+                '"50%","66%","75%","80%","90%","95%","98%","99%","99.9%","99.99%","100%"\n')
+HISTORY_HEADER = ('"Timestamp","User Count","Type","Name","Requests/s","Failures/s","50%","66%","75%","80%","90%",'
+                  '"95%","98%","99%","99.9%","99.99%","100%","Total Request Count","Total Failure Count",'
+                  '"Total Median Response Time","Total Average Response Time","Total Min Response Time",'
+                  '"Total Max Response Time","Total Average Content Size"\n')
+
+
+def write_run(prefix, login_p95):
+    with open(f"{prefix}_stats.csv", "w") as f:
+        f.write(STATS_HEADER)
+        f.write(f'POST,/api/crm/v4/user/login,100,2,50,60,10,300,64,10.0,0.2,'
+                f'50,55,60,65,80,{login_p95},150,200,290,300,300\n')
+        f.write('GET,/api/customers,50,0,30,35,5,90,512,5.0,0.0,30,32,35,40,50,60,70,80,90,90,90\n')
+        f.write(',Aggregated,150,2,45,52,5,300,213,15.0,0.2,45,50,55,60,70,90,140,190,290,300,300\n')
+    with open(f"{prefix}_stats_history.csv", "w") as f:
+        f.write(HISTORY_HEADER)
+        f.write('1700000000,0,,Aggregated,0.000000,0.000000,N/A,N/A,N/A,N/A,N/A,N/A,N/A,N/A,N/A,N/A,N/A,'
+                '0,0,0,0,0,0,0\n')
+        f.write(f'1700000001,10,POST,/api/crm/v4/user/login,10.0,0.2,50,55,60,65,80,{login_p95},150,200,290,300,300,'
+                '10,0,50,60,10,300,64\n')
+        f.write('1700000001,10,,Aggregated,15.0,0.2,45,50,55,60,70,90,140,190,290,300,300,15,0,45,52,5,300,213\n')
+
+
+class TestResultsStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ResultsStore(os.path.join(self.tmp.name, "db", "results.db"))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def ingest(self, index, login_p95, tag="nightly", env="dev"):
+        prefix = os.path.join(self.tmp.name, f"run{index}")
+        write_run(prefix, login_p95)
+        return self.store.ingest_run(prefix, "crm", env, params={"users": 10, "spawn_rate": 2, "run_time": "1m"},
+                                     tag=tag, git_sha=f"sha{index}", started_at=1700000000 + index)
+
+    def test_ingest_run(self):
+        run_id = self.ingest(1, 100)
+        run = self.store.runs(project="crm")[0]
+        self.assertEqual(run["id"], run_id)
+        self.assertEqual((run["requests"], run["failures"], run["users"], run["p95"]), (150, 2, 10, 90.0))
+
+        endpoints = self.store.endpoint_stats(run_id)
+        self.assertEqual([e["name"] for e in endpoints], ["/api/crm/v4/user/login", "/api/customers"])
+        self.assertEqual(endpoints[0]["p95"], 100.0)
+
+        history = self.store.history(run_id)
+        self.assertEqual(len(history), 2)
+        self.assertIsNone(history[0]["p95"])  # N/A
+        self.assertEqual(history[1]["user_count"], 10)
+
+    def test_trend_filters_and_order(self):
+        for i, p95 in enumerate([100, 120, 140, 160]):
+            self.ingest(i, p95)
+        self.ingest(10, 999, tag="manual")
+        self.ingest(11, 999, env="prod")
+
+        points = self.store.trend("/api/crm/v4/user/login", metric="p95", project="crm", env="dev",
+                                  tag="nightly", method="post", last=3)
+        self.assertEqual([p["value"] for p in points], [120.0, 140.0, 160.0])
+        self.assertEqual(points[-1]["git_sha"], "sha3")
+
+        aggregated = self.store.trend("Aggregated", metric="fail_ratio", tag="nightly")
+        self.assertAlmostEqual(aggregated[0]["value"], 2 / 150)
+
+    def test_trend_rejects_unknown_metric(self):
+        with self.assertRaises(ValueError):
+            self.store.trend("Aggregated", metric="p95; DROP TABLE runs")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from src.common.sample_recorder import SampleRecorder, find_sample_files, load_samples, exact_stats, latency_histogram
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class TestSampleRecorder(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.prefix = os.path.join(self.tmp.name, "run")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def record(self, worker, latencies, name="/api/customers", grow_bytes=4096):
+        recorder = SampleRecorder(None, f"{self.prefix}_samples_{worker}.bin", buffer_records=7, grow_bytes=grow_bytes)
+        for i, latency in enumerate(latencies):
+            failed = i % 10 == 0
+            recorder.on_request("GET", name, latency, 100, Exception("boom") if failed else None,
+                                response=FakeResponse(500 if failed else 200), start_time=1700000000.0 + i,
+                                context={})
+        recorder.on_request("POST", "/login", 5.0, 10, None)
+        recorder.close()
+        return recorder
+
+    def test_record_and_merge_workers(self):
+        self.record("a", range(1, 501))
+        self.record("b", range(501, 1001))
+        paths = find_sample_files(self.prefix)
+        self.assertEqual(len(paths), 2)
+        # 文件被截断为实际长度
+        self.assertEqual(os.path.getsize(paths[0]), 501 * 24)
+
+        samples, names = load_samples(paths)
+        self.assertEqual(names, [["GET", "/api/customers"], ["POST", "/login"]])
+        self.assertEqual(len(samples), 1002)
+        self.assertEqual(int(samples["status"][0]), 500)
+        self.assertEqual(int(samples["status"][1]), 200)
+        self.assertEqual(samples["ts"][1], 1700000001.0)
+
+        stats = exact_stats(samples, names, [50, 99, 100])
+        customers = stats[0]
+        self.assertEqual((customers["count"], customers["failures"]), (1000, 100))
+        self.assertAlmostEqual(customers["percentiles"]["50"], 500.5)
+        self.assertAlmostEqual(customers["percentiles"]["99"], 990.01)
+        self.assertEqual(customers["percentiles"]["100"], 1000.0)
+        self.assertEqual(stats[-1]["name"], "Aggregated")
+        self.assertEqual(stats[-1]["count"], 1002)
+
+        counts, edges = latency_histogram(samples, bins=10)
+        self.assertEqual(counts.sum(), 1002)
+        self.assertEqual(len(edges), 11)
+
+    def test_truncated_tail_is_ignored(self):
+        """进程异常退出时, 预分配但未写入的区域被忽略"""
+        recorder = SampleRecorder(None, f"{self.prefix}_samples_c.bin", buffer_records=2, grow_bytes=4096)
+        for i in range(4):
+            recorder.on_request("GET", "/", 1.0, 1, None, start_time=1700000000.0 + i)
+        recorder.flush()
+        self.assertEqual(os.path.getsize(recorder.path), 4096)
+        samples, _ = load_samples([recorder.path])
+        self.assertEqual(len(samples), 4)
+        recorder.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from src.common.analyzer import StatsHistory, PERCENTILES
+from src.common.scalability import (measure_levels, fit_usl, usl_throughput, littles_law, analyze_sweep,
+                                    render_svg, format_summary)
+from src.common.shapes import SweepShape, sweep_levels
+
+LEVELS = [5, 10, 20, 40, 80, 160]
+LAM, SIGMA, KAPPA = 10.0, 0.05, 0.0005
+
+
+def sweep_history(stage_duration=60, spawn_rate=10):
+    """按 USL 生成各档位的 stats history (加压时用户数以 spawn_rate 逐秒增加)"""
+    timestamps, users, rps = [], [], []
+    current, t = 0, 0
+    for level in LEVELS:
+        for _ in range(stage_duration):
+            current = min(current + spawn_rate, level)
+            timestamps.append(1700000000 + t)
+            users.append(current)
+            rps.append(float(usl_throughput(current, LAM, SIGMA, KAPPA)))
+            t += 1
+    n = len(timestamps)
+    users, rps = np.array(users, dtype=float), np.array(rps)
+    # 响应时间随并发增长 (闭环, 思考时间 0.1s): R = N / X - Z
+    p50 = (users / rps - 0.1) * 1000
+    percentiles = np.outer(p50, PERCENTILES / PERCENTILES[0])
+    return StatsHistory(np.array(timestamps, dtype=float), users, rps, np.zeros(n), percentiles,
+                        np.cumsum(rps), np.zeros(n))
+
+
+class TestScalability(unittest.TestCase):
+    def test_measure_levels_skips_ramp_and_warmup(self):
+        levels = measure_levels(sweep_history(), warmup_s=15)
+        self.assertEqual([level["users"] for level in levels], LEVELS)
+        self.assertAlmostEqual(levels[2]["rps"], float(usl_throughput(20, LAM, SIGMA, KAPPA)))
+        self.assertTrue(all(level["samples"] > 0 for level in levels))
+
+    def test_fit_usl_recovers_parameters(self):
+        n = np.array(LEVELS, dtype=float)
+        usl = fit_usl(n, usl_throughput(n, LAM, SIGMA, KAPPA))
+        self.assertAlmostEqual(usl["lambda"], LAM, places=4)
+        self.assertAlmostEqual(usl["sigma"], SIGMA, places=4)
+        self.assertAlmostEqual(usl["kappa"], KAPPA, places=6)
+        self.assertAlmostEqual(usl["optimal_users"], np.sqrt((1 - SIGMA) / KAPPA), places=2)
+        self.assertGreater(usl["r2"], 0.999)
+        self.assertLess(usl["saturation_users"], usl["optimal_users"])
+
+    def test_fit_usl_linear_scaling_has_no_peak(self):
+        usl = fit_usl([1, 2, 4, 8], [10, 20, 40, 80])
+        self.assertAlmostEqual(usl["sigma"], 0.0, places=6)
+        self.assertAlmostEqual(usl["kappa"], 0.0, places=6)
+        self.assertIsNone(usl["optimal_users"])
+
+    def test_fit_usl_needs_three_levels(self):
+        self.assertIsNone(fit_usl([10, 20], [100, 180]))
+
+    def test_littles_law_knee(self):
+        levels = measure_levels(sweep_history(), warmup_s=15)
+        law = littles_law(levels)
+        self.assertAlmostEqual(law["think_time_s"], 0.1, places=6)
+        self.assertGreater(law["knee_users"], LEVELS[0])
+
+    def test_report_outputs(self):
+        result = analyze_sweep(sweep_history(), warmup_s=15)
+        svg = render_svg(result)
+        self.assertTrue(svg.startswith("<svg"))
+        self.assertIn("<polyline", svg)
+        self.assertEqual(svg.count("<circle"), len(LEVELS))
+        self.assertIn("最优并发", format_summary(result))
+        self.assertEqual(format_summary({"levels": []}), "")
+
+
+class TestSweepShape(unittest.TestCase):
+    def test_sweep_levels(self):
+        self.assertEqual(sweep_levels({"levels": [40, 10, 20, 10]}), [10, 20, 40])
+        self.assertEqual(sweep_levels({"start": 5, "stop": 40}), [5, 10, 20, 40])
+        self.assertEqual(sweep_levels({"start": 10, "stop": 30, "step": 10}), [10, 20, 30])
+
+    def test_tick_walks_levels_then_stops(self):
+        shape = SweepShape()
+        shape.levels, shape.stage_duration, shape.spawn_rate = [10, 20], 60.0, 5.0
+        for run_time, expected in [(0, (10, 5.0)), (59, (10, 5.0)), (60, (20, 5.0)), (120, None)]:
+            shape.get_run_time = lambda run_time=run_time: run_time
+            self.assertEqual(shape.tick(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import os
+import socket
+import sys
+import tempfile
+import unittest
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from locust.env import Environment
+
+from benchmarks.stub_server import start_stub_server, stop_stub_server
+from src.common.scenario_engine import compile_scenario, compile_template, ScenarioError
+
+SCENARIO = """
+name: StubFlowUser
+wait_time: {constant: 0}
+headers:
+  Authorization: Bearer ${token}
+data:
+  account: data/accounts.csv
+on_start:
+  - request:
+      method: POST
+      url: /api/crm/v4/user/login
+      json: {username: "${account.username}", appVersion: "1.0"}
+    extract:
+      token: data.token
+tasks:
+  - name: list
+    weight: 2
+    transaction: List flow
+    steps:
+      - request: {url: "/api/items?user=${account.username}", name: /api/items}
+        assert: {status: 200, contains: '"code":0'}
+      - think: 0
+      - request: {url: /api/items, name: /api/items/missing}
+        extract: {missing: data.id}
+      - request: {url: /api/never}
+  - name: page
+    steps:
+      - request: {url: /admin/me}
+        assert: {status: [201]}
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestTemplates(unittest.TestCase):
+    def test_constant_and_variables(self):
+        self.assertEqual(compile_template("/api/items"), "/api/items")
+        render = compile_template("/api/${item.id}?q=${q}")
+        self.assertEqual(render({"item": {"id": 7}, "q": "a b"}), "/api/7?q=a b")
+        self.assertEqual(render({}), "/api/?q=")
+
+    def test_json_body_keeps_types(self):
+        render = compile_template('{"id":"${id}","note":"id=${id} ${text}"}', json_body=True)
+        self.assertEqual(render({"id": 5, "text": 'say "hi"'}), '{"id":5,"note":"id=5 say \\"hi\\""}')
+
+
+class TestScenarioEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.port = free_port()
+        cls.stub = start_stub_server(cls.port)
+
+    @classmethod
+    def tearDownClass(cls):
+        stop_stub_server(cls.stub)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.tmp.name, "data"))
+        with open(os.path.join(self.tmp.name, "data", "accounts.csv"), "w") as f:
+            f.write("username\nalice\n")
+        self.path = os.path.join(self.tmp.name, "flow.yaml")
+        with open(self.path, "w") as f:
+            f.write(SCENARIO)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_compiled_user_runs_flow(self):
+        user_class = compile_scenario(self.path, self.tmp.name)
+        self.assertEqual(user_class.__name__, "StubFlowUser")
+        self.assertFalse(user_class.abstract)
+        list_task, page_task = dict.fromkeys(user_class.tasks)
+        self.assertEqual(user_class.tasks.count(list_task), 2)
+
+        user_class.host = f"http://127.0.0.1:{self.port}"
+        env = Environment(user_classes=[user_class])
+        fired = []
+        env.events.request.add_listener(lambda **kwargs: fired.append(kwargs))
+        user = user_class(env)
+        user.on_start()
+        self.assertEqual(user.vars["token"], "stub-token-0123456789")
+        self.assertEqual(user.vars["account"], {"username": "alice"})
+
+        list_task(user)
+        page_task(user)
+        results = [(e["name"], e["exception"] is None) for e in fired]
+        # 提取失败后流程中止, 后续步骤不再执行; 事务整体失败
+        self.assertEqual(results, [("/api/crm/v4/user/login", True), ("/api/items", True),
+                                   ("/api/items/missing", False), ("List flow", False), ("/admin/me", False)])
+        self.assertIn("Failed to extract 'missing'", str(fired[2]["exception"]))
+        self.assertIn("expected [201]", str(fired[4]["exception"]))
+
+    def test_invalid_scenario(self):
+        with open(self.path, "w") as f:
+            f.write("name: Empty\n")
+        with self.assertRaises(ScenarioError):
+            compile_scenario(self.path)
+
+    def test_example_scenario_compiles(self):
+        example = os.path.join("projects", "crm", "scenarios", "example_flow.yaml")
+        user_class = compile_scenario(example)
+        self.assertTrue(user_class.abstract)
+
+
+if __name__ == "__main__":
+    unittest.main()
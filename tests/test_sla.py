@@ -0,0 +1,125 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from locust.env import Environment
+
+from src.common.transaction import TRANSACTION_REQUEST_TYPE
+from src.common.sla import SLA_EXIT_CODE, SlaGuard, annotate_report, load_breach
+
+
+class TestSlaGuard(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "run_sla.json")
+        self.env = Environment()
+        self.stats = self.env.stats
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def guard(self, **config):
+        guard = SlaGuard(self.env, {"window": 30, "grace": 10, "min_requests": 10, **config}, self.path)
+        guard._started_at = 0
+        return guard
+
+    def log(self, count, response_time, failures=0):
+        for i in range(count):
+            self.stats.log_request("GET", "/a", response_time, 0)
+            if i < failures:
+                self.stats.log_error("GET", "/a", "boom")
+
+    def test_sliding_window(self):
+        guard = self.guard(max_p95_ms=500)
+        self.log(100, 1000)
+        guard.snapshot(now=0)
+        self.log(100, 100)
+        guard.snapshot(now=20)
+        self.log(100, 100, failures=10)
+        guard.snapshot(now=40)
+
+        # 窗口起点为 30 秒前的最后一个快照: 只包含后 200 个请求
+        stats = guard.window_stats()
+        self.assertEqual((stats["span"], stats["requests"], stats["failures"], stats["p95_ms"]), (40, 200, 10, 100))
+        self.assertAlmostEqual(stats["fail_ratio"], 0.05)
+        self.assertAlmostEqual(stats["rps"], 5.0)
+
+        # 更早的快照移出窗口
+        guard.snapshot(now=50)
+        self.assertEqual((guard.window_stats()["span"], guard.window_stats()["requests"]), (30, 100))
+
+    def test_breach_after_sustained_violation(self):
+        guard = self.guard(max_fail_ratio=0.1, breach_for=10)
+        self.log(50, 10)
+        self.assertIsNone(guard.check(now=5))
+        self.log(50, 10, failures=25)
+        # grace 期内不判定
+        self.assertIsNone(guard.check(now=9))
+        self.log(50, 10, failures=25)
+        self.assertIsNone(guard.check(now=15))
+        self.log(50, 10, failures=25)
+        breach = guard.check(now=25)
+
+        self.assertEqual(breach["metric"], "fail_ratio")
+        self.assertIn("failure ratio", breach["message"])
+        self.assertEqual(self.env.process_exit_code, SLA_EXIT_CODE)
+        self.assertEqual(load_breach(self.path)["threshold"], 0.1)
+
+    def test_recovery_resets_debounce(self):
+        guard = self.guard(max_p95_ms=500, breach_for=10)
+        guard.snapshot(now=0)
+        self.log(20, 1000)
+        self.assertIsNone(guard.check(now=12))
+        self.log(500, 10)
+        self.assertIsNone(guard.check(now=20))
+        self.log(20, 1000)
+        self.assertIsNone(guard.check(now=60))
+        self.assertIsNone(self.env.process_exit_code)
+
+    def test_rps_floor_needs_full_window(self):
+        guard = self.guard(min_rps=5)
+        guard.snapshot(now=0)
+        self.log(20, 10)
+        # 窗口未填满时不判定 RPS
+        guard.snapshot(now=15)
+        self.assertEqual(guard.violations(guard.window_stats()), [])
+        guard.snapshot(now=30)
+        (metric, value, limit, _), = guard.violations(guard.window_stats())
+        self.assertEqual((metric, round(value, 2), limit), ("rps", 0.67, 5.0))
+
+    def test_synthetic_entries_are_excluded(self):
+        guard = self.guard(max_fail_ratio=0.1, max_p95_ms=500)
+        unfiltered = self.guard(exclude_types=[])
+        guard.snapshot(now=0)
+        unfiltered.snapshot(now=0)
+        self.log(100, 100, failures=5)
+        # 失败的登录事务: API 请求之外还有 TXN 条目; 阻塞事件也以请求事件上报
+        for _ in range(3):
+            self.stats.log_request(TRANSACTION_REQUEST_TYPE, "Login", 5000, 0)
+            self.stats.log_error(TRANSACTION_REQUEST_TYPE, "Login", "login failed")
+        self.stats.log_request("BLOCKED", "src/x.py:1", 900, 0)
+        guard.snapshot(now=30)
+        unfiltered.snapshot(now=30)
+
+        stats = guard.window_stats()
+        self.assertEqual((stats["requests"], stats["failures"], stats["p95_ms"]), (100, 5, 100))
+        self.assertEqual(guard.violations(stats), [])
+        self.assertEqual((unfiltered.window_stats()["requests"], unfiltered.window_stats()["failures"]), (104, 8))
+
+    def test_annotate_report(self):
+        report = os.path.join(self.tmp.name, "report.html")
+        with open(report, "w", encoding="utf-8") as f:
+            f.write("<html><body class='x'><div id='root'></div></body></html>")
+        self.assertTrue(annotate_report(report, "p95 <3s>"))
+        with open(report, encoding="utf-8") as f:
+            content = f.read()
+        self.assertIn("<body class='x'><div style=", content)
+        self.assertIn("p95 &lt;3s&gt;", content)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+from collections import deque
+from unittest import mock
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from locust.env import Environment
+from locust.stats import setup_distributed_stats_event_listeners
+
+from src.common.soak import OTHER_ERROR, OTHER_NAME, SOAK_EXIT_CODE, SoakMonitor, rss_slope, summarize_soak
+
+
+class TestSoakMonitor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "run_soak.jsonl")
+        self.env = Environment()
+        self.monitor = SoakMonitor(self.env, {"max_entries": 2, "max_errors": 2, "max_history": 3,
+                                              "warmup": 60, "min_span": 600}, self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self):
+        with open(self.path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_rss_slope(self):
+        self.assertAlmostEqual(rss_slope([(0, 100.0), (1800, 110.0), (3600, 120.0)]), 20.0)
+        self.assertIsNone(rss_slope([(0, 100.0), (60, 101.0)]))
+
+    def test_caps_fold_new_names_and_errors(self):
+        stats = self.env.stats
+        self.monitor.install_caps(stats)
+        for i in range(4):
+            stats.log_request("GET", f"/item/{i}", 10, 0)
+            stats.log_error("GET", f"/item/{i}", f"error {i}")
+        stats.log_request("GET", "/item/0", 10, 0)
+
+        self.assertEqual(set(stats.entries), {("/item/0", "GET"), ("/item/1", "GET"), (OTHER_NAME, "GET")})
+        self.assertEqual(stats.entries[(OTHER_NAME, "GET")].num_requests, 2)
+        self.assertEqual(stats.entries[("/item/0", "GET")].num_requests, 2)
+        self.assertEqual(self.monitor.folded, 2)
+        self.assertEqual(len(stats.errors), 3)
+        self.assertIn(OTHER_ERROR, {error.error for error in stats.errors.values()})
+
+    def test_master_folds_worker_reports(self):
+        """master 上 worker 报告不经过 log_request / log_error, 合并后折叠"""
+        master = Environment()
+        master.runner = mock.Mock(clients={})
+        setup_distributed_stats_event_listeners(master.events, master.stats)
+        with mock.patch.dict(os.environ, {"LOCUST_SAMPLES_PREFIX": os.path.join(self.tmp.name, "run")}):
+            monitor = SoakMonitor.attach(master, {"max_entries": 3, "max_errors": 10})
+        worker = Environment()
+        setup_distributed_stats_event_listeners(worker.events, worker.stats)
+
+        for report in range(20):
+            for i in range(5):
+                worker.stats.log_request("GET", f"/item/{report}/{i}", 10, 0)
+                worker.stats.log_error("GET", f"/item/{report}/{i}", f"error {report}/{i}")
+            data = {}
+            worker.events.report_to_master.fire(client_id="worker-1", data=data)
+            worker.stats.clear_all()
+            master.events.worker_report.fire(client_id="worker-1", data=data)
+
+        stats = master.stats
+        self.assertEqual(len(stats.entries), 4)
+        self.assertEqual(stats.entries[(OTHER_NAME, "GET")].num_requests, 97)
+        self.assertEqual(sum(entry.num_requests for entry in stats.entries.values()), 100)
+        self.assertEqual(monitor.folded, 97)
+        self.assertLessEqual(len(stats.errors), 12)
+        self.assertEqual(sum(error.occurrences for error in stats.errors.values()), 100)
+
+    def test_windows_are_incremental_and_memory_is_pruned(self):
+        stats = self.env.stats
+        self.monitor._started_at = self.monitor._window_start = 1000.0
+        for response_time in (10, 20, 30, 400):
+            stats.log_request("GET", "/a", response_time, 0)
+        first = self.monitor.flush_window()
+        stats.log_request("GET", "/a", 50, 0)
+        stats.log_error("GET", "/a", "boom")
+        second = self.monitor.flush_window()
+
+        self.assertEqual((first["total"]["requests"], first["entries"][0]["p99"]), (4, 400))
+        entry, = second["entries"]
+        self.assertEqual((entry["requests"], entry["failures"], entry["avg_ms"], entry["max_ms"]), (1, 1, 50.0, 50))
+        self.assertEqual([record["type"] for record in self.read()], ["window", "window"])
+
+        entry = stats.entries[("/a", "GET")]
+        entry.num_reqs_per_sec[1] = 5
+        stats.history.extend({"time": i} for i in range(10))
+        self.monitor.prune(stats)
+        self.assertNotIn(1, entry.num_reqs_per_sec)
+        self.assertEqual([point["time"] for point in stats.history], [7, 8, 9])
+
+    def test_leak_aborts_after_warmup(self):
+        self.monitor._started_at = 0
+        # 预热期内的增长不计入, 预热后每小时增长 120MB
+        self.monitor.rss["worker-1"] = deque([(0, 50.0), (30, 200.0)] + [(60 + i * 60, 200.0 + i * 2) for i in range(12)])
+        self.monitor.rss["worker-2"] = deque([(60 + i * 60, 200.0) for i in range(12)])
+
+        message = self.monitor.check_leak()
+        self.assertIn("worker-1 grows 120.0MB/h", message)
+        self.assertEqual(self.env.process_exit_code, SOAK_EXIT_CODE)
+
+        summary, text = summarize_soak(self.path)
+        self.assertEqual(summary["leak"]["node"], "worker-1")
+        self.assertIn("ABORTED", text)
+
+    def test_no_verdict_before_min_span(self):
+        self.monitor._started_at = 0
+        self.monitor.rss["local"] = deque([(60 + i * 30, 100.0 + i * 10) for i in range(10)])
+        self.assertIsNone(self.monitor.check_leak())
+        self.assertIsNone(self.env.process_exit_code)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import sys
+import json
+import time
+import base64
+import tempfile
+import unittest
+
+import gevent
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from src.common.token_pool import TokenPool, token_expiry
+
+
+def make_jwt(exp):
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode()).decode().rstrip("=")
+    return f"eyJhbGciOiJIUzI1NiJ9.{payload}.sig"
+
+
+class FakeLogin:
+    """记录登录次数与并发峰值的登录函数"""
+    def __init__(self, ttl=3600):
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self.ttl = ttl
+
+    def __call__(self, credential):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        gevent.sleep(0.01)
+        self.active -= 1
+        return make_jwt(int(time.time()) + self.ttl) + credential["username"] + str(self.calls)
+
+
+class TestTokenPool(unittest.TestCase):
+    def setUp(self):
+        self.credentials = [{"username": f"user{i}", "password": "pw"} for i in range(10)]
+
+    def test_token_expiry_from_jwt(self):
+        self.assertEqual(token_expiry(make_jwt(1770865981)), 1770865981)
+        self.assertAlmostEqual(token_expiry("opaque-token", default_ttl=60, now=100), 160)
+
+    def test_prewarm_bounded_concurrency(self):
+        """预热登录受 size 与 concurrency 限制"""
+        login = FakeLogin()
+        pool = TokenPool(login, self.credentials, size=8, concurrency=3)
+        self.assertEqual(pool.prewarm(), 8)
+        self.assertEqual(login.calls, 8)
+        self.assertLessEqual(login.peak, 3)
+
+    def test_acquire_round_robin_without_relogin(self):
+        login = FakeLogin()
+        pool = TokenPool(login, self.credentials[:2])
+        pool.prewarm()
+        tokens = [pool.acquire() for _ in range(4)]
+        self.assertEqual(tokens[0], tokens[2])
+        self.assertNotEqual(tokens[0], tokens[1])
+        self.assertEqual(login.calls, 2)
+
+    def test_invalidate_replaces_token_once(self):
+        """401 后替换 token, 并发用户重复上报同一 token 只重新登录一次"""
+        login = FakeLogin()
+        pool = TokenPool(login, self.credentials[:1])
+        pool.prewarm()
+        old = pool.acquire()
+        new = pool.invalidate(old)
+        self.assertNotEqual(old, new)
+        self.assertEqual(pool.invalidate(old), new)
+        self.assertEqual(login.calls, 2)
+
+    def test_refresh_before_expiry(self):
+        """临近过期的 token 在预热时重新登录"""
+        login = FakeLogin(ttl=10)
+        pool = TokenPool(login, self.credentials[:1], refresh_before=60)
+        pool.prewarm()
+        pool.prewarm()
+        self.assertEqual(login.calls, 2)
+
+    def test_cache_file_persistence(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_file = os.path.join(tmp, "tokens.json")
+            first = TokenPool(FakeLogin(), self.credentials[:3], cache_file=cache_file)
+            first.prewarm()
+
+            login = FakeLogin()
+            second = TokenPool(login, self.credentials[:3], cache_file=cache_file)
+            second.prewarm()
+            self.assertEqual(login.calls, 0)
+            self.assertEqual(second.export(), first.export())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import sys
+import unittest
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from locust.event import Events
+from locust.exception import RescheduleTask
+
+from src.common.transaction import Transaction, TransactionFailure, transaction, TRANSACTION_REQUEST_TYPE
+
+
+class FakeClient:
+    def __init__(self, request_event):
+        self.request_event = request_event
+
+    def get(self, name, response_length=100, exception=None):
+        self.request_event.fire(request_type="GET", name=name, response_time=5, response_length=response_length,
+                                exception=exception, context={})
+
+
+class FakeUser:
+    def __init__(self):
+        self.environment = type("Env", (), {"events": Events()})()
+        self.client = FakeClient(self.environment.events.request)
+        self.fired = []
+        self.environment.events.request.add_listener(lambda **kwargs: self.fired.append(kwargs))
+
+    def context(self):
+        return {"user": "fake"}
+
+    @transaction("Decorated")
+    def decorated(self):
+        self.client.get("/a")
+
+
+class TestTransaction(unittest.TestCase):
+    def setUp(self):
+        self.user = FakeUser()
+
+    def txn_events(self):
+        return [e for e in self.user.fired if e["request_type"] == TRANSACTION_REQUEST_TYPE]
+
+    def test_success_groups_requests(self):
+        with Transaction(self.user, "Checkout") as txn:
+            self.user.client.get("/cart")
+            self.user.client.get("/order", response_length=50)
+        event, = self.txn_events()
+        self.assertEqual((event["name"], event["exception"], event["response_length"]), ("Checkout", None, 150))
+        self.assertEqual(txn.requests, 2)
+        self.assertEqual(event["context"], {"user": "fake"})
+        # 内部请求照常上报, 事务结束后 client 恢复原事件
+        self.assertEqual([e["name"] for e in self.user.fired], ["/cart", "/order", "Checkout"])
+        self.assertIs(self.user.client.request_event, self.user.environment.events.request)
+
+    def test_failed_request_fails_transaction(self):
+        with Transaction(self.user, "Checkout"):
+            self.user.client.get("/cart", exception=ValueError("boom"))
+            self.user.client.get("/order")
+        event, = self.txn_events()
+        self.assertIsInstance(event["exception"], TransactionFailure)
+        self.assertIn("GET /cart: boom", str(event["exception"]))
+
+    def test_success_after_retry_overrides_earlier_failures(self):
+        with Transaction(self.user, "Login") as txn:
+            for attempt in range(3):
+                failed = attempt == 0
+                self.user.client.get("/login", exception=ValueError("503") if failed else None)
+                if not failed:
+                    txn.success()
+                    break
+        event, = self.txn_events()
+        self.assertIsNone(event["exception"])
+        self.assertEqual(txn.requests, 2)
+        # 失败的尝试本身仍按请求统计
+        self.assertIsInstance(self.user.fired[0]["exception"], ValueError)
+
+    def test_exception_and_explicit_failure(self):
+        with self.assertRaises(KeyError):
+            with Transaction(self.user, "Raises"):
+                raise KeyError("missing")
+        with Transaction(self.user, "Marked") as txn:
+            txn.failure("order id missing")
+        raised, marked = self.txn_events()
+        self.assertIsInstance(raised["exception"], KeyError)
+        self.assertEqual(str(marked["exception"]), "order id missing")
+
+    def test_control_flow_not_reported(self):
+        with self.assertRaises(RescheduleTask):
+            with Transaction(self.user, "Rescheduled"):
+                raise RescheduleTask()
+        self.assertEqual(self.txn_events(), [])
+        self.assertIs(self.user.client.request_event, self.user.environment.events.request)
+
+    def test_nested_and_think_time(self):
+        with Transaction(self.user, "Outer") as outer:
+            outer.sleep(0.05)
+            with Transaction(self.user, "Inner"):
+                self.user.client.get("/a", exception=ValueError("boom"))
+        inner, outer_event = self.txn_events()
+        self.assertEqual((inner["name"], outer_event["name"]), ("Inner", "Outer"))
+        self.assertIsNotNone(outer_event["exception"])
+        self.assertEqual(outer_event["response_length"], 100)
+        self.assertLess(outer_event["response_time"], 40)
+
+    def test_decorator(self):
+        self.user.decorated()
+        event, = self.txn_events()
+        self.assertEqual(event["name"], "Decorated")
+
+
+if __name__ == "__main__":
+    unittest.main()
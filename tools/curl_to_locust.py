@@ -15,6 +15,154 @@ def slugify(value):
     value = re.sub(r'[^\w\s-]', '', value).strip().lower()
     return re.sub(r'[-\s]+', '_', value)
 
+def parse_curl_endpoint(curl_command):
+    """
+    解析 curl 命令为 endpoint 描述, 供 FastHttpUser 生成使用
+
+    Returns:
+        dict(method, host, path, headers, body) 或 None (解析失败)
+    """
+    try:
+        context = uncurl.parse_context(curl_command)
+    except SystemExit:
+        print("Error: uncurl internal argparse failed.")
+        return None
+    except Exception as e:
+        print(f"Error parsing curl command: {e}")
+        return None
+
+    parsed_url = urlparse(context.url)
+    path = parsed_url.path or "/"
+    if parsed_url.query:
+        path += "?" + parsed_url.query
+
+    body = None
+    if context.data:
+        data = context.data
+        try:
+            # JSON 请求体压缩为紧凑格式, 只序列化一次
+            body = json.dumps(json.loads(data), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        except (TypeError, ValueError):
+            body = data.encode("utf-8") if isinstance(data, str) else bytes(data)
+
+    return {
+        "method": (context.method or "get").upper(),
+        "host": f"{parsed_url.scheme}://{parsed_url.netloc}",
+        "path": path,
+        "headers": dict(context.headers),
+        "body": body,
+    }
+
+
+def generate_fast_locust_script(curl_commands, output_file=None, class_name=None, transaction=None):
+    """
+    生成低开销的 FastHttpUser 脚本
+
+    - 请求头与请求体在模块加载时预先计算为常量 (请求体为 bytes), 每次请求不再重复序列化
+    - 批量转换时相同的 endpoint (method + URL + body) 合并为一个带权重的 task
+    - 指定 transaction 时不合并, 所有请求按输入顺序组成一个 task, 整体作为一个命名事务统计
+
+    Args:
+        curl_commands: curl 命令列表
+        output_file: 输出文件路径, None 时打印到控制台
+        class_name: 生成的类名, 默认根据第一个 endpoint 命名
+        transaction: 事务名称
+
+    Returns:
+        生成的脚本源码, 没有可用 endpoint 时返回 None
+    """
+    # 合并相同 endpoint, 保持首次出现的顺序 (事务流程中每个请求都是独立的步骤)
+    merged = {}
+    for i, curl_command in enumerate(curl_commands):
+        endpoint = parse_curl_endpoint(curl_command)
+        if endpoint is None:
+            continue
+        key = i if transaction else (endpoint["method"], endpoint["host"], endpoint["path"], endpoint["body"])
+        if key in merged:
+            merged[key]["weight"] += 1
+        else:
+            endpoint["weight"] = 1
+            merged[key] = endpoint
+
+    endpoints = list(merged.values())
+    if not endpoints:
+        return None
+
+    # 类的 host 使用出现最多的 host, 其余 endpoint 使用绝对 URL
+    host_counts = {}
+    for endpoint in endpoints:
+        host_counts[endpoint["host"]] = host_counts.get(endpoint["host"], 0) + endpoint["weight"]
+    host = max(host_counts, key=host_counts.get)
+
+    if not class_name:
+        endpoint_name = slugify(endpoints[0]["path"].split("?")[0].split('/')[-1] or 'root')
+        class_name = "".join(x.title() for x in endpoint_name.split('_')) + "FastUser"
+
+    constants = []
+    tasks = []
+    steps = []
+    task_names = set()
+    for i, endpoint in enumerate(endpoints, 1):
+        base_path = endpoint["path"].split("?")[0]
+        task_name = f"{endpoint['method'].lower()}_{slugify(base_path.split('/')[-1] or 'root')}"
+        if task_name in task_names:
+            task_name = f"{task_name}_{i}"
+        task_names.add(task_name)
+
+        constants.append(f"HEADERS_{i} = {json.dumps(endpoint['headers'], indent=4, ensure_ascii=False)}")
+        request_args = f'"{endpoint["method"]}", '
+        url = endpoint["path"] if endpoint["host"] == host else endpoint["host"] + endpoint["path"]
+        request_args += f'{url!r}, name={base_path!r}, headers=HEADERS_{i}'
+        if endpoint["body"] is not None:
+            constants.append(f"BODY_{i} = {endpoint['body']!r}")
+            request_args += f", data=BODY_{i}"
+
+        if transaction:
+            steps.append(f"""
+            # Step {i}: {endpoint['host']}{endpoint['path']}
+            with self.client.request({request_args}, catch_response=True) as response:
+                if response.status_code >= 400:
+                    response.failure(f"Request failed with status {{response.status_code}}")""")
+            continue
+
+        tasks.append(f"""
+    @task({endpoint['weight']})
+    def {task_name}(self):
+        # URL: {endpoint['host']}{endpoint['path']}
+        with self.client.request({request_args}, catch_response=True) as response:
+            if response.status_code >= 400:
+                response.failure(f"Request failed with status {{response.status_code}}")
+""")
+
+    imports = "from locust import task, FastHttpUser, constant_pacing"
+    if transaction:
+        imports += "\nfrom src.common.transaction import Transaction"
+        tasks.append(f"""
+    @task
+    def {slugify(transaction) or 'flow'}(self):
+        with Transaction(self, {transaction!r}):{"".join(steps)}
+""")
+
+    script_content = f"""{imports}
+
+# 请求头与请求体在模块加载时计算一次, 每次请求直接复用
+{chr(10).join(constants)}
+
+
+class {class_name}(FastHttpUser):
+    wait_time = constant_pacing(1)
+    host = "{host}"
+{"".join(tasks)}"""
+
+    if output_file:
+        with open(output_file, 'w') as f:
+            f.write(script_content)
+        print(f"Successfully generated locust script: {output_file} ({len(endpoints)} {'steps' if transaction else 'tasks'})")
+    else:
+        print(script_content)
+    return script_content
+
+
 def generate_locust_script(curl_command, output_file=None):
     try:
         # 使用 uncurl 解析 context
@@ -94,13 +242,56 @@ class {class_name}(HttpUser):
     else:
         print(script_content)
 
+def read_curl_input(input_arg, default_curl_dir, default_data_dir):
+    """
+    读取 curl 输入: 文件 (依次在 curl/、data/、src/data/ 中查找) 或原始 curl 字符串
+
+    Returns:
+        清理换行与续行符后的 curl 命令
+    """
+    # 1. Determine input file path
+    input_path = input_arg
+    if not os.path.exists(input_path):
+        # Try searching in default_curl_dir (projects/<project>/data/curl)
+        potential_path_curl = os.path.join(default_curl_dir, input_path)
+        if os.path.exists(potential_path_curl):
+            input_path = potential_path_curl
+        else:
+            # Try searching in default_data_dir (projects/<project>/data)
+            potential_path = os.path.join(default_data_dir, input_path)
+            if os.path.exists(potential_path):
+                input_path = potential_path
+            else:
+                # Try searching in src/data/ (legacy fallback)
+                potential_path_global = os.path.join("src", "data", input_path)
+                if os.path.exists(potential_path_global):
+                    input_path = potential_path_global
+    
+    curl_command = ""
+    if os.path.exists(input_path):
+        print(f"Processing file: {input_path}")
+        with open(input_path, 'r') as f:
+            curl_command = f.read().strip()
+    else:
+        # Assume it's a raw command string
+        print(f"Processing raw curl string...")
+        curl_command = input_arg
+
+    # Clean up newlines and backslashes
+    return curl_command.replace('\\\n', ' ').replace('\n', ' ')
+
 def main():
     parser = argparse.ArgumentParser(description="Convert curl command to Locust script")
     parser.add_argument("inputs", nargs='+', help="Files containing curl command (searches projects/<project>/data/) or curl strings")
     parser.add_argument("-p", "--project", required=True, help="Project name (e.g., crm, website)")
     parser.add_argument("-o", "--output", help="Output directory or file path. If multiple inputs, must be a directory or omitted. (defaults to projects/<project>/scenarios/generated/)")
+    parser.add_argument("--fast", action="store_true", help="Generate a low-overhead FastHttpUser with precomputed headers/bodies; multiple inputs are merged into one weighted-task class")
+    parser.add_argument("-n", "--class-name", help="Class name for --fast output")
+    parser.add_argument("-t", "--transaction", help="With --fast: run all inputs in order as one task, measured as a named transaction")
     
     args = parser.parse_args()
+    if args.transaction and not args.fast:
+        parser.error("--transaction requires --fast")
     
     # Determine default output directory
     project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # Root
@@ -109,38 +300,23 @@ def main():
     # Determine default data search path
     default_data_dir = os.path.join(project_root, "projects", args.project, "data")
     default_curl_dir = os.path.join(default_data_dir, "curl")
+
+    if args.fast:
+        curl_commands = [read_curl_input(i, default_curl_dir, default_data_dir) for i in args.inputs]
+        default_filename = f"{slugify(args.class_name) if args.class_name else 'fast_tasks'}.py"
+        if args.output and not (os.path.isdir(args.output) or args.output.endswith('/')):
+            output_file = args.output
+        else:
+            output_file = os.path.join(args.output or default_output_dir, default_filename)
+        output_dir = os.path.dirname(output_file)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        if generate_fast_locust_script(curl_commands, output_file, args.class_name, args.transaction) is None:
+            print("Error: no valid curl command to convert.")
+        return
     
     for input_arg in args.inputs:
-        # 1. Determine input file path
-        input_path = input_arg
-        if not os.path.exists(input_path):
-            # Try searching in default_curl_dir (projects/<project>/data/curl)
-            potential_path_curl = os.path.join(default_curl_dir, input_path)
-            if os.path.exists(potential_path_curl):
-                input_path = potential_path_curl
-            else:
-                # Try searching in default_data_dir (projects/<project>/data)
-                potential_path = os.path.join(default_data_dir, input_path)
-                if os.path.exists(potential_path):
-                    input_path = potential_path
-                else:
-                    # Try searching in src/data/ (legacy fallback)
-                    potential_path_global = os.path.join("src", "data", input_path)
-                    if os.path.exists(potential_path_global):
-                        input_path = potential_path_global
-        
-        curl_command = ""
-        if os.path.exists(input_path):
-            print(f"Processing file: {input_path}")
-            with open(input_path, 'r') as f:
-                curl_command = f.read().strip()
-        else:
-            # Assume it's a raw command string
-            print(f"Processing raw curl string...")
-            curl_command = input_arg
-
-        # Clean up newlines and backslashes
-        curl_command = curl_command.replace('\\\n', ' ').replace('\n', ' ')
+        curl_command = read_curl_input(input_arg, default_curl_dir, default_data_dir)
         
         # 2. Determine output file path
         output_file = None
@@ -0,0 +1,492 @@
+import argparse
+import sys
+import os
+import re
+import json
+import base64
+from datetime import datetime
+from urllib.parse import urlparse
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.curl_to_locust import slugify
+
+READ_CHUNK_SIZE = 64 * 1024
+ENTRIES_PATTERN = re.compile(r'"entries"\s*:\s*\[')
+
+STATIC_EXTENSIONS = {
+    ".js", ".mjs", ".css", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".ico", ".webp",
+    ".woff", ".woff2", ".ttf", ".eot", ".otf", ".map", ".mp4", ".webm", ".mp3"
+}
+STATIC_MIME_PREFIXES = ("image/", "font/", "audio/", "video/", "text/css", "text/javascript",
+                        "application/javascript", "application/x-javascript", "application/font")
+
+# 由客户端自动生成或与连接相关的请求头, 不写入脚本
+SKIP_HEADERS = {"host", "content-length", "connection", "cookie", "accept-encoding", "if-none-match",
+                "if-modified-since"}
+
+# 自动关联: 响应中长度不小于该值的字符串才作为候选 (过短的值误匹配率高)
+MIN_CORRELATION_LENGTH = 8
+MAX_CORRELATION_CANDIDATES = 5000
+
+
+def iter_har_entries(har_path, chunk_size=READ_CHUNK_SIZE):
+    """
+    流式读取 HAR 文件中的 log.entries, 每次只在内存中保留一个 entry
+
+    Args:
+        har_path: HAR 文件路径
+        chunk_size: 每次读取的字符数
+
+    Yields:
+        entry dict
+    """
+    decoder = json.JSONDecoder()
+    with open(har_path, 'r', encoding='utf-8') as f:
+        buf = ""
+        # 1. 定位 "entries": [
+        while True:
+            chunk = f.read(chunk_size)
+            buf += chunk
+            match = ENTRIES_PATTERN.search(buf)
+            if match:
+                buf = buf[match.end():]
+                break
+            if not chunk:
+                return
+            # 保留尾部, 防止关键字被切断
+            buf = buf[-32:]
+
+        # 2. 逐个解析数组中的对象
+        read_size = chunk_size
+        eof = False
+        while True:
+            buf = buf.lstrip().lstrip(",").lstrip()
+            if buf.startswith("]"):
+                return
+            if buf:
+                try:
+                    entry, end = decoder.raw_decode(buf)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    yield entry
+                    buf = buf[end:]
+                    read_size = chunk_size
+                    continue
+            chunk = f.read(read_size)
+            if not chunk:
+                if eof or not buf:
+                    return
+                eof = True
+                continue
+            buf += chunk
+            # 大 entry 需要多次读取时逐步扩大读取量, 避免反复解析
+            read_size = min(read_size * 2, 16 * 1024 * 1024)
+
+
+def is_static_asset(entry):
+    """根据响应 MIME 类型或 URL 后缀判断是否为静态资源"""
+    mime = (entry.get("response", {}).get("content", {}).get("mimeType") or "").lower()
+    if mime.startswith(STATIC_MIME_PREFIXES):
+        return True
+    path = urlparse(entry["request"]["url"]).path.lower()
+    return os.path.splitext(path)[1] in STATIC_EXTENSIONS
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def _response_text(entry):
+    content = entry.get("response", {}).get("content", {})
+    text = content.get("text")
+    if not text:
+        return None
+    if content.get("encoding") == "base64":
+        try:
+            text = base64.b64decode(text).decode("utf-8")
+        except Exception:
+            return None
+    return text
+
+
+def _iter_json_values(obj, path=()):
+    """遍历 JSON 中可用于关联的值, 产出 (path, value)"""
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            yield from _iter_json_values(value, path + (key,))
+    elif isinstance(obj, list):
+        for i, value in enumerate(obj[:20]):
+            yield from _iter_json_values(value, path + (i,))
+    elif isinstance(obj, str) and len(obj) >= MIN_CORRELATION_LENGTH:
+        yield path, obj
+    elif isinstance(obj, int) and not isinstance(obj, bool) and path and str(path[-1]).lower().endswith("id"):
+        if obj >= 100:
+            yield path, str(obj)
+
+
+class Var:
+    """模板中的变量引用"""
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+
+def templatize(text, known_values):
+    """
+    将文本中出现的已知响应值替换为变量引用
+
+    Args:
+        text: 原始文本
+        known_values: {value: var_name}, 需按长度降序排列
+
+    Returns:
+        parts 列表, 元素为 str 或 Var
+    """
+    parts = [text]
+    for value, var_name in known_values.items():
+        if value not in text:
+            continue
+        new_parts = []
+        for part in parts:
+            if isinstance(part, str) and value in part:
+                chunks = part.split(value)
+                for i, chunk in enumerate(chunks):
+                    if i:
+                        new_parts.append(Var(var_name))
+                    if chunk:
+                        new_parts.append(chunk)
+            else:
+                new_parts.append(part)
+        parts = new_parts
+    return parts
+
+
+def render_template(parts):
+    """将模板渲染为 Python 表达式字符串"""
+    if not parts:
+        return '""'
+    if all(isinstance(p, str) for p in parts):
+        return repr("".join(parts))
+    return " + ".join(f'str(self.vars[{p.name!r}])' if isinstance(p, Var) else repr(p) for p in parts)
+
+
+def template_vars(parts):
+    return {p.name for p in parts if isinstance(p, Var)}
+
+
+class HarConverter:
+    """
+    将 HAR 录制转换为单个 FastHttpUser 多步骤场景
+
+    - 保持请求顺序, 步骤之间按录制时的间隔插入思考时间
+    - 静态资源可跳过 (skip)、分组并发下载 (group) 或原样保留 (keep)
+    - 响应中的 token / ID 等值自动关联到后续请求
+    """
+
+    def __init__(self, assets="skip", min_think=0.1, max_think=10.0, include_hosts=None, transaction=None):
+        """
+        Args:
+            assets: 静态资源处理方式 skip / group / keep
+            min_think: 小于该值 (秒) 的间隔忽略
+            max_think: 思考时间上限 (秒)
+            include_hosts: 仅保留这些 host 的请求, None 表示全部
+            transaction: 事务名称, 指定时整个流程作为一个命名事务统计 (思考时间不计入)
+        """
+        self.assets = assets
+        self.transaction = transaction
+        self.min_think = min_think
+        self.max_think = max_think
+        self.include_hosts = set(include_hosts) if include_hosts else None
+        self.steps = []
+        self.host = None
+        # value -> (var_name, step_index, json_path)
+        self._candidates = {}
+        self._var_names = set()
+        self._last_end = None
+
+    def add_entry(self, entry):
+        """处理一个 HAR entry (按录制顺序调用)"""
+        request = entry["request"]
+        url = request["url"]
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https"):
+            return
+        if self.include_hosts and parsed.netloc not in self.include_hosts:
+            return
+
+        static = is_static_asset(entry)
+        if static and self.assets == "skip":
+            return
+
+        started = _parse_time(entry["startedDateTime"])
+        think = 0.0
+        if self._last_end is not None:
+            think = min(max(started - self._last_end, 0.0), self.max_think)
+        self._last_end = max(self._last_end or 0.0, started + (entry.get("time") or 0) / 1000.0)
+
+        if static and self.assets == "group":
+            previous = self.steps[-1] if self.steps else None
+            if previous and previous["kind"] == "assets" and think < self.min_think:
+                previous["urls"].append(url)
+            else:
+                self.steps.append({"kind": "assets", "urls": [url], "think": think})
+            return
+
+        if self.host is None:
+            self.host = f"{parsed.scheme}://{parsed.netloc}"
+        self._add_request_step(entry, think)
+
+    def _add_request_step(self, entry, think):
+        request = entry["request"]
+        url = request["url"]
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        target = url[len(origin):] if origin == self.host else url
+        target = target or "/"
+
+        known = dict(sorted(
+            ((v, c[0]) for v, c in self._candidates.items()), key=lambda item: len(item[0]), reverse=True
+        ))
+
+        headers = {}
+        for header in request.get("headers", []):
+            name = header["name"]
+            if name.startswith(":") or name.lower() in SKIP_HEADERS:
+                continue
+            headers[name] = header["value"]
+
+        body = (request.get("postData") or {}).get("text")
+
+        step = {
+            "kind": "request",
+            "method": request["method"].upper(),
+            "url": templatize(target, known),
+            "name": self._stat_name(parsed.path, known),
+            "headers": {k: templatize(v, known) for k, v in headers.items()},
+            "body": templatize(body, known) if body else None,
+            "think": think,
+            "extract": {},
+            "status": entry.get("response", {}).get("status"),
+        }
+        index = len(self.steps)
+        self.steps.append(step)
+
+        # 标记被引用的变量, 仅为这些变量生成提取代码
+        used = template_vars(step["url"])
+        for parts in step["headers"].values():
+            used |= template_vars(parts)
+        if step["body"]:
+            used |= template_vars(step["body"])
+        for value, (var_name, source_index, path) in self._candidates.items():
+            if var_name in used:
+                self.steps[source_index]["extract"][var_name] = path
+
+        self._collect_candidates(entry, index, target, body, headers)
+
+    def _stat_name(self, path, known):
+        parts = templatize(path, known)
+        return "".join("{" + p.name + "}" if isinstance(p, Var) else p for p in parts)
+
+    def _collect_candidates(self, entry, index, target, body, headers):
+        """从 JSON 响应中收集可关联的值"""
+        text = _response_text(entry)
+        if not text:
+            return
+        mime = (entry.get("response", {}).get("content", {}).get("mimeType") or "").lower()
+        if "json" not in mime and not text.lstrip().startswith(("{", "[")):
+            return
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return
+
+        request_text = " ".join([target, body or ""] + list(headers.values()))
+        for path, value in _iter_json_values(data):
+            # 回显请求参数的值不是动态值
+            if value in request_text or value in self._candidates:
+                continue
+            self._candidates[value] = (self._var_name(path), index, list(path))
+            if len(self._candidates) > MAX_CORRELATION_CANDIDATES:
+                self._candidates.pop(next(iter(self._candidates)))
+
+    def _var_name(self, path):
+        keys = [str(p) for p in path if not isinstance(p, int)][-2:] or ["value"]
+        base = slugify("_".join(keys)) or "value"
+        if base[0].isdigit():
+            base = f"v_{base}"
+        name, i = base, 2
+        while name in self._var_names:
+            name = f"{base}_{i}"
+            i += 1
+        self._var_names.add(name)
+        return name
+
+    def render(self, class_name):
+        """生成场景脚本源码"""
+        lines = [
+            "from locust import task, FastHttpUser, constant",
+            "import gevent",
+            "from src.common.assertions import ResponseChecker",
+        ]
+        if any(s["kind"] == "assets" for s in self.steps):
+            lines.append("from src.common.asset_fetcher import AssetFetcher")
+        if self.transaction:
+            lines.append("from src.common.transaction import Transaction")
+        lines += [
+            "",
+        ]
+
+        # 静态请求头、请求体与响应检查预先计算为模块级常量
+        for i, step in enumerate(self.steps, 1):
+            if step["kind"] != "request":
+                continue
+            extract = f"extract={step['extract']!r}" if step["extract"] else ""
+            lines.append(f"CHECK_{i} = ResponseChecker({extract})")
+            static_headers = {k: "".join(v) for k, v in step["headers"].items() if not template_vars(v)}
+            lines.append(f"HEADERS_{i} = {json.dumps(static_headers, indent=4, ensure_ascii=False)}")
+            if step["body"] and not template_vars(step["body"]):
+                lines.append(f"BODY_{i} = {''.join(step['body']).encode('utf-8')!r}")
+        lines.append("")
+
+        lines += [
+            "",
+            f"class {class_name}(FastHttpUser):",
+            "    wait_time = constant(1)",
+            f"    host = {self.host!r}",
+            "",
+            "    def on_start(self):",
+            "        self.vars = {}",
+        ]
+        if any(s["kind"] == "assets" for s in self.steps):
+            lines.append("        self.asset_fetcher = AssetFetcher(self)")
+        lines += [
+            "",
+            "    @task",
+            "    def recorded_flow(self):",
+            "        self.vars = {}",
+        ]
+
+        flow = []
+        sleep = "txn.sleep" if self.transaction else "gevent.sleep"
+        for i, step in enumerate(self.steps, 1):
+            if step["think"] >= self.min_think and i > 1:
+                flow.append(f"        {sleep}({step['think']:.2f})  # think time")
+            if step["kind"] == "assets":
+                flow.append(f"        # Step {i}: {len(step['urls'])} static assets")
+                flow.append(f"        self.asset_fetcher.fetch_all({step['urls']!r})")
+                continue
+            flow += self._render_request(i, step)
+        if self.transaction:
+            lines.append(f"        with Transaction(self, {self.transaction!r}) as txn:")
+            flow = ["    " + line for line in flow]
+        return "\n".join(lines + flow) + "\n"
+
+    def _render_request(self, i, step):
+        dynamic_headers = {k: v for k, v in step["headers"].items() if template_vars(v)}
+        if dynamic_headers:
+            items = ", ".join(f"{k!r}: {render_template(v)}" for k, v in dynamic_headers.items())
+            headers_expr = f"{{**HEADERS_{i}, {items}}}"
+        else:
+            headers_expr = f"HEADERS_{i}"
+
+        args = [repr(step["method"]), render_template(step["url"]), f"name={step['name']!r}",
+                f"headers={headers_expr}"]
+        if step["body"]:
+            if template_vars(step["body"]):
+                args.append(f"data=({render_template(step['body'])}).encode('utf-8')")
+            else:
+                args.append(f"data=BODY_{i}")
+        args.append("catch_response=True")
+
+        lines = [
+            f"        # Step {i}: {step['method']} {step['name']}",
+            f"        with self.client.request({', '.join(args)}) as response:",
+            f"            error = CHECK_{i}.check(response, self.vars)",
+            "            if error is not None:",
+            "                response.failure(error)",
+        ]
+        return lines
+
+
+def convert_har(har_path, output_file=None, class_name=None, **options):
+    """
+    转换 HAR 文件并写出脚本
+
+    Returns:
+        生成的脚本源码
+    """
+    converter = HarConverter(**options)
+    for entry in iter_har_entries(har_path):
+        converter.add_entry(entry)
+
+    if not converter.steps or converter.host is None:
+        print("Error: no convertible requests found in HAR file.")
+        return None
+
+    if not class_name:
+        base = slugify(os.path.splitext(os.path.basename(har_path))[0]) or "recorded"
+        class_name = "".join(x.title() for x in base.split("_")) + "User"
+
+    script_content = converter.render(class_name)
+    if output_file:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(script_content)
+        print(f"Successfully generated locust script: {output_file} ({len(converter.steps)} steps)")
+    else:
+        print(script_content)
+    return script_content
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a HAR recording to a multi-step FastHttpUser scenario")
+    parser.add_argument("input", help="HAR file (searches projects/<project>/data/har/)")
+    parser.add_argument("-p", "--project", required=True, help="Project name (e.g., crm, website)")
+    parser.add_argument("-o", "--output", help="Output file path (defaults to projects/<project>/scenarios/generated/<name>.py)")
+    parser.add_argument("-n", "--class-name", help="Generated User class name")
+    parser.add_argument("--assets", choices=["skip", "group", "keep"], default="skip",
+                        help="How to handle static assets: skip them, group them into concurrent fetches, or keep as steps")
+    parser.add_argument("--min-think", type=float, default=0.1, help="Ignore gaps shorter than this (seconds)")
+    parser.add_argument("--max-think", type=float, default=10.0, help="Cap think times at this value (seconds)")
+    parser.add_argument("--include-host", action="append", help="Only keep requests to this host (repeatable)")
+    parser.add_argument("-t", "--transaction", help="Measure the whole recorded flow as a named transaction")
+
+    args = parser.parse_args()
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    input_path = args.input
+    if not os.path.exists(input_path):
+        potential_path = os.path.join(project_root, "projects", args.project, "data", "har", input_path)
+        if os.path.exists(potential_path):
+            input_path = potential_path
+        else:
+            print(f"Error: HAR file not found: {args.input}")
+            sys.exit(1)
+
+    output_file = args.output
+    if not output_file:
+        name = slugify(os.path.splitext(os.path.basename(input_path))[0]) or "recorded"
+        output_file = os.path.join(project_root, "projects", args.project, "scenarios", "generated", f"{name}.py")
+    output_dir = os.path.dirname(output_file)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    print(f"Processing HAR file: {input_path}")
+    convert_har(
+        input_path,
+        output_file,
+        class_name=args.class_name,
+        assets=args.assets,
+        min_think=args.min_think,
+        max_think=args.max_think,
+        include_hosts=args.include_host,
+        transaction=args.transaction,
+    )
+
+
+if __name__ == "__main__":
+    main()
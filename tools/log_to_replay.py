@@ -0,0 +1,179 @@
+import argparse
+import sys
+import os
+import re
+from datetime import datetime
+from urllib.parse import urlparse
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.common.replay import open_text, format_replay_line
+
+# nginx combined: $remote_addr - $remote_user [$time_local] "$request" $status ...
+NGINX_PATTERN = re.compile(r'^\S+ \S+ \S+ \[(?P<time>[^\]]+)\] "(?P<method>[A-Z]+) (?P<target>\S+)[^"]*" (?P<status>\d{3})')
+NGINX_TIME_FORMAT = "%d/%b/%Y:%H:%M:%S %z"
+
+# ALB: type time elb client:port target:port 3 x processing_time elb_status target_status received sent "request" ...
+ALB_PATTERN = re.compile(
+    r'^\S+ (?P<time>\d{4}-\d{2}-\d{2}T\S+) (?:\S+ ){3}(?:\S+ ){3}(?P<status>\S+) \S+ \S+ \S+ '
+    r'"(?P<method>[A-Z]+) (?P<target>\S+)[^"]*"'
+)
+
+STATIC_EXTENSIONS = (".js", ".css", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".ico", ".webp",
+                     ".woff", ".woff2", ".ttf", ".map")
+
+
+class LogParser:
+    """
+    解析 nginx combined 或 ALB 访问日志行
+
+    nginx 时间戳精度为秒, 同一秒内的请求缓存后在该秒内均匀分布 (spread),
+    避免回放时每秒开始时产生突发流量。
+    """
+
+    def __init__(self, log_format="auto"):
+        self.log_format = log_format
+        self._last_time_str = None
+        self._last_time = None
+
+    def parse(self, line):
+        """
+        Returns:
+            (timestamp_seconds, method, target, precise) 或 None (无法解析)
+        """
+        if self.log_format in ("auto", "nginx"):
+            match = NGINX_PATTERN.match(line)
+            if match:
+                return self._nginx_time(match.group("time")), match.group("method"), match.group("target"), False
+        if self.log_format in ("auto", "alb"):
+            match = ALB_PATTERN.match(line)
+            if match:
+                parsed = urlparse(match.group("target"))
+                target = parsed.path or "/"
+                if parsed.query:
+                    target += "?" + parsed.query
+                timestamp = datetime.fromisoformat(match.group("time").replace("Z", "+00:00")).timestamp()
+                return timestamp, match.group("method"), target, True
+        return None
+
+    def _nginx_time(self, time_str):
+        # 同一秒的日志连续出现, 缓存上一次解析结果
+        if time_str != self._last_time_str:
+            self._last_time_str = time_str
+            self._last_time = datetime.strptime(time_str, NGINX_TIME_FORMAT).timestamp()
+        return self._last_time
+
+
+def convert_logs(input_paths, output_path, log_format="auto", include=None, exclude=None, methods=None,
+                 exclude_static=False, spread=True):
+    """
+    流式转换访问日志为回放文件, 内存占用只与单秒请求量相关
+
+    Args:
+        input_paths: 日志文件列表 (支持 .gz), 按顺序读取
+        output_path: 输出路径 (.tsv 或 .tsv.gz)
+        log_format: auto / nginx / alb
+        include: 仅保留匹配该正则的路径
+        exclude: 排除匹配该正则的路径
+        methods: 仅保留这些 HTTP 方法
+        exclude_static: 排除静态资源
+        spread: 秒级时间戳的请求在该秒内均匀分布
+
+    Returns:
+        (written, skipped)
+    """
+    parser = LogParser(log_format)
+    include_re = re.compile(include) if include else None
+    exclude_re = re.compile(exclude) if exclude else None
+    methods = {m.upper() for m in methods} if methods else None
+
+    written = skipped = 0
+    base_time = None
+    pending_second = None
+    pending = []
+
+    with open_text(output_path, "wt") as out:
+        def flush():
+            nonlocal written
+            count = len(pending)
+            for i, (timestamp, method, target) in enumerate(pending):
+                offset = timestamp + (i / count if spread else 0.0) - base_time
+                out.write(format_replay_line(max(offset, 0.0) * 1000, method, target))
+                written += 1
+            pending.clear()
+
+        for input_path in input_paths:
+            with open_text(input_path) as f:
+                for line in f:
+                    parsed = parser.parse(line)
+                    if parsed is None:
+                        skipped += 1
+                        continue
+                    timestamp, method, target, precise = parsed
+                    path = target.split("?", 1)[0]
+                    if (methods and method not in methods) \
+                            or (include_re and not include_re.search(path)) \
+                            or (exclude_re and exclude_re.search(path)) \
+                            or (exclude_static and path.lower().endswith(STATIC_EXTENSIONS)):
+                        skipped += 1
+                        continue
+
+                    if base_time is None:
+                        base_time = timestamp
+                    if precise:
+                        if pending:
+                            flush()
+                        pending.append((timestamp, method, target))
+                        flush()
+                        continue
+                    if timestamp != pending_second and pending:
+                        flush()
+                    pending_second = timestamp
+                    pending.append((timestamp, method, target))
+        if pending:
+            flush()
+
+    return written, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert nginx/ALB access logs to a Locust replay file")
+    parser.add_argument("inputs", nargs='+', help="Access log files (plain or .gz), in chronological order")
+    parser.add_argument("-p", "--project", help="Project name; output defaults to projects/<project>/data/replay/")
+    parser.add_argument("-o", "--output", help="Output replay file (.tsv or .tsv.gz)")
+    parser.add_argument("--format", choices=["auto", "nginx", "alb"], default="auto", help="Access log format")
+    parser.add_argument("--include", help="Only keep request paths matching this regex")
+    parser.add_argument("--exclude", help="Drop request paths matching this regex")
+    parser.add_argument("--methods", help="Comma separated HTTP methods to keep (e.g. GET,POST)")
+    parser.add_argument("--exclude-static", action="store_true", help="Drop static asset requests")
+    parser.add_argument("--no-spread", action="store_true", help="Do not spread second-resolution timestamps within the second")
+
+    args = parser.parse_args()
+
+    output_path = args.output
+    if not output_path:
+        if not args.project:
+            parser.error("either --output or --project is required")
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        name = os.path.basename(args.inputs[0]).split(".")[0] or "replay"
+        output_path = os.path.join(project_root, "projects", args.project, "data", "replay", f"{name}.tsv.gz")
+    output_dir = os.path.dirname(output_path)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    written, skipped = convert_logs(
+        args.inputs,
+        output_path,
+        log_format=args.format,
+        include=args.include,
+        exclude=args.exclude,
+        methods=args.methods.split(",") if args.methods else None,
+        exclude_static=args.exclude_static,
+        spread=not args.no_spread,
+    )
+    print(f"Successfully generated replay file: {output_path} ({written} requests, {skipped} lines skipped)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import sys
+import os
+import csv
+import json
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.common.results_store import format_table
+from src.common.sample_recorder import (find_sample_files, load_samples, exact_stats, latency_histogram,
+                                        DEFAULT_PERCENTILES)
+
+
+def write_stats_csv(path, stats, percentiles):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Type", "Name", "Request Count", "Failure Count", "Min", "Average", "Max"]
+                        + [f"{p}%" for p in percentiles])
+        for s in stats:
+            writer.writerow([s["method"], s["name"], s["count"], s["failures"], f"{s['min']:.2f}", f"{s['avg']:.2f}",
+                             f"{s['max']:.2f}"] + [f"{v:.2f}" for v in s["percentiles"].values()])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge raw sample files and compute exact percentiles")
+    parser.add_argument("inputs", nargs='*', help="Sample files (*.bin); the .names.json sidecar must exist")
+    parser.add_argument("--prefix", help="Run prefix (e.g., reports/crm_dev_20260101_000000) to find all worker files")
+    parser.add_argument("--percentiles", default=",".join(str(p) for p in DEFAULT_PERCENTILES),
+                        help="Comma separated percentiles to compute")
+    parser.add_argument("--bins", type=int, default=50, help="Number of log-scale histogram bins")
+    parser.add_argument("-o", "--output", help="Output prefix for <output>_exact_stats.csv and <output>_histogram.json")
+
+    args = parser.parse_args()
+
+    paths = list(args.inputs)
+    if args.prefix:
+        paths += find_sample_files(args.prefix)
+    if not paths:
+        parser.error("no sample files given (use inputs or --prefix)")
+
+    percentiles = [float(p) for p in args.percentiles.split(",")]
+    samples, names = load_samples(paths)
+    stats = exact_stats(samples, names, percentiles)
+    print(f"Merged {len(samples)} samples from {len(paths)} file(s)")
+    print(format_table(
+        ["method", "name", "count", "failures", "avg(ms)"] + [f"p{p:g}" for p in percentiles],
+        [[s["method"], s["name"], s["count"], s["failures"], s["avg"]] + list(s["percentiles"].values())
+         for s in stats],
+    ))
+
+    output = args.output or args.prefix
+    if output:
+        write_stats_csv(f"{output}_exact_stats.csv", stats, percentiles)
+        histograms = {}
+        for name_id, (method, name) in enumerate(names):
+            counts, edges = latency_histogram(samples, args.bins, name_id)
+            histograms[f"{method} {name}".strip()] = {"edges_ms": edges.tolist(), "counts": counts.tolist()}
+        counts, edges = latency_histogram(samples, args.bins)
+        histograms["Aggregated"] = {"edges_ms": edges.tolist(), "counts": counts.tolist()}
+        with open(f"{output}_histogram.json", "w") as f:
+            json.dump(histograms, f)
+        print(f"Saved {output}_exact_stats.csv and {output}_histogram.json")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import sys
+import os
+import time
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.common.results_store import ResultsStore, DEFAULT_DB_PATH, TREND_METRICS, format_table
+from src.common.regression import RegressionChecker
+
+
+def _time(epoch):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(epoch))
+
+
+def _sha(sha):
+    return sha[:8] if sha else "-"
+
+
+def cmd_runs(store, args):
+    rows = store.runs(project=args.project, env=args.env, tag=args.tag, last=args.last)
+    print(format_table(
+        ["run_id", "started_at", "project", "env", "tag", "git", "users", "requests", "failures", "rps", "p95(ms)"],
+        [[r["id"], _time(r["started_at"]), r["project"], r["env"], r["tag"], _sha(r["git_sha"]), r["users"],
+          r["requests"], r["failures"], r["rps"], r["p95"]] for r in rows],
+    ))
+
+
+def cmd_show(store, args):
+    rows = store.endpoint_stats(args.run_id)
+    if not rows:
+        print(f"No endpoint stats for run {args.run_id}")
+        return
+    print(format_table(
+        ["method", "name", "requests", "failures", "avg(ms)", "p50(ms)", "p95(ms)", "p99(ms)", "rps"],
+        [[r["method"], r["name"], r["requests"], r["failures"], r["avg_rt"], r["p50"], r["p95"], r["p99"], r["rps"]]
+         for r in rows],
+    ))
+
+
+def cmd_trend(store, args):
+    points = store.trend(args.name, metric=args.metric, project=args.project, env=args.env, tag=args.tag,
+                         method=args.method, last=args.last)
+    if not points:
+        print(f"No data for {args.name}")
+        return
+    print(format_table(
+        ["run_id", "started_at", "tag", "git", args.metric],
+        [[p["run_id"], _time(p["started_at"]), p["tag"], _sha(p["git_sha"]), p["value"]] for p in points],
+    ))
+
+
+def cmd_compare(store, args):
+    checker = RegressionChecker(store, baseline=args.baseline, window=args.window)
+    result = checker.check(args.run_id)
+    print(result.summary())
+    if result.diffs:
+        print(result.format_table(only_changed=not args.all))
+    if result.new_endpoints:
+        print("New endpoints: " + ", ".join(f"{m} {n}".strip() for m, n in result.new_endpoints))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the local Locust results database")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Results database path")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_filters(sub):
+        sub.add_argument("-p", "--project", help="Project name")
+        sub.add_argument("-e", "--env", help="Environment")
+        sub.add_argument("--tag", help="Run tag (e.g., nightly, ci, manual)")
+        sub.add_argument("-n", "--last", type=int, default=30, help="Number of most recent runs")
+
+    runs_parser = subparsers.add_parser("runs", help="List recent runs")
+    add_filters(runs_parser)
+
+    show_parser = subparsers.add_parser("show", help="Show per-endpoint stats of a run")
+    show_parser.add_argument("run_id", type=int, help="Run id")
+
+    trend_parser = subparsers.add_parser("trend", help="Show a metric of one endpoint across recent runs")
+    trend_parser.add_argument("name", help="Endpoint name as shown in Locust stats, or 'Aggregated'")
+    trend_parser.add_argument("-m", "--metric", default="p95", choices=sorted(TREND_METRICS),
+                              help="Metric (response times in ms)")
+    trend_parser.add_argument("--method", help="HTTP method, when the same name is used by several methods")
+    add_filters(trend_parser)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare a run against a baseline run or rolling median")
+    compare_parser.add_argument("run_id", type=int, help="Run id")
+    compare_parser.add_argument("--baseline", default="median", help="Baseline run id, or 'median'")
+    compare_parser.add_argument("--window", type=int, default=5, help="Runs used for the rolling median")
+    compare_parser.add_argument("--all", action="store_true", help="Show unchanged metrics as well")
+
+    args = parser.parse_args()
+    if not os.path.exists(args.db):
+        parser.error(f"results database not found: {args.db}")
+
+    with ResultsStore(args.db) as store:
+        {"runs": cmd_runs, "show": cmd_show, "trend": cmd_trend, "compare": cmd_compare}[args.command](store, args)
+
+
+if __name__ == "__main__":
+    main()
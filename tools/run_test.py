@@ -1,14 +1,21 @@
 import argparse
+import json
 import os
 import sys
 import time
-import subprocess
 import logging
 
 # Add project root to sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.common.notifier import Notifier
+from src.common.results_store import ResultsStore, DEFAULT_DB_PATH, get_git_sha
+from src.common.regression import RegressionChecker, REGRESSION_EXIT_CODE
+from src.common.locust_monitor import stream_locust
+from src.common.analyzer import analyze_history, format_summary
+from src.common import scalability
+from src.common.soak import SOAK_EXIT_CODE, summarize_soak
+from src.common.sla import SLA_EXIT_CODE, load_breach, annotate_report
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
@@ -77,9 +84,100 @@ def parse_stats(csv_file):
         
     return stats
 
-def run_test(project, env, users, rate, run_time, output_dir):
+def store_results(csv_prefix, project, env, params, tag, started_at, duration, report_file, exit_code):
+    """
+    Save the run into the local SQLite results store (config: results_store.enabled / results_store.path).
+
+    Returns:
+        run_id, or None when the store is disabled or ingestion failed
+    """
+    store_config = config.get("results_store", {}) or {}
+    if not store_config.get("enabled", True):
+        return None
+    try:
+        with ResultsStore(store_config.get("path", DEFAULT_DB_PATH)) as store:
+            return store.ingest_run(
+                csv_prefix, project, env, params=params, tag=tag, git_sha=get_git_sha(),
+                started_at=started_at, duration=duration, report_path=report_file, exit_code=exit_code,
+            )
+    except Exception as e:
+        logger.error(f"Failed to store results: {e}")
+        return None
+
+def analyze_run(csv_prefix, project_config):
+    """
+    Analyze <csv_prefix>_stats_history.csv and save the result to <csv_prefix>_analysis.json (config: analysis.*).
+
+    Returns:
+        (analysis dict, summary text) or (None, "") when there is no history
+    """
+    history_csv = f"{csv_prefix}_stats_history.csv"
+    if not os.path.exists(history_csv):
+        return None, ""
+    try:
+        analysis = analyze_history(history_csv, project_config.get("analysis"))
+        with open(f"{csv_prefix}_analysis.json", "w") as f:
+            json.dump(analysis, f, indent=2)
+        return analysis, format_summary(analysis)
+    except Exception as e:
+        logger.error(f"Failed to analyze stats history: {e}")
+        return None, ""
+
+def analyze_sweep(csv_prefix, project_config):
+    """
+    Fit the scalability curve of a concurrency sweep (config: sweep.*) and save
+    <csv_prefix>_scalability.json and <csv_prefix>_scalability.svg next to the HTML report.
+
+    Returns:
+        (sweep result dict, summary text) or (None, "") when there is no history
+    """
+    history_csv = f"{csv_prefix}_stats_history.csv"
+    if not os.path.exists(history_csv):
+        return None, ""
+    try:
+        result = scalability.analyze_sweep_history(history_csv, project_config.get("sweep"))
+        with open(f"{csv_prefix}_scalability.json", "w") as f:
+            json.dump(result, f, indent=2)
+        with open(f"{csv_prefix}_scalability.svg", "w") as f:
+            f.write(scalability.render_svg(result))
+        logger.info(f"Scalability curve saved: {csv_prefix}_scalability.svg")
+        return result, scalability.format_summary(result)
+    except Exception as e:
+        logger.error(f"Failed to analyze sweep: {e}")
+        return None, ""
+
+def check_regression(run_id, project_config, baseline=None):
+    """
+    Compare the stored run against its baseline (config: regression.*).
+
+    Returns:
+        RegressionResult, or None when the check is disabled or failed
+    """
+    regression_config = project_config.get("regression", {}) or {}
+    if run_id is None or not regression_config.get("enabled", True):
+        return None
+    store_config = config.get("results_store", {}) or {}
+    try:
+        with ResultsStore(store_config.get("path", DEFAULT_DB_PATH)) as store:
+            result = RegressionChecker.from_config(store, regression_config, baseline=baseline).check(run_id)
+    except Exception as e:
+        logger.error(f"Regression check failed: {e}")
+        return None
+    logger.info(result.summary())
+    if result.diffs:
+        logger.info("\n" + result.format_table(only_changed=False))
+    return result
+
+def run_test(project, env, users, rate, run_time, output_dir, tag="manual", baseline=None, sweep=False, soak=False):
     """
     Run Locust test via subprocess, generate report, and send notifications.
+    With sweep=True the user levels come from SweepShape (config: sweep.*) instead of users/rate/run_time.
+    With soak=True stats are rolled into windows (<prefix>_soak.jsonl) and the run aborts if the generator leaks.
+
+    Returns:
+        Process exit code: 0 on success, 1 when the run failed, REGRESSION_EXIT_CODE on a performance regression,
+        SLA_EXIT_CODE when a live SLA threshold stopped the run early,
+        SOAK_EXIT_CODE when the load generator itself leaked memory during a soak run
     """
     logger.info(f"Starting test for project: {project} (Env: {env})")
     
@@ -98,39 +196,49 @@ def run_test(project, env, users, rate, run_time, output_dir):
         "locust",
         "-f", "locustfile.py",
         "--headless",
-        "-u", str(users),
-        "-r", str(rate),
-        "-t", run_time,
         "--html", report_file,
-        "--csv", csv_prefix
+        "--csv", csv_prefix,
     ]
+    # The full history CSV grows with every stats entry every second, too much for a soak run
+    if not soak:
+        cmd.append("--csv-full-history")
+    if not sweep:
+        cmd += ["-u", str(users), "-r", str(rate), "-t", run_time]
     
     # Set Environment Variables
     env_vars = os.environ.copy()
     env_vars["PROJECT"] = project
     env_vars["LOCUST_ENV"] = env
+    env_vars["LOCUST_SAMPLES_PREFIX"] = csv_prefix
+    if sweep:
+        env_vars["LOCUST_SWEEP"] = "1"
+    if soak:
+        env_vars["LOCUST_SOAK"] = "1"
     
     logger.info(f"Executing command: {' '.join(cmd)}")
     
     start_time_str = time.strftime("%Y-%m-%d %H:%M:%S")
     start_time = time.time()
+    exit_code = 1
     
     try:
-        # Run Locust
-        # We capture output to parse stats roughly if needed, or just let it print
-        result = subprocess.run(cmd, env=env_vars, check=False, text=True, capture_output=True)
+        # Run Locust, streaming its output to the log and a rotating file
+        # Live progress is written to <csv_prefix>_status.json while the test runs
+        log_file = f"{csv_prefix}_locust.log"
+        status_file = f"{csv_prefix}_status.json"
+        logger.info(f"Locust output: {log_file}, live status: {status_file}")
+        returncode, progress, tail = stream_locust(
+            cmd, env_vars, log_file, status_file, project=project, env=env, report=report_file
+        )
         
         end_time = time.time()
         duration_seconds = end_time - start_time
         duration_str = f"{duration_seconds:.2f} s"
         
-        # Log stdout/stderr
         logger.info("Test execution finished.")
-        if result.returncode != 0:
-            logger.warning(f"Locust exited with code {result.returncode}")
-            logger.error(result.stderr)
-        else:
-            logger.info(result.stdout)
+        if returncode != 0:
+            logger.warning(f"Locust exited with code {returncode}")
+            logger.error("\n".join(tail))
 
         # Check if report exists
         if os.path.exists(report_file):
@@ -148,6 +256,58 @@ def run_test(project, env, users, rate, run_time, output_dir):
             stats["users"] = users
             
             logger.info(f"Parsed Stats: {stats}")
+
+            # Written by SlaGuard when a live threshold stopped the run
+            sla_breach = load_breach(f"{csv_prefix}_sla.json")
+            if sla_breach:
+                stats["sla_breach"] = sla_breach["message"]
+                logger.error(f"SLA breached: {sla_breach['message']}")
+                annotate_report(report_file, sla_breach["message"])
+
+            stats["analysis"], stats["analysis_summary"] = analyze_run(csv_prefix, project_config)
+            if stats["analysis_summary"]:
+                logger.info(f"Run analysis:\n{stats['analysis_summary']}")
+
+            if sweep:
+                stats["scalability"], stats["scalability_summary"] = analyze_sweep(csv_prefix, project_config)
+                if stats["scalability_summary"]:
+                    logger.info(f"Scalability:\n{stats['scalability_summary']}")
+
+            soak_result = None
+            if soak:
+                soak_result, stats["soak_summary"] = summarize_soak(f"{csv_prefix}_soak.jsonl")
+                if stats["soak_summary"]:
+                    logger.info(f"Soak:\n{stats['soak_summary']}")
+
+            params = {"users": users, "spawn_rate": rate, "run_time": run_time}
+            if sweep:
+                params = {"sweep": project_config.get("sweep")}
+            elif soak:
+                params["soak"] = True
+            # Runs cut short are kept in the store but never used as a regression baseline
+            if sla_breach:
+                params["aborted"] = "sla"
+            elif soak_result and soak_result["leak"]:
+                params["aborted"] = "soak_leak"
+            stats["run_id"] = store_results(
+                csv_prefix, project, env, params, tag, start_time, duration_seconds, report_file, returncode
+            )
+
+            exit_code = 0
+            # A sweep mixes several load levels and an SLA abort cuts the run short: neither is comparable with a baseline
+            regression = None if sweep or sla_breach else check_regression(stats["run_id"], project_config, baseline)
+            if regression is not None and regression.baseline_run_ids:
+                stats["regression_summary"] = regression.summary()
+                stats["regression_table"] = regression.format_table(limit=20)
+                if regression.has_regression:
+                    logger.error("Performance regression detected.")
+                    exit_code = REGRESSION_EXIT_CODE
+            if sla_breach:
+                exit_code = SLA_EXIT_CODE
+            # A leaking generator invalidates the results, so it takes precedence over everything else
+            if soak_result and soak_result["leak"]:
+                logger.error("Load generator leaked memory during the soak run.")
+                exit_code = SOAK_EXIT_CODE
             
             # Send Notification
             notifier = Notifier()
@@ -158,6 +318,8 @@ def run_test(project, env, users, rate, run_time, output_dir):
     except Exception as e:
         logger.error(f"Test run failed: {e}")
 
+    return exit_code
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run Locust Test with Reporting & Notifications")
     parser.add_argument("-p", "--project", required=True, help="Project name (e.g., website)")
@@ -166,7 +328,14 @@ if __name__ == "__main__":
     parser.add_argument("-r", "--rate", type=float, default=1, help="Spawn rate")
     parser.add_argument("-t", "--time", default="10s", help="Run time (e.g., 10s, 1m)")
     parser.add_argument("-o", "--output", default="reports", help="Output directory for reports")
+    parser.add_argument("--tag", default="manual", help="Run tag stored in the results database (e.g., nightly, ci)")
+    parser.add_argument("--baseline", help="Baseline for the regression check: a run id or 'median' (rolling median)")
+    parser.add_argument("--sweep", action="store_true",
+                        help="Run the configured concurrency sweep (sweep.*) and fit the scalability curve")
+    parser.add_argument("--soak", action="store_true",
+                        help="Soak mode: rolling stats windows, bounded memory, abort if the generator leaks (soak.*)")
     
     args = parser.parse_args()
     
-    run_test(args.project, args.env, args.users, args.rate, args.time, args.output)
+    sys.exit(run_test(args.project, args.env, args.users, args.rate, args.time, args.output, args.tag, args.baseline,
+                      args.sweep, args.soak))
@@ -5,63 +5,225 @@ import logging
 import argparse
 import sys
 import os
+import itertools
+
+import psutil
 
 # Add project root to sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from src.common.job_queue import JobQueue, DEFAULT_QUEUE_PATH
+from src.common.results_store import format_table
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
 logger = logging.getLogger(__name__)
 
-def job(project, env, users, rate, run_time, output):
-    logger.info(f"Running scheduled job for {project}...")
-    cmd = [
-        "python3", "tools/run_test.py",
-        "-p", project,
-        "-e", env,
-        "-u", str(users),
-        "-r", str(rate),
-        "-t", run_time,
-        "-o", output
-    ]
-    subprocess.run(cmd)
+POLL_INTERVAL = 1
+
+
+def expand_matrix(matrix_config):
+    """
+    展开任务矩阵: projects x envs x loads
+
+    Example config (in yaml):
+    scheduler:
+      matrix:
+        projects: [crm, website]
+        envs: [dev]
+        loads:
+          - {name: smoke, users: 10, rate: 2, time: 1m, cores: 1}
+          - {name: peak, users: 200, rate: 20, time: 10m, cores: 2}
+
+    Returns:
+        [{project, env, load_name, users, rate, run_time, cores}, ...]
+    """
+    jobs = []
+    for project, env, load in itertools.product(matrix_config.get("projects", []), matrix_config.get("envs", ["dev"]),
+                                                matrix_config.get("loads", [])):
+        jobs.append({
+            "project": project,
+            "env": env,
+            "load_name": load.get("name"),
+            "users": load.get("users", 1),
+            "rate": load.get("rate", 1),
+            "run_time": load.get("time", "10s"),
+            "cores": load.get("cores", 1),
+        })
+    return jobs
+
+
+class MatrixScheduler:
+    """
+    并发运行任务矩阵的调度器。
+
+    - 定时将矩阵中的任务加入持久化队列 (SQLite), 调度进程重启不会丢失排队任务
+    - 每个任务以独立的 run_test.py 子进程运行, 不阻塞调度循环
+    - 并发受 max_concurrent、核数预算 cpu_budget 与系统 CPU 使用率 max_cpu_percent 限制
+    - 同一 target (project:env) 的任务不会重叠运行
+    - 记录每个任务的排队延迟与运行时长
+    """
+
+    def __init__(self, queue, output, max_concurrent=1, cpu_budget=None, max_cpu_percent=None):
+        """
+        Args:
+            queue: JobQueue
+            output: 报告输出目录
+            max_concurrent: 最大并发任务数
+            cpu_budget: 总核数预算, 每个任务按其 cores 占用 (默认本机核数)
+            max_cpu_percent: 系统 CPU 使用率高于该值时不启动新任务
+        """
+        self.queue = queue
+        self.output = output
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.cpu_budget = float(cpu_budget or os.cpu_count() or 1)
+        self.max_cpu_percent = max_cpu_percent
+        self.processes = {}
+
+    def enqueue(self, jobs, tag):
+        for job in jobs:
+            # 所需核数超出总预算的任务永远无法被调度, 拒绝入队
+            if float(job["cores"]) > self.cpu_budget:
+                logger.error(f"Rejected job {job['project']}/{job['env']} {job['load_name'] or ''}: "
+                             f"needs {job['cores']} cores, cpu_budget is {self.cpu_budget:g}")
+                continue
+            job_id = self.queue.enqueue(tag=tag, **job)
+            if job_id:
+                logger.info(f"Queued job #{job_id}: {job['project']}/{job['env']} "
+                            f"{job['load_name'] or ''} ({job['users']} users, {job['run_time']})")
+
+    def recover(self):
+        self.queue.recover(psutil.pid_exists)
+
+    def _used_cores(self):
+        return sum(job["cores"] for job in self.queue.running())
+
+    def _cpu_busy(self):
+        if not self.max_cpu_percent:
+            return False
+        return psutil.cpu_percent(interval=None) > float(self.max_cpu_percent)
+
+    def start_jobs(self):
+        """在预算允许时启动排队中的任务"""
+        while len(self.queue.running()) < self.max_concurrent and not self._cpu_busy():
+            job = self.queue.claim_next(self.cpu_budget - self._used_cores())
+            if job is None:
+                return
+            cmd = [
+                sys.executable, "tools/run_test.py",
+                "-p", job["project"],
+                "-e", job["env"],
+                "-u", str(job["users"]),
+                "-r", str(job["rate"]),
+                "-t", job["run_time"],
+                "-o", self.output,
+            ]
+            if job["tag"]:
+                cmd += ["--tag", job["tag"]]
+            # run_test.py 在解析 -e 之前就按 LOCUST_ENV 加载配置, 必须与任务的环境一致
+            process = subprocess.Popen(cmd, env={**os.environ, "LOCUST_ENV": job["env"]})
+            self.processes[job["id"]] = process
+            self.queue.set_pid(job["id"], process.pid)
+            logger.info(f"Started job #{job['id']} {job['target']} (pid {process.pid}, "
+                        f"queued {job['started_at'] - job['enqueued_at']:.1f}s)")
+
+    def reap_jobs(self):
+        """回收已结束的任务, 包括调度进程重启前遗留的任务"""
+        for job in self.queue.running():
+            process = self.processes.get(job["id"])
+            if process is not None:
+                exit_code = process.poll()
+                if exit_code is None:
+                    continue
+                del self.processes[job["id"]]
+            elif job["pid"] and psutil.pid_exists(job["pid"]):
+                continue
+            else:
+                exit_code = -1  # 遗留任务, 退出码未知
+
+            finished = self.queue.finish(job["id"], exit_code)
+            log = logger.info if exit_code == 0 else logger.warning
+            log(f"Job #{job['id']} {job['target']} finished with code {exit_code} "
+                f"(queue latency {finished['started_at'] - finished['enqueued_at']:.1f}s, "
+                f"duration {finished['finished_at'] - finished['started_at']:.1f}s)")
+
+    def run_forever(self):
+        self.recover()
+        while True:
+            schedule.run_pending()
+            self.reap_jobs()
+            self.start_jobs()
+            time.sleep(POLL_INTERVAL)
+
+
+def print_status(queue, last):
+    rows = queue.recent(last)
+    print(format_table(
+        ["id", "target", "load", "users", "tag", "state", "exit", "queue(s)", "duration(s)"],
+        [[r["id"], r["target"], r["load_name"], r["users"], r["tag"], r["state"], r["exit_code"],
+          r["queue_latency"], r["duration"]] for r in rows],
+    ))
+
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Simple Scheduler for Locust Tests")
+    parser = argparse.ArgumentParser(description="Scheduler for Locust Tests (single job or project x env x load matrix)")
     parser.add_argument("--mode", choices=["interval", "daily"], help="Schedule mode: interval (minutes) or daily (at specific time)")
     parser.add_argument("--at", help="Time to run for daily mode (HH:MM)")
     parser.add_argument("--interval", type=int, help="Interval in minutes (for interval mode)")
-    parser.add_argument("-p", "--project", required=True, help="Project name")
+    parser.add_argument("-p", "--project", help="Project name (omit to run scheduler.matrix from config)")
     parser.add_argument("-e", "--env", default="dev", help="Environment")
     parser.add_argument("-u", "--users", type=int, default=1, help="Number of users")
     parser.add_argument("-r", "--rate", type=float, default=1, help="Spawn rate")
     parser.add_argument("-t", "--time", default="10s", help="Run time")
     parser.add_argument("-o", "--output", default="reports", help="Output directory")
+    parser.add_argument("--max-concurrent", type=int, help="Maximum number of concurrent runs")
+    parser.add_argument("--now", action="store_true", help="Enqueue the jobs once immediately")
+    parser.add_argument("--status", action="store_true", help="Show recent jobs with queue latency and duration, then exit")
 
     args = parser.parse_args()
 
     # Load defaults from config
     os.environ["LOCUST_ENV"] = args.env
     from src.config.manager import config
-    
+
     scheduler_config = config.get("scheduler", {})
-    
+    queue = JobQueue(scheduler_config.get("queue_db", DEFAULT_QUEUE_PATH))
+
+    if args.status:
+        print_status(queue, 20)
+        sys.exit(0)
+
     # Resolve parameters: CLI Args > Config > Defaults
     mode = args.mode or scheduler_config.get("mode", "daily")
     at_time = args.at or scheduler_config.get("at", "00:00")
     interval = args.interval or scheduler_config.get("interval", 60)
+    tag = "nightly" if mode == "daily" else "scheduled"
+
+    if args.project:
+        jobs = [{"project": args.project, "env": args.env, "load_name": None, "users": args.users,
+                 "rate": args.rate, "run_time": args.time, "cores": 1}]
+    else:
+        jobs = expand_matrix(scheduler_config.get("matrix", {}))
+        if not jobs:
+            parser.error("either --project or scheduler.matrix in config is required")
 
-    # Schedule the job
+    scheduler = MatrixScheduler(
+        queue,
+        args.output,
+        max_concurrent=args.max_concurrent or scheduler_config.get("max_concurrent", 1),
+        cpu_budget=scheduler_config.get("cpu_budget"),
+        max_cpu_percent=scheduler_config.get("max_cpu_percent"),
+    )
+
+    # Schedule the jobs
     if mode == "daily":
-        schedule.every().day.at(at_time).do(job, args.project, args.env, args.users, args.rate, args.time, args.output)
-        logger.info(f"Scheduler started. Running {args.project} every day at {at_time}.")
+        schedule.every().day.at(at_time).do(scheduler.enqueue, jobs, tag)
+        logger.info(f"Scheduler started. Queuing {len(jobs)} job(s) every day at {at_time}.")
     else:
-        schedule.every(interval).minutes.do(job, args.project, args.env, args.users, args.rate, args.time, args.output)
-        logger.info(f"Scheduler started. Running {args.project} every {interval} minutes.")
-    
-    # Run once immediately for verification? 
-    # job(args.project, args.env, args.users, args.rate, args.time, args.output)
-    
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+        schedule.every(interval).minutes.do(scheduler.enqueue, jobs, tag)
+        logger.info(f"Scheduler started. Queuing {len(jobs)} job(s) every {interval} minutes.")
+
+    if args.now:
+        scheduler.enqueue(jobs, tag)
+
+    scheduler.run_forever()